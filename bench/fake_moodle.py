@@ -0,0 +1,587 @@
+from aiohttp import web
+from collections import defaultdict
+from contextlib import nullcontext
+from dataclasses import dataclass
+from functools import lru_cache
+from io import BytesIO
+from moodle.constants import (
+    MOODLE_AJAX_SERVICE_PATH,
+    MOODLE_CHOICE_ACTIVITY_PATH,
+    MOODLE_COURSE_VIEW_PATH,
+    MOODLE_MAIN_PAGE_PATH,
+    MOODLE_QUIZ_ACTIVITY_PATH,
+    MOODLE_SESSION_COOKIE_NAME,
+    MOODLE_WEB_SERVICE_PATH,
+    MOODLE_WEB_SERVICE_TOKEN_PATH,
+)
+from typing import Any, Awaitable, Callable, Mapping, Sequence
+import asyncio
+import pandas as pd
+import random
+import secrets
+import time
+
+
+STATS_PATH = "/__stats"
+"""Path to the endpoint returning the request statistics of the fake server."""
+
+_LOGIN_PATH = "/login/index.php"
+"""Path to the login page."""
+
+_CHOICE_REPORT_VARIANTS = 8
+"""The number of distinct choice reports. Rendering Excel files is slow, so they are rendered once at startup."""
+
+
+@dataclass(frozen=True)
+class FakeMoodleConfig:
+    """Class to represent the shape and the behaviour of the fake Moodle server."""
+
+    sections: int = 8
+    """The number of sections in every course."""
+
+    choices_per_section: int = 4
+    """The number of choice activities in every section."""
+
+    quizzes_per_section: int = 1
+    """The number of quiz activities in every section."""
+
+    students: int = 300
+    """The number of students enrolled in every course."""
+
+    groups: int = 10
+    """The number of groups the students are distributed across."""
+
+    options: int = 6
+    """The number of options in every choice activity."""
+
+    latency: float = 0.05
+    """The delay added to every response, in seconds."""
+
+    jitter: float = 0.02
+    """The upper bound of the random delay added to the latency, in seconds."""
+
+    error_rate: float = 0.0
+    """The probability of responding with an internal server error."""
+
+    seed: int = 0
+    """The seed of the generated data."""
+
+    login: str = "student"
+    """The login accepted by the fake server."""
+
+    password: str = "password"
+    """The password accepted by the fake server."""
+
+    session_timeout: float = 7200.0
+    """The time in seconds a session stays valid since its last request."""
+
+    session_lock: bool = True
+    """Whether the requests of one session are processed one by one, like Moodle does with its session lock."""
+
+
+@dataclass(frozen=True)
+class _FakeStudent:
+    id: int
+    first_name: str
+    last_name: str
+    login: str
+    group: str
+
+
+def create_app(config: FakeMoodleConfig) -> web.Application:
+    """Create the fake Moodle application serving the endpoints used by the project.
+
+    Args:
+        config (FakeMoodleConfig): The shape and the behaviour of the fake server.
+
+    Returns:
+        web.Application: The aiohttp application.
+    """
+
+    server = _FakeMoodle(config)
+
+    app = web.Application(middlewares=[server.middleware])
+    app.router.add_get(_LOGIN_PATH, server.login_page)
+    app.router.add_post(_LOGIN_PATH, server.login)
+    app.router.add_get(MOODLE_MAIN_PAGE_PATH, server.main_page)
+    app.router.add_get(f"{MOODLE_COURSE_VIEW_PATH}/view.php", server.course)
+    app.router.add_get(
+        f"{MOODLE_CHOICE_ACTIVITY_PATH}/report.php", server.choice_report
+    )
+    app.router.add_post(f"{MOODLE_QUIZ_ACTIVITY_PATH}/report.php", server.quiz_report)
+    app.router.add_get(f"{MOODLE_QUIZ_ACTIVITY_PATH}/review.php", server.quiz_review)
+    app.router.add_post(MOODLE_AJAX_SERVICE_PATH, server.ajax_service)
+    app.router.add_post(MOODLE_WEB_SERVICE_TOKEN_PATH, server.web_service_token)
+    app.router.add_post(MOODLE_WEB_SERVICE_PATH, server.web_service)
+    app.router.add_get(STATS_PATH, server.stats)
+    app.on_startup.append(server.warm_up)
+
+    return app
+
+
+class _FakeMoodle:
+    def __init__(self, config: FakeMoodleConfig) -> None:
+        self._config = config
+        self._random = random.Random(config.seed)
+        self._sessions: dict[str, str] = {}
+        self._session_accessed: dict[str, float] = {}
+        self._tokens: set[str] = set()
+        self._requests = 0
+        self._errors = 0
+        self._bytes = 0
+        self._session_locks: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._processing = 0
+        self._peak_processing = 0
+        self._lock_wait = 0.0
+        self._students = _generate_students(config)
+
+    @web.middleware
+    async def middleware(
+        self,
+        request: web.Request,
+        handler: Callable[[web.Request], Awaitable[web.StreamResponse]],
+    ) -> web.StreamResponse:
+        if request.path == STATS_PATH:
+            return await handler(request)
+
+        self._requests += 1
+        config = self._config
+        cookie = request.cookies.get(MOODLE_SESSION_COOKIE_NAME)
+        session_lock = (
+            self._session_locks[cookie]
+            if config.session_lock and cookie in self._sessions
+            else nullcontext()
+        )
+
+        # Session is locked for the whole time the request is processed, including the latency
+        waiting_started_at = time.perf_counter()
+        async with session_lock:
+            self._lock_wait += time.perf_counter() - waiting_started_at
+            self._processing += 1
+            self._peak_processing = max(self._peak_processing, self._processing)
+            try:
+                await asyncio.sleep(
+                    config.latency + self._random.uniform(0, config.jitter)
+                )
+
+                if self._random.random() < config.error_rate:
+                    self._errors += 1
+                    raise web.HTTPInternalServerError()
+
+                response = await handler(request)
+            finally:
+                self._processing -= 1
+
+        if isinstance(response, web.Response) and response.body is not None:
+            self._bytes += len(response.body)
+
+        return response
+
+    async def warm_up(self, _: web.Application) -> None:
+        for variant in range(_CHOICE_REPORT_VARIANTS):
+            _render_choice_report(self._config, variant)
+
+    async def stats(self, request: web.Request) -> web.Response:
+        peak_processing = self._peak_processing
+        if request.query.get("reset"):
+            # Peak is measured between two requests for the statistics
+            self._peak_processing = self._processing
+
+        return web.json_response(
+            {
+                "requests": self._requests,
+                "errors": self._errors,
+                "bytes": self._bytes,
+                "peak_parallelism": peak_processing,
+                "lock_wait": self._lock_wait,
+            }
+        )
+
+    async def login_page(self, _: web.Request) -> web.Response:
+        return _html(
+            '<form method="post"><input type="hidden" name="logintoken" '
+            f'value="{secrets.token_hex(16)}"></form>'
+        )
+
+    async def login(self, request: web.Request) -> web.StreamResponse:
+        form = await request.post()
+        if (form.get("username"), form.get("password")) != (
+            self._config.login,
+            self._config.password,
+        ):
+            return _html('<a href="#" id="loginerrormessage">Invalid login</a>')
+
+        cookie = secrets.token_hex(16)
+        self._sessions[cookie] = secrets.token_hex(5)
+        self._session_accessed[cookie] = time.monotonic()
+
+        response = web.HTTPSeeOther(MOODLE_MAIN_PAGE_PATH)
+        response.set_cookie(MOODLE_SESSION_COOKIE_NAME, cookie)
+        raise response
+
+    async def main_page(self, request: web.Request) -> web.StreamResponse:
+        session_key = self.__get_session_key(request)
+        if not session_key:
+            raise web.HTTPSeeOther(_LOGIN_PATH)
+
+        return _html(
+            f'<input type="hidden" name="sesskey" value="{session_key}">'
+            "<h1>Dashboard</h1>"
+        )
+
+    async def course(self, request: web.Request) -> web.StreamResponse:
+        if not self.__get_session_key(request):
+            raise web.HTTPSeeOther(_LOGIN_PATH)
+
+        return _html(_render_course(self._config, int(request.query["id"])))
+
+    async def choice_report(self, request: web.Request) -> web.StreamResponse:
+        session_key = self.__get_session_key(request)
+        if not session_key or request.query.get("sesskey") != session_key:
+            raise web.HTTPSeeOther(_LOGIN_PATH)
+
+        return web.Response(
+            body=_render_choice_report(
+                self._config, int(request.query["id"]) % _CHOICE_REPORT_VARIANTS
+            ),
+            content_type="application/vnd.ms-excel",
+        )
+
+    async def quiz_report(self, request: web.Request) -> web.StreamResponse:
+        form = await request.post()
+        session_key = self.__get_session_key(request)
+        if not session_key or form.get("sesskey") != session_key:
+            raise web.HTTPSeeOther(_LOGIN_PATH)
+
+        return _html(
+            _render_quiz_report(
+                self._students,
+                int(str(form["id"])),
+                int(str(form.get("page", 0))),
+                int(str(form.get("pagesize", 30))),
+            )
+        )
+
+    async def quiz_review(self, request: web.Request) -> web.StreamResponse:
+        if not self.__get_session_key(request):
+            raise web.HTTPSeeOther(_LOGIN_PATH)
+
+        return _html(_render_quiz_review(self._config, int(request.query["attempt"])))
+
+    async def ajax_service(self, request: web.Request) -> web.Response:
+        session_key = self.__get_session_key(request)
+        if not session_key:
+            return web.json_response(
+                [{"error": True, "exception": {"errorcode": "servicerequireslogin"}}]
+            )
+
+        if request.query.get("sesskey") != session_key:
+            return web.json_response({"error": True, "errorcode": "invalidsesskey"})
+
+        calls = await request.json()
+        if [call.get("methodname") for call in calls] != [
+            "core_session_time_remaining"
+        ]:
+            return web.json_response(
+                [{"error": True, "exception": {"errorcode": "servicenotavailable"}}]
+            )
+
+        cookie = request.cookies[MOODLE_SESSION_COOKIE_NAME]
+        time_remaining = self._config.session_timeout - (
+            time.monotonic() - self._session_accessed[cookie]
+        )
+        return web.json_response(
+            [{"error": False, "data": {"timeremaining": int(time_remaining)}}]
+        )
+
+    async def web_service_token(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        if (form.get("username"), form.get("password")) != (
+            self._config.login,
+            self._config.password,
+        ):
+            return web.json_response({"error": "Invalid login", "errorcode": "login"})
+
+        token = secrets.token_hex(16)
+        self._tokens.add(token)
+        return web.json_response({"token": token})
+
+    async def web_service(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        if form.get("wstoken") not in self._tokens:
+            return web.json_response(
+                {"exception": "moodle_exception", "message": "Invalid token"}
+            )
+
+        handler = _WEB_SERVICE_FUNCTIONS.get(str(form.get("wsfunction")))
+        if not handler:
+            return web.json_response(
+                {"exception": "moodle_exception", "message": "Unknown function"}
+            )
+
+        return web.json_response(handler(self._config, self._students, form))
+
+    def __get_session_key(self, request: web.Request) -> str | None:
+        cookie = request.cookies.get(MOODLE_SESSION_COOKIE_NAME, "")
+        if cookie not in self._sessions:
+            return None
+
+        now = time.monotonic()
+        if now - self._session_accessed[cookie] > self._config.session_timeout:
+            del self._sessions[cookie]
+            del self._session_accessed[cookie]
+            return None
+
+        self._session_accessed[cookie] = now
+        return self._sessions[cookie]
+
+
+def _html(body: str) -> web.Response:
+    return web.Response(
+        text=f"<html><body>{body}</body></html>", content_type="text/html"
+    )
+
+
+def _generate_students(config: FakeMoodleConfig) -> Sequence[_FakeStudent]:
+    generator = random.Random(config.seed)
+    first_names = ["Анна", "Борис", "Ёлка", "Дмитрий", "Елена", "Жанна", "Иван"]
+    last_names = ["Иванов", "Петров", "Сидоров", "Ёжиков", "Ежов", "Смирнов"]
+
+    return [
+        _FakeStudent(
+            id,
+            generator.choice(first_names),
+            f"{generator.choice(last_names)}-{id}",
+            f"student{id}",
+            f"ПММ_01.03.02_Прикладная математика_Общий_{id % config.groups + 1}_22_о_3к",
+        )
+        for id in range(1, config.students + 1)
+    ]
+
+
+def _get_activity_id(course_id: int, section: int, position: int) -> int:
+    return course_id * 10_000 + section * 100 + position
+
+
+def _get_activity_kind(config: FakeMoodleConfig, position: int) -> str:
+    return "choice" if position < config.choices_per_section else "quiz"
+
+
+def _render_course(config: FakeMoodleConfig, course_id: int) -> str:
+    navigation = "".join(
+        f'<li class="nav-item"><a href="/course/index.php?categoryid={index}" '
+        f'title="Категория {index}"><span>Категория {index}</span></a></li>'
+        for index in range(20)
+    )
+
+    parts = [
+        f'<nav><ul>{navigation}</ul></nav><div class="page-header">'
+        f'<a href="{MOODLE_COURSE_VIEW_PATH}/view.php?id={course_id}" '
+        f'title="Курс {course_id}">Курс {course_id}</a></div><ul class="topics">'
+    ]
+
+    activities_per_section = config.choices_per_section + config.quizzes_per_section
+    for section in range(config.sections):
+        section_id = course_id * 100 + section
+        parts.append(
+            f'<li id="section-{section}" data-id="{section_id}" class="section main">'
+            f'<div class="section-header"><h3 class="sectionname">Раздел {section}</h3>'
+            '</div><ul class="section img-text">'
+        )
+
+        for position in range(activities_per_section):
+            activity_id = _get_activity_id(course_id, section, position)
+            kind = _get_activity_kind(config, position)
+            parts.append(
+                f'<li class="activity activity-wrapper {kind} modtype_{kind}" '
+                f'data-id="{activity_id}"><div class="activity-item" '
+                f'data-activityname="Опрос {section}.{position}"><div class="activityname">'
+                f'<a href="/mod/{kind}/view.php?id={activity_id}">'
+                f'<span class="instancename">Опрос {section}.{position}</span></a></div>'
+                '<div class="description"><div class="no-overflow"><p>Описание</p>'
+                "</div></div></div></li>"
+            )
+
+        parts.append("</ul></li>")
+
+    parts.append("</ul>")
+    return "".join(parts)
+
+
+@lru_cache(maxsize=_CHOICE_REPORT_VARIANTS)
+def _render_choice_report(config: FakeMoodleConfig, variant: int) -> bytes:
+    generator = random.Random(config.seed ^ variant)
+    rows = [
+        {
+            "Фамилия": student.last_name,
+            "Имя": student.first_name,
+            "Группа": student.group,
+            "Вариант ответа": f"Предмет {generator.randrange(config.options) + 1}",
+        }
+        for student in _generate_students(config)
+    ]
+
+    buffer = BytesIO()
+    pd.DataFrame(rows).to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def _render_quiz_report(
+    students: Sequence[_FakeStudent], quiz_id: int, page: int, page_size: int
+) -> str:
+    rows = []
+    for index, student in enumerate(
+        students[page * page_size : (page + 1) * page_size]
+    ):
+        attempt_id = quiz_id * 10_000 + student.id
+        rows.append(
+            f'<tr id="mod-quiz-report-overview_r{index}" class="gradedattempt">'
+            f'<td><input type="checkbox" name="attemptid[]" value="{attempt_id}"></td>'
+            f'<td><a href="/user/view.php?id={student.id}">{student.last_name} {student.first_name}</a>'
+            f'<a href="{MOODLE_QUIZ_ACTIVITY_PATH}/review.php?attempt={attempt_id}">Просмотр</a></td>'
+            f"<td>{student.login}</td><td>{student.login}@example.com</td></tr>"
+        )
+
+    return (
+        f'<div class="quizattemptcounts">Попыток: {len(students)}</div>'
+        "<table><thead><tr><th>Студент</th></tr></thead><tbody>"
+        f'{"".join(rows)}</tbody></table>'
+    )
+
+
+def _render_quiz_review(config: FakeMoodleConfig, attempt_id: int) -> str:
+    generator = random.Random(config.seed ^ attempt_id)
+    chosen = generator.randrange(config.options)
+    prefix = f"q{attempt_id}:1"
+
+    options = []
+    for index in range(config.options):
+        checked = ' checked="checked"' if index == chosen else ""
+        options.append(
+            f'<div class="r{index % 2}">'
+            f'<input type="radio" name="{prefix}_answer" value="{index}" id="{prefix}_answer{index}" '
+            f'aria-labelledby="{prefix}_answer{index}_label" disabled="disabled"{checked} />'
+            f'<div class="d-flex w-auto" id="{prefix}_answer{index}_label" data-region="answer-label">'
+            f'<span class="answernumber">{chr(ord("a") + index)}. </span>'
+            f'<div class="flex-fill ml-1">Предмет {index + 1}</div></div></div>'
+        )
+
+    return (
+        f'<div id="question-{attempt_id}-1" class="que multichoice deferredfeedback complete">'
+        '<div class="info"><h3 class="no">Вопрос <span class="qno">1</span></h3></div>'
+        '<div class="content"><div class="formulation clearfix">'
+        '<div class="qtext"><p>Выберите предмет по выбору</p></div>'
+        f'<div class="ablock"><div class="answer">{"".join(options)}</div></div>'
+        "</div></div></div>"
+    )
+
+
+def _ws_course_by_field(
+    _: FakeMoodleConfig, __: Sequence[_FakeStudent], form: Mapping[str, Any]
+) -> Any:
+    course_id = int(form["value"])
+    return {"courses": [{"id": course_id, "fullname": f"Курс {course_id}"}]}
+
+
+def _ws_course_contents(
+    config: FakeMoodleConfig, _: Sequence[_FakeStudent], form: Mapping[str, Any]
+) -> Any:
+    course_id = int(form["courseid"])
+    activities_per_section = config.choices_per_section + config.quizzes_per_section
+
+    return [
+        {
+            "id": course_id * 100 + section,
+            "name": f"Раздел {section}",
+            "modules": [
+                {
+                    "id": _get_activity_id(course_id, section, position),
+                    "name": f"Опрос {section}.{position}",
+                    "instance": _get_activity_id(course_id, section, position),
+                    "modname": _get_activity_kind(config, position),
+                }
+                for position in range(activities_per_section)
+            ],
+        }
+        for section in range(config.sections)
+    ]
+
+
+def _ws_course_module(
+    _: FakeMoodleConfig, __: Sequence[_FakeStudent], form: Mapping[str, Any]
+) -> Any:
+    module_id = int(form["cmid"])
+    return {
+        "cm": {"id": module_id, "course": module_id // 10_000, "instance": module_id}
+    }
+
+
+def _ws_enrolled_users(
+    _: FakeMoodleConfig, students: Sequence[_FakeStudent], __: Mapping[str, Any]
+) -> Any:
+    return [
+        {
+            "id": student.id,
+            "username": student.login,
+            "firstname": student.first_name,
+            "lastname": student.last_name,
+            "fullname": f"{student.first_name} {student.last_name}",
+            "email": f"{student.login}@example.com",
+            "groups": [{"id": 1, "name": student.group}],
+        }
+        for student in students
+    ]
+
+
+def _ws_choice_results(
+    config: FakeMoodleConfig, students: Sequence[_FakeStudent], form: Mapping[str, Any]
+) -> Any:
+    generator = random.Random(config.seed ^ int(form["choiceid"]))
+    responses: list[list[Mapping[str, Any]]] = [[] for _ in range(config.options)]
+    for student in students:
+        responses[generator.randrange(config.options)].append({"userid": student.id})
+
+    return {
+        "options": [
+            {"id": index + 1, "text": f"Предмет {index + 1}", "userresponses": users}
+            for index, users in enumerate(responses)
+        ]
+    }
+
+
+def _ws_user_attempts(
+    _: FakeMoodleConfig, __: Sequence[_FakeStudent], form: Mapping[str, Any]
+) -> Any:
+    user_id = int(form["userid"])
+    attempt_id = int(form["quizid"]) * 10_000 + user_id
+    return {"attempts": [{"id": attempt_id, "userid": user_id, "state": "finished"}]}
+
+
+def _ws_attempt_review(
+    config: FakeMoodleConfig, _: Sequence[_FakeStudent], form: Mapping[str, Any]
+) -> Any:
+    attempt_id = int(form["attemptid"])
+    return {
+        "attempt": {"id": attempt_id, "state": "finished"},
+        "questions": [{"slot": 1, "html": _render_quiz_review(config, attempt_id)}],
+    }
+
+
+def _ws_site_info(*_: Any) -> Any:
+    return {"sitename": "Fake Moodle"}
+
+
+_WEB_SERVICE_FUNCTIONS: Mapping[
+    str,
+    Callable[[FakeMoodleConfig, Sequence[_FakeStudent], Mapping[str, Any]], Any],
+] = {
+    "core_course_get_courses_by_field": _ws_course_by_field,
+    "core_course_get_contents": _ws_course_contents,
+    "core_course_get_course_module": _ws_course_module,
+    "core_enrol_get_enrolled_users": _ws_enrolled_users,
+    "mod_choice_get_choice_results": _ws_choice_results,
+    "mod_quiz_get_user_attempts": _ws_user_attempts,
+    "mod_quiz_get_attempt_review": _ws_attempt_review,
+    "core_webservice_get_site_info": _ws_site_info,
+}
+"""Web service functions implemented by the fake server."""
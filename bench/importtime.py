@@ -0,0 +1,160 @@
+from argparse import ArgumentParser, Namespace
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Sequence
+import json
+import statistics
+import subprocess
+import sys
+
+
+DEFAULT_MODULES = ["cli.cli", "gui.forms"]
+"""Modules imported by the entry points of the application."""
+
+DEFERRED_MODULES = ["pandas", "openpyxl"]
+"""Heavy modules which must be imported only when a report is built."""
+
+_IMPORT_TIME_PREFIX = "import time:"
+"""Prefix of the lines written by `-X importtime`."""
+
+
+@dataclass(frozen=True)
+class ImportTimeResult:
+    """Class to represent the cold import time of a module."""
+
+    module: str
+    """The name of the imported module."""
+
+    cumulative: float
+    """The median time of importing the module with all its dependencies, in seconds."""
+
+    heaviest: Sequence[tuple[str, float]]
+    """The top-level packages imported along with the module and their cumulative import time, the slowest first."""
+
+    deferred_loaded: Sequence[str]
+    """The modules from DEFERRED_MODULES which were imported eagerly."""
+
+
+def measure_import_time(module: str, repeat: int = 5, top: int = 5) -> ImportTimeResult:
+    """Measure the cold import time of a module in fresh interpreters with `-X importtime`.
+
+    Args:
+        module (str): The name of the module to import.
+        repeat (int, optional): The number of interpreters to start, the median is reported. Defaults to 5.
+        top (int, optional): The number of the heaviest packages to report. Defaults to 5.
+
+    Returns:
+        ImportTimeResult: The import time of the module.
+
+    Raises:
+        RuntimeError: If the module can't be imported.
+    """
+
+    runs = [_run_import(module) for _ in range(repeat)]
+    cumulative = statistics.median(run[module] for run in runs)
+
+    # Packages are aggregated over all runs to smooth out the noise
+    packages = {
+        name: statistics.median(run.get(name, 0.0) for run in runs)
+        for name in runs[0]
+        if "." not in name and name != module
+    }
+    heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+
+    return ImportTimeResult(
+        module,
+        cumulative,
+        heaviest[:top],
+        [name for name in DEFERRED_MODULES if name in runs[0]],
+    )
+
+
+def parse_arguments() -> Namespace:
+    """Parse command-line arguments for the import time benchmark.
+
+    Returns:
+        Namespace: Parsed command-line arguments.
+    """
+
+    arg_parser = ArgumentParser(
+        prog="Amm-option-subjects-puller-importtime",
+        description="Измерение времени холодного запуска (импорта модулей) приложения",
+    )
+
+    arg_parser.add_argument(
+        "modules",
+        default=DEFAULT_MODULES,
+        help="Модули, время импорта которых нужно измерить",
+        metavar="module",
+        nargs="*",
+        type=str,
+    )
+    arg_parser.add_argument(
+        "-r",
+        "--repeat",
+        default=5,
+        help="Число запусков интерпретатора для каждого модуля",
+        type=int,
+    )
+    arg_parser.add_argument(
+        "-o",
+        "--output",
+        help="Файл JSON Lines, в который дописываются результаты для отслеживания изменений",
+        type=str,
+    )
+
+    return arg_parser.parse_args()
+
+
+def main(args: Namespace) -> None:
+    """Run the import time benchmark with the command-line arguments and print the measurements.
+
+    Args:
+        args (Namespace): Parsed command-line arguments.
+    """
+
+    results = []
+    for module in args.modules or DEFAULT_MODULES:
+        try:
+            result = measure_import_time(module, args.repeat)
+        except RuntimeError as e:
+            print(f"{module}: не удалось импортировать. {str(e)}")
+            continue
+
+        results.append(result)
+        print(f"{module}: {result.cumulative * 1000:.0f} мс")
+        for name, cumulative in result.heaviest:
+            print(f"  {name}: {cumulative * 1000:.0f} мс")
+
+        if result.deferred_loaded:
+            print(f"  Загружены при запуске: {', '.join(result.deferred_loaded)}")
+
+    if args.output and results:
+        measured_at = datetime.now().isoformat(timespec="seconds")
+        with open(args.output, "a", encoding="utf-8") as file:
+            for result in results:
+                file.write(
+                    json.dumps({"measured_at": measured_at, **asdict(result)}) + "\n"
+                )
+
+
+def _run_import(module: str) -> dict[str, float]:
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode:
+        raise RuntimeError(process.stderr.strip().splitlines()[-1])
+
+    # Every line is "import time: <self us> | <cumulative us> | <indented module name>"
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith(_IMPORT_TIME_PREFIX):
+            continue
+
+        _, cumulative, name = line[len(_IMPORT_TIME_PREFIX) :].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative) / 1_000_000
+
+    return times
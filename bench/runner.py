@@ -0,0 +1,323 @@
+from argparse import ArgumentParser, Namespace
+from aiohttp import ClientSession, web
+from bench.fake_moodle import STATS_PATH, FakeMoodleConfig, create_app
+from dataclasses import dataclass
+from logic.builder import build_course_report
+from moodle.auth import (
+    MoodleCredentials,
+    MoodleSessionPool,
+    authorize_many,
+    authorize_web_service,
+)
+from moodle.backend import MoodleBackend
+from moodle.constants import MOODLE_DEFAULT_MAX_CONCURRENCY
+from moodle.session import MoodleSession
+from moodle.webservice import MoodleWebServiceSession
+from os import path
+from typing import Any, AsyncIterator, Mapping
+from contextlib import asynccontextmanager
+import asyncio
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    """Class to represent the measurements of a full report build against the fake Moodle server."""
+
+    wall_time: float
+    """The time spent on building the reports, in seconds."""
+
+    requests: int
+    """The number of requests handled by the server during the build."""
+
+    transferred_bytes: int
+    """The number of response body bytes sent by the server during the build."""
+
+    peak_rss: int | None
+    """The peak resident set size of the benchmark process in bytes, or None if unavailable."""
+
+    failed_courses: int
+    """The number of courses whose report wasn't built because of an error."""
+
+    peak_parallelism: int
+    """The largest number of requests the server processed at the same time during the build."""
+
+    lock_wait: float
+    """The summary time the requests waited for their session to be unlocked on the server, in seconds."""
+
+    @property
+    def requests_per_second(self) -> float:
+        """The number of requests handled by the server per second of the build."""
+
+        return self.requests / self.wall_time if self.wall_time else 0.0
+
+
+@asynccontextmanager
+async def run_fake_moodle(config: FakeMoodleConfig) -> AsyncIterator[str]:
+    """Run the fake Moodle server in a separate process.
+
+    The server runs in its own process, so its work affects neither the wall time nor the peak RSS of the build.
+
+    Args:
+        config (FakeMoodleConfig): The shape and the behaviour of the fake server.
+
+    Yields:
+        AsyncIterator[str]: Base URL of the running server.
+    """
+
+    port = _get_free_port()
+    process = multiprocessing.get_context("spawn").Process(
+        target=_serve, args=(config, port), daemon=True
+    )
+    process.start()
+
+    # Cookie jar of aiohttp ignores cookies of IP addresses, so the host name is used
+    base_address = f"http://localhost:{port}"
+    try:
+        await _wait_for_port(port)
+        yield base_address
+    finally:
+        process.terminate()
+        process.join()
+
+
+async def run_benchmark(
+    config: FakeMoodleConfig,
+    base_address: str,
+    courses: int = 1,
+    max_concurrency: int = MOODLE_DEFAULT_MAX_CONCURRENCY,
+    web_service: bool = False,
+    output_directory: str | None = None,
+    sessions: int = 1,
+) -> BenchmarkResult:
+    """Build the reports of the fake courses and measure the build.
+
+    Args:
+        config (FakeMoodleConfig): The configuration the fake server was started with.
+        base_address (str): Base URL of the running fake server.
+        courses (int, optional): The number of courses built concurrently. Defaults to 1.
+        max_concurrency (int, optional): The maximum number of requests in flight. Defaults to MOODLE_DEFAULT_MAX_CONCURRENCY.
+        web_service (bool, optional): Use the Web Services backend instead of HTML scraping. Defaults to False.
+        output_directory (str, optional): The directory for the reports. Defaults to a temporary directory.
+        sessions (int, optional): The number of independent sessions the requests are spread across. Defaults to 1.
+
+    Returns:
+        BenchmarkResult: The measurements of the build.
+    """
+
+    credentials = MoodleCredentials(config.login, config.password)
+    session: MoodleBackend
+    if web_service:
+        token = await authorize_web_service(credentials, base_address=base_address)
+        session = MoodleWebServiceSession(token, max_concurrency, base_address)
+    else:
+        cached_sessions = await authorize_many(credentials, sessions, base_address)
+        session = MoodleSession(
+            MoodleSessionPool(cached_sessions), max_concurrency, None, base_address
+        )
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        output_directory = output_directory or temporary_directory
+
+        async with session:
+            stats_before = await _get_stats(base_address, reset=True)
+            started_at = time.perf_counter()
+            results = await asyncio.gather(
+                *(
+                    _build_course(session, course_id, output_directory)
+                    for course_id in range(1, courses + 1)
+                ),
+                return_exceptions=True,
+            )
+            wall_time = time.perf_counter() - started_at
+            stats_after = await _get_stats(base_address)
+
+    return BenchmarkResult(
+        wall_time,
+        stats_after["requests"] - stats_before["requests"],
+        stats_after["bytes"] - stats_before["bytes"],
+        _get_peak_rss(),
+        sum(1 for result in results if isinstance(result, BaseException)),
+        stats_after["peak_parallelism"],
+        stats_after["lock_wait"] - stats_before["lock_wait"],
+    )
+
+
+def parse_arguments() -> Namespace:
+    """Parse command-line arguments for the benchmark.
+
+    Returns:
+        Namespace: Parsed command-line arguments.
+    """
+
+    defaults = FakeMoodleConfig()
+    arg_parser = ArgumentParser(
+        prog="Amm-option-subjects-puller-bench",
+        description="Нагрузочный тест построения отчетов на локальной имитации Moodle",
+    )
+
+    arg_parser.add_argument("--courses", default=1, type=int, help="Число курсов")
+    arg_parser.add_argument(
+        "--sections", default=defaults.sections, type=int, help="Число разделов в курсе"
+    )
+    arg_parser.add_argument(
+        "--choices",
+        default=defaults.choices_per_section,
+        type=int,
+        help="Число опросов в разделе",
+    )
+    arg_parser.add_argument(
+        "--quizzes",
+        default=defaults.quizzes_per_section,
+        type=int,
+        help="Число тестов в разделе",
+    )
+    arg_parser.add_argument(
+        "--students", default=defaults.students, type=int, help="Число студентов"
+    )
+    arg_parser.add_argument(
+        "--groups", default=defaults.groups, type=int, help="Число групп"
+    )
+    arg_parser.add_argument(
+        "--latency",
+        default=defaults.latency,
+        type=float,
+        help="Задержка ответа сервера, с",
+    )
+    arg_parser.add_argument(
+        "--jitter",
+        default=defaults.jitter,
+        type=float,
+        help="Максимальная случайная добавка к задержке, с",
+    )
+    arg_parser.add_argument(
+        "--error-rate",
+        default=defaults.error_rate,
+        type=float,
+        help="Доля ответов с ошибкой сервера",
+    )
+    arg_parser.add_argument(
+        "-j",
+        "--jobs",
+        default=MOODLE_DEFAULT_MAX_CONCURRENCY,
+        type=int,
+        help="Максимальное число одновременных запросов",
+    )
+    arg_parser.add_argument(
+        "--sessions",
+        default=1,
+        type=int,
+        help="Число независимых сессий, между которыми распределяются запросы",
+    )
+    arg_parser.add_argument(
+        "--no-session-lock",
+        action="store_true",
+        help="Не блокировать сессию на сервере на время обработки запроса",
+    )
+    arg_parser.add_argument(
+        "--web-service",
+        action="store_true",
+        help="Использовать веб-сервисы Moodle вместо HTML-страниц",
+    )
+
+    return arg_parser.parse_args()
+
+
+async def main(args: Namespace) -> None:
+    """Run the benchmark with the command-line arguments and print the measurements.
+
+    Args:
+        args (Namespace): Parsed command-line arguments.
+    """
+
+    config = FakeMoodleConfig(
+        sections=args.sections,
+        choices_per_section=args.choices,
+        quizzes_per_section=args.quizzes,
+        students=args.students,
+        groups=args.groups,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        session_lock=not args.no_session_lock,
+    )
+
+    async with run_fake_moodle(config) as base_address:
+        result = await run_benchmark(
+            config,
+            base_address,
+            args.courses,
+            args.jobs,
+            args.web_service,
+            sessions=args.sessions,
+        )
+
+    peak_rss = (
+        f"{result.peak_rss / 2**20:.1f} МиБ" if result.peak_rss is not None else "н/д"
+    )
+    print(f"Время построения: {result.wall_time:.2f} с")
+    print(f"Запросов: {result.requests} ({result.requests_per_second:.1f} в секунду)")
+    print(f"Передано: {result.transferred_bytes / 2**20:.2f} МиБ")
+    print(f"Пиковый RSS: {peak_rss}")
+    print(f"Одновременно обрабатывалось на сервере: до {result.peak_parallelism}")
+    print(f"Ожидание блокировки сессии: {result.lock_wait:.2f} с")
+    print(f"Курсов с ошибкой: {result.failed_courses} из {args.courses}")
+
+
+async def _build_course(
+    session: MoodleBackend, course_id: int, output_directory: str
+) -> None:
+    course_directory = path.join(output_directory, str(course_id))
+    os.makedirs(course_directory, exist_ok=True)
+    await build_course_report(
+        session, f"?id={course_id}", output_directory=course_directory
+    )
+
+
+async def _get_stats(base_address: str, reset: bool = False) -> Mapping[str, Any]:
+    async with ClientSession(base_url=base_address) as client:
+        params = {"reset": 1} if reset else None
+        async with client.get(STATS_PATH, params=params) as response:
+            return await response.json()
+
+
+def _get_peak_rss() -> int | None:
+    try:
+        import resource
+    except ImportError:
+        # Resource module is available only on Unix
+        return None
+
+    # Linux reports the peak in kilobytes, macOS in bytes
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss if os.uname().sysname == "Darwin" else peak_rss * 1024
+
+
+def _serve(config: FakeMoodleConfig, port: int) -> None:
+    web.run_app(create_app(config), host="127.0.0.1", port=port, print=None)
+
+
+def _get_free_port() -> int:
+    with socket.socket() as server_socket:
+        server_socket.bind(("127.0.0.1", 0))
+        return server_socket.getsockname()[1]
+
+
+async def _wait_for_port(port: int, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise TimeoutError("Fake Moodle server didn't start in time.")
+
+            await asyncio.sleep(0.1)
+        else:
+            writer.close()
+            await writer.wait_closed()
+            return
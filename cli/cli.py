@@ -1,14 +1,22 @@
-from argparse import ArgumentParser, Namespace
-from logic import build_report
+from argparse import ArgumentParser, ArgumentTypeError, Namespace
+from logic import build_report, build_reports
+from logic.models import CourseReportResult
 from pathlib import Path
 from cli.progress import TDQMProgressHandler
 import os
 from moodle.auth import (
-    restore_session,
+    restore_sessions,
     MoodleCredentials,
     authorize,
+    authorize_many,
+    authorize_web_service,
     serialize_session,
+    serialize_sessions,
     MoodleCachedSession,
+    MoodleSessionPool,
+    MoodleWebServiceToken,
+    SessionBalancing,
+    SessionRenewer,
 )
 from moodle.exceptions import (
     OpeningSessionFileError,
@@ -16,9 +24,29 @@ from moodle.exceptions import (
     SavingSessionFileError,
     IncorrectCredentialsError,
 )
-from logic.constants import SESSION_FILE
+from logic.constants import COURSE_CACHE_DIRECTORY, REPORT_STORE_FILE, SESSION_FILE
+from logic.diff import DIFF_FORMATS, ReportDiff
+from logic.filters import ActivityFilter
+from logic.statistics import SUMMARY_FORMATS, ReportStatistics
+from logic.store import ReportStore
+from logic.writers import OutputFormat, ReportWriter, ReportWriterFactory
+from moodle.cache import CourseCache
+from moodle.cassette import CassettePlayer, CassetteRecorder
+from moodle.constants import (
+    MOODLE_DEFAULT_MAX_CONCURRENCY,
+    MOODLE_SESSION_TRUST_WINDOW,
+)
+from moodle.profiling import StageProfiler
 from moodle.session import MoodleSession
+from moodle.tracing import RequestTracer
+from contextlib import contextmanager
 from getpass import getpass
+from importlib.util import find_spec
+from typing import Iterator, Sequence
+import asyncio
+import cProfile
+import re
+import sqlite3
 
 
 class CLI:
@@ -28,21 +56,40 @@ class CLI:
         """Initialize the CLI with command-line arguments."""
 
         self.__args = args
+        self.__tracer = (
+            RequestTracer() if args.trace_json or args.trace_prometheus else None
+        )
+        self.__cached_sessions = []
 
     async def run_cli(self) -> None:
         """Run the CLI process to handle session management and report generation.
 
         This method tries to restore a cached session from the session file. If the session file is missing
         or corrupted, it prompts the user to sign in and then builds the report. If the session is valid, it
-        directly builds the report.
+        directly builds the report. If the session file contains the sessions of several accounts, the
+        requests are spread across them. With Moodle Web Services enabled the session file isn't used, the report
+        is built with the given or newly requested Web Services token.
         """
 
+        if self.__args.replay:
+            # Recorded responses don't depend on the session, so no sign in is required
+            await self.__build_report(MoodleCachedSession("", "", ""))
+            return
+
+        if self.__args.ws_token or self.__args.web_service:
+            token = await self.__get_web_service_token()
+            if token:
+                await self.__build_report(token)
+            return
+
+        if self.__args.add_account:
+            await self.__add_account()
+
         try:
-            cached_session = await restore_session(SESSION_FILE)
+            cached_sessions = await restore_sessions(SESSION_FILE)
         except OpeningSessionFileError:
             cached_session = await self.__sign_in()
-            if cached_session:
-                await self.__build_report(cached_session)
+            cached_sessions = [cached_session] if cached_session else []
         except CorruptedSessionError:
             print("Данные сессии испорчены.")
 
@@ -52,25 +99,47 @@ class CLI:
                 pass
 
             cached_session = await self.__sign_in()
-            if cached_session:
-                await self.__build_report(cached_session)
+            cached_sessions = [cached_session] if cached_session else []
         else:
-            cached_session = await self.__get_valid_cached_session(cached_session)
-            await self.__build_report(cached_session)
+            cached_sessions = await self.__get_valid_cached_sessions(cached_sessions)
+
+        if cached_sessions:
+            cached_sessions = await self.__open_parallel_sessions(cached_sessions)
+            await self.__build_report(self.__get_session_pool(cached_sessions))
 
     async def __sign_in(self) -> MoodleCachedSession | None:
         login = input("Введите логин: ")
         password = getpass("Введите пароль: ")
         cached_session = await self.__init_new_session(login, password)
+        if cached_session:
+            self.__cached_sessions = [cached_session]
 
         return cached_session
 
+    async def __get_web_service_token(self) -> MoodleWebServiceToken | None:
+        if self.__args.ws_token:
+            return MoodleWebServiceToken("", self.__args.ws_token)
+
+        login = input("Введите логин: ")
+        password = getpass("Введите пароль: ")
+        try:
+            return await authorize_web_service(
+                MoodleCredentials(login, password), tracer=self.__tracer
+            )
+        except IncorrectCredentialsError:
+            print("Некорректный логин или пароль, либо веб-сервисы Moodle недоступны.")
+        except ConnectionError:
+            print(
+                "Не удалось установить соединение с удаленным сервером. "
+                "Проверьте подключение к интернету."
+            )
+
     async def __get_valid_cached_session(
         self, cached_session: MoodleCachedSession
     ) -> MoodleCachedSession:
         while True:
-            async with MoodleSession(cached_session) as session:
-                if not await session.is_valid():
+            async with MoodleSession(cached_session, tracer=self.__tracer) as session:
+                if not await session.is_valid(self.__args.trust_window):
                     login = input(
                         f"Введите логин (нажмите Enter, чтобы оставить {cached_session.login}): "
                     )
@@ -81,15 +150,214 @@ class CLI:
 
                     cached_session = new_cached_session or cached_session
                 else:
-                    return cached_session
+                    return session.cached_session
+
+    async def __get_valid_cached_sessions(
+        self, cached_sessions: Sequence[MoodleCachedSession]
+    ) -> Sequence[MoodleCachedSession]:
+        # Main account may be replaced with another one, the others may only be signed in again
+        self.__cached_sessions = [
+            await self.__get_valid_cached_session(cached_sessions[0]),
+            *cached_sessions[1:],
+        ]
+
+        for cached_session in cached_sessions[1:]:
+            async with MoodleSession(cached_session, tracer=self.__tracer) as session:
+                if await session.is_valid(self.__args.trust_window):
+                    self.__replace_session(cached_session, session.cached_session)
+                    continue
+
+            if not await self.__renew_session(cached_session):
+                self.__replace_session(cached_session, None)
+                print(f"Учетная запись {cached_session.login} не будет использоваться.")
+
+        # Save the time of the validation, so the next runs don't check the sessions again
+        await self.__save_sessions()
+        return self.__cached_sessions
+
+    async def __renew_session(
+        self, cached_session: MoodleCachedSession
+    ) -> MoodleCachedSession | None:
+        print(
+            f"Сессия {cached_session.login} просрочена. Выполните повторный вход для продолжения."
+        )
+        # The requests of the other accounts keep running while the password is typed
+        password = await asyncio.to_thread(
+            getpass, f"Введите пароль для {cached_session.login}: "
+        )
+        new_cached_session = await self.__authorize(cached_session.login, password)
+        if new_cached_session:
+            self.__replace_session(cached_session, new_cached_session)
+            await self.__save_sessions()
+
+        return new_cached_session
 
-    async def __build_report(self, cached_session: MoodleCachedSession) -> None:
+    async def __add_account(self) -> None:
+        try:
+            self.__cached_sessions = list(await restore_sessions(SESSION_FILE))
+        except (OpeningSessionFileError, CorruptedSessionError):
+            self.__cached_sessions = []
+
+        login = input("Введите логин дополнительной учетной записи: ")
+        password = getpass("Введите пароль: ")
+        cached_session = await self.__authorize(login, password)
+        if cached_session:
+            self.__cached_sessions.append(cached_session)
+            await self.__save_sessions()
+
+    async def __open_parallel_sessions(
+        self, cached_sessions: Sequence[MoodleCachedSession]
+    ) -> Sequence[MoodleCachedSession]:
+        login = cached_sessions[0].login
+        count = sum(1 for session in cached_sessions if session.login == login)
+        if count >= self.__args.parallel_sessions:
+            return cached_sessions
+
+        password = getpass(
+            f"Введите пароль для {login}, чтобы открыть дополнительные сессии: "
+        )
+        try:
+            new_cached_sessions = await authorize_many(
+                MoodleCredentials(login, password),
+                self.__args.parallel_sessions - count,
+                tracer=self.__tracer,
+            )
+        except IncorrectCredentialsError:
+            print("Некорректный пароль. Дополнительные сессии не открыты.")
+            return cached_sessions
+        except ConnectionError:
+            print(
+                "Не удалось установить соединение с удаленным сервером. "
+                "Дополнительные сессии не открыты."
+            )
+            return cached_sessions
+
+        self.__cached_sessions = [*cached_sessions, *new_cached_sessions]
+        await self.__save_sessions()
+        return self.__cached_sessions
+
+    def __replace_session(
+        self,
+        cached_session: MoodleCachedSession,
+        new_cached_session: MoodleCachedSession | None,
+    ) -> None:
+        # Several sessions of the same account may be used, so they are told apart by the cookie
+        for index, session in enumerate(self.__cached_sessions):
+            if session.moodle_session_cookie == cached_session.moodle_session_cookie:
+                if new_cached_session:
+                    self.__cached_sessions[index] = new_cached_session
+                else:
+                    del self.__cached_sessions[index]
+
+                return
+
+    async def __save_sessions(self) -> None:
+        try:
+            await serialize_sessions(SESSION_FILE, self.__cached_sessions)
+        except SavingSessionFileError:
+            print("Не удалось сохранить сессию в файл.")
+
+    def __get_session_pool(
+        self, cached_sessions: Sequence[MoodleCachedSession]
+    ) -> MoodleCachedSession | MoodleSessionPool:
+        if len(cached_sessions) == 1:
+            return cached_sessions[0]
+
+        return MoodleSessionPool(
+            cached_sessions, SessionBalancing(self.__args.balancing)
+        )
+
+    async def __build_report(
+        self,
+        cached_session: MoodleCachedSession | MoodleSessionPool | MoodleWebServiceToken,
+    ) -> None:
+        try:
+            player = self.__get_cassette_player()
+        except Exception as e:
+            print(f"Не удалось открыть файл с записанными ответами. {str(e)}")
+            return
+
+        try:
+            report_store = ReportStore(self.__args.store) if self.__args.store else None
+        except sqlite3.Error as e:
+            print(f"Не удалось открыть базу данных отчетов. {str(e)}")
+            return
+
+        report_diff = (
+            ReportDiff(report_store) if report_store and self.__args.diff else None
+        )
+        report_statistics = (
+            ReportStatistics(self.__args.capacity) if self.__args.summary else None
+        )
+        recorder = CassetteRecorder(self.__args.record) if self.__args.record else None
+
+        course_urls = self.__args.course_urls
+        with self.__profile():
+            if len(course_urls) > 1:
+                await self.__build_reports(
+                    cached_session,
+                    course_urls,
+                    recorder,
+                    player,
+                    report_store,
+                    report_diff,
+                    report_statistics,
+                )
+            else:
+                await self.__build_single_report(
+                    cached_session,
+                    course_urls[0],
+                    recorder,
+                    player,
+                    report_store,
+                    report_diff,
+                    report_statistics,
+                )
+
+        if report_diff:
+            self.__save_diff(report_diff)
+
+        if report_statistics:
+            self.__save_summary(report_statistics)
+
+        if report_store:
+            report_store.close()
+
+        if recorder:
+            try:
+                recorder.save()
+            except OSError as e:
+                print(f"Не удалось сохранить записанные ответы. {str(e)}")
+
+        self.__export_traces()
+
+    async def __build_single_report(
+        self,
+        cached_session: MoodleCachedSession | MoodleSessionPool | MoodleWebServiceToken,
+        course_url: str,
+        recorder: CassetteRecorder | None,
+        player: CassettePlayer | None,
+        report_store: ReportStore | None,
+        report_diff: ReportDiff | None,
+        report_statistics: ReportStatistics | None,
+    ) -> None:
         try:
             await build_report(
                 cached_session,
-                self.__args.course_url,
-                lambda size: TDQMProgressHandler(size),
-                self.__args.output,
+                course_url,
+                progress_factory=lambda size: TDQMProgressHandler(size),
+                output_directory=self.__args.output,
+                course_cache=self.__get_course_cache(),
+                activity_filter=self.__get_activity_filter(),
+                recorder=recorder,
+                player=player,
+                tracer=self.__tracer,
+                session_renewer=self.__get_session_renewer(cached_session),
+                report_store=report_store,
+                report_diff=report_diff,
+                writer_factory=self.__get_writer_factory(),
+                report_statistics=report_statistics,
+                include_quizzes=self.__args.quizzes,
             )
         except Exception as e:
             print(
@@ -98,13 +366,190 @@ class CLI:
         else:
             print("Отчет успешно загружен.")
 
+    async def __build_reports(
+        self,
+        cached_session: MoodleCachedSession | MoodleSessionPool | MoodleWebServiceToken,
+        course_urls: Sequence[str],
+        recorder: CassetteRecorder | None,
+        player: CassettePlayer | None,
+        report_store: ReportStore | None,
+        report_diff: ReportDiff | None,
+        report_statistics: ReportStatistics | None,
+    ) -> None:
+        try:
+            results = await build_reports(
+                cached_session,
+                course_urls,
+                progress_factory=lambda size: TDQMProgressHandler(size),
+                output_directory=self.__args.output,
+                max_concurrency=self.__args.jobs,
+                course_cache=self.__get_course_cache(),
+                activity_filter=self.__get_activity_filter(),
+                recorder=recorder,
+                player=player,
+                tracer=self.__tracer,
+                session_renewer=self.__get_session_renewer(cached_session),
+                report_store=report_store,
+                report_diff=report_diff,
+                writer_factory=self.__get_writer_factory(),
+                report_statistics=report_statistics,
+                include_quizzes=self.__args.quizzes,
+            )
+        except Exception as e:
+            print(
+                f"При создании отчётов произошла непредвиденная ошибка. {str(e)} Повторите попытку позднее."
+            )
+        else:
+            CLI.__print_summary(results)
+
+    def __save_diff(self, report_diff: ReportDiff) -> None:
+        try:
+            report_diff.write(self.__args.diff)
+        except Exception as e:
+            print(f"Не удалось сохранить изменения выбора. {str(e)}")
+        else:
+            print(f"Изменений выбора с прошлого запуска: {len(report_diff.changes)}.")
+
+    def __save_summary(self, report_statistics: ReportStatistics) -> None:
+        try:
+            report_statistics.write(self.__args.summary)
+        except Exception as e:
+            print(f"Не удалось сохранить сводку по отчетам. {str(e)}")
+
+    @contextmanager
+    def __profile(self) -> Iterator[None]:
+        if not (
+            self.__args.profile
+            or self.__args.profile_stats
+            or self.__args.profile_trace
+        ):
+            yield
+            return
+
+        profiler = StageProfiler()
+        stats_profiler = cProfile.Profile() if self.__args.profile_stats else None
+        with profiler.activate():
+            if stats_profiler:
+                stats_profiler.enable()
+
+            try:
+                yield
+            finally:
+                if stats_profiler:
+                    stats_profiler.disable()
+
+        if self.__args.profile:
+            CLI.__print_profile(profiler)
+
+        try:
+            if stats_profiler:
+                stats_profiler.dump_stats(self.__args.profile_stats)
+
+            if self.__args.profile_trace:
+                profiler.export_chrome_trace(self.__args.profile_trace)
+        except OSError as e:
+            print(f"Не удалось сохранить профиль выполнения. {str(e)}")
+
+    def __export_traces(self) -> None:
+        if not self.__tracer:
+            return
+
+        try:
+            if self.__args.trace_json:
+                self.__tracer.export_json_lines(self.__args.trace_json)
+
+            if self.__args.trace_prometheus:
+                self.__tracer.export_prometheus(self.__args.trace_prometheus)
+        except OSError as e:
+            print(f"Не удалось сохранить статистику запросов. {str(e)}")
+
+    def __get_cassette_player(self) -> CassettePlayer | None:
+        if not self.__args.replay:
+            return None
+
+        return CassettePlayer(self.__args.replay, self.__args.replay_realtime)
+
+    def __get_session_renewer(
+        self,
+        cached_session: MoodleCachedSession | MoodleSessionPool | MoodleWebServiceToken,
+    ) -> SessionRenewer | None:
+        # Recorded responses and Web Services tokens can't be renewed by signing in again
+        if self.__args.replay or isinstance(cached_session, MoodleWebServiceToken):
+            return None
+
+        return self.__renew_session
+
+    def __get_writer_factory(self) -> ReportWriterFactory:
+        output_format = OutputFormat(self.__args.format)
+        return lambda directory: ReportWriter.create(output_format, directory)
+
+    def __get_course_cache(self) -> CourseCache | None:
+        return None if self.__args.no_cache else CourseCache(COURSE_CACHE_DIRECTORY)
+
+    def __get_activity_filter(self) -> ActivityFilter:
+        return ActivityFilter(
+            self.__args.section or (),
+            self.__args.name_pattern,
+            frozenset(self.__args.activity_id or ()),
+        )
+
+    @staticmethod
+    def __print_profile(profiler: StageProfiler) -> None:
+        print(f"Профиль выполнения ({profiler.wall_time:.2f} с):")
+        print(
+            f"  {'Этап':<28}{'Число':>7}{'Всего, с':>11}{'Среднее, с':>12}{'Макс., с':>10}"
+        )
+        for stage in profiler.summary():
+            print(
+                f"  {stage.name:<28}{stage.count:>7}{stage.total:>11.3f}"
+                f"{stage.mean:>12.3f}{stage.max:>10.3f}"
+            )
+
+        path = profiler.critical_path()
+        stages = {}
+        for span in path:
+            count, total = stages.get(span.name, (0, 0.0))
+            stages[span.name] = (count + 1, total + span.duration)
+
+        waiting = profiler.wall_time - sum(total for _, total in stages.values())
+        print("Критический путь:")
+        for name, (count, total) in stages.items():
+            print(f"  {name}: {count} × {total / count:.3f} с = {total:.3f} с")
+        print(f"  ожидание: {max(waiting, 0.0):.3f} с")
+
     @staticmethod
+    def __print_summary(results: Sequence[CourseReportResult]) -> None:
+        print("Итоги загрузки:")
+        for result in results:
+            status = "успешно" if result.succeeded else f"ошибка: {result.error}"
+            print(
+                f"  Курс {result.course_id} ({result.elapsed:.1f} с) -> "
+                f"{result.output_directory}: {status}"
+            )
+
+        succeeded = sum(1 for result in results if result.succeeded)
+        print(f"Загружено курсов: {succeeded} из {len(results)}.")
+
     async def __init_new_session(
-        login: str, password: str
+        self, login: str, password: str
+    ) -> MoodleCachedSession | None:
+        cached_session = await self.__authorize(login, password)
+        if not cached_session:
+            return
+
+        try:
+            await serialize_session(SESSION_FILE, cached_session)
+        except SavingSessionFileError:
+            print("Не удалось сохранить сессию в файл.")
+        else:
+            return cached_session
+
+    async def __authorize(
+        self, login: str, password: str
     ) -> MoodleCachedSession | None:
         credentials = MoodleCredentials(login, password)
         try:
-            cached_session = await authorize(credentials)
+            cached_session = await authorize(credentials, tracer=self.__tracer)
 
         except IncorrectCredentialsError:
             print("Некорректный логин или пароль. Попробуйте снова.")
@@ -117,12 +562,7 @@ class CLI:
             )
             return
 
-        try:
-            await serialize_session(SESSION_FILE, cached_session)
-        except SavingSessionFileError:
-            print("Не удалось сохранить сессию в файл.")
-        else:
-            return cached_session
+        return cached_session
 
 
 def parse_arguments() -> Namespace:
@@ -139,8 +579,16 @@ def parse_arguments() -> Namespace:
     )
 
     arg_parser.add_argument(
-        "course_url",
-        help="Ссылка на страницу курса в Moodle, содержащего данные опросов",
+        "course_urls",
+        help="Ссылки на страницы курсов в Moodle, содержащих данные опросов",
+        metavar="course_url",
+        nargs="*",
+        type=str,
+    )
+    arg_parser.add_argument(
+        "-f",
+        "--file",
+        help="Файл со списком ссылок на курсы (по одной на строке)",
         type=str,
     )
     arg_parser.add_argument(
@@ -150,5 +598,231 @@ def parse_arguments() -> Namespace:
         help="Директория для сохранения результата",
         type=str,
     )
+    arg_parser.add_argument(
+        "--format",
+        choices=[output_format.value for output_format in OutputFormat],
+        default=OutputFormat.EXCEL.value,
+        help="Формат отчета: excel — файл на каждый опрос, workbook — один файл на курс "
+        "с листом на группу, csv — файл на группу, parquet — набор данных с разбиением "
+        "по группам, jsonl — JSON Lines",
+    )
+    arg_parser.add_argument(
+        "-j",
+        "--jobs",
+        default=MOODLE_DEFAULT_MAX_CONCURRENCY,
+        help="Максимальное число одновременных запросов ко всем курсам",
+        type=int,
+    )
+    arg_parser.add_argument(
+        "-s",
+        "--section",
+        action="append",
+        help="Идентификатор или название раздела курса, опросы которого нужно скачать. "
+        "Может быть указан несколько раз",
+        type=str,
+    )
+    arg_parser.add_argument(
+        "-n",
+        "--name-pattern",
+        help="Регулярное выражение, которому должно соответствовать название опроса",
+        type=_compile_pattern,
+    )
+    arg_parser.add_argument(
+        "-a",
+        "--activity-id",
+        action="append",
+        help="Идентификатор опроса, который нужно скачать. Может быть указан несколько раз",
+        type=int,
+    )
+    arg_parser.add_argument(
+        "--web-service",
+        action="store_true",
+        help="Получать данные через веб-сервисы Moodle (REST/JSON) вместо HTML-страниц",
+    )
+    arg_parser.add_argument(
+        "--ws-token",
+        help="Токен веб-сервисов Moodle. Если указан, вход по логину и паролю не требуется",
+        type=str,
+    )
+    arg_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Не использовать сохраненную структуру курсов и разбирать страницы курсов заново",
+    )
+    arg_parser.add_argument(
+        "--store",
+        const=REPORT_STORE_FILE,
+        help="Сохранить все загруженные отчеты в базу данных SQLite "
+        f"(по умолчанию {REPORT_STORE_FILE}) для быстрых запросов по группам, предметам и студентам",
+        metavar="FILE",
+        nargs="?",
+        type=str,
+    )
+    arg_parser.add_argument(
+        "--diff",
+        help="Сохранить студентов, которые добавили, изменили или отменили выбор с прошлого "
+        f"запуска, в указанный файл ({', '.join(DIFF_FORMATS)}). Требует базы данных отчетов, "
+        f"без --store используется {REPORT_STORE_FILE}",
+        metavar="FILE",
+        type=str,
+    )
+    arg_parser.add_argument(
+        "--summary",
+        help="Сохранить сводку по всем опросам: число выбравших каждый предмет по группам, "
+        "заполненность предметов и студентов, не сделавших выбор в каком-либо опросе курса "
+        f"({', '.join(SUMMARY_FORMATS)})",
+        metavar="FILE",
+        type=str,
+    )
+    arg_parser.add_argument(
+        "--capacity",
+        help="Число мест на каждом предмете для расчета заполненности в сводке",
+        metavar="N",
+        type=int,
+    )
+    arg_parser.add_argument(
+        "--quizzes",
+        action="store_true",
+        help="Также сохранить ответы на тесты курса по группам, как результаты опросов. "
+        "Группы студентов определяются по опросам того же курса. "
+        "Тесты не входят в сводку --summary",
+    )
+    arg_parser.add_argument(
+        "--add-account",
+        action="store_true",
+        help="Войти в дополнительную учетную запись Moodle и сохранить ее сессию. "
+        "Запросы распределяются между всеми сохраненными учетными записями",
+    )
+    arg_parser.add_argument(
+        "--parallel-sessions",
+        default=1,
+        help="Число независимых сессий основной учетной записи. Moodle обрабатывает "
+        "запросы одной сессии по очереди, а запросы разных сессий — параллельно",
+        metavar="N",
+        type=int,
+    )
+    arg_parser.add_argument(
+        "--balancing",
+        choices=[balancing.value for balancing in SessionBalancing],
+        default=SessionBalancing.LEAST_LOADED.value,
+        help="Способ распределения запросов между учетными записями",
+    )
+    arg_parser.add_argument(
+        "--trust-window",
+        default=MOODLE_SESSION_TRUST_WINDOW,
+        help="Время в секундах после успешной проверки сессии, в течение которого "
+        "она не проверяется повторно. 0 — проверять при каждом запуске",
+        metavar="SECONDS",
+        type=float,
+    )
+    arg_parser.add_argument(
+        "--record",
+        help="Записать все запросы к Moodle и ответы на них в указанный файл",
+        metavar="FILE",
+        type=str,
+    )
+    arg_parser.add_argument(
+        "--replay",
+        help="Брать ответы из файла, записанного с --record, вместо обращения к Moodle",
+        metavar="FILE",
+        type=str,
+    )
+    arg_parser.add_argument(
+        "--replay-realtime",
+        action="store_true",
+        help="Воспроизводить записанные ответы с исходной задержкой",
+    )
+    arg_parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Вывести время выполнения каждого этапа построения отчета и критический путь",
+    )
+    arg_parser.add_argument(
+        "--profile-stats",
+        help="Сохранить профиль cProfile в указанный файл (формат pstats)",
+        metavar="FILE",
+        type=str,
+    )
+    arg_parser.add_argument(
+        "--profile-trace",
+        help="Сохранить этапы построения отчета в формате Chrome trace event (JSON)",
+        metavar="FILE",
+        type=str,
+    )
+    arg_parser.add_argument(
+        "--trace-json",
+        help="Сохранить время выполнения каждого запроса к Moodle в файл JSON Lines",
+        metavar="FILE",
+        type=str,
+    )
+    arg_parser.add_argument(
+        "--trace-prometheus",
+        help="Сохранить статистику запросов к Moodle по адресам в текстовом формате Prometheus",
+        metavar="FILE",
+        type=str,
+    )
+
+    args = arg_parser.parse_args()
+    if args.file:
+        try:
+            args.course_urls.extend(_read_course_urls(args.file))
+        except OSError as e:
+            arg_parser.error(f"Не удалось прочитать файл со списком курсов. {str(e)}")
+
+    if not args.course_urls:
+        arg_parser.error("Не указано ни одной ссылки на курс")
+
+    if (args.record or args.replay) and (args.web_service or args.ws_token):
+        arg_parser.error(
+            "Запись и воспроизведение ответов не поддерживаются для веб-сервисов Moodle"
+        )
+
+    if args.replay and args.record:
+        arg_parser.error("Нельзя одновременно записывать и воспроизводить ответы")
+
+    if args.diff:
+        if os.path.splitext(args.diff)[1].lower() not in DIFF_FORMATS:
+            arg_parser.error(
+                f"Неподдерживаемый формат файла изменений, ожидается {', '.join(DIFF_FORMATS)}"
+            )
+
+        # The previous snapshots are kept only in the database, so the run must be stored too
+        args.store = args.store or REPORT_STORE_FILE
+
+    if args.format == OutputFormat.PARQUET.value and not find_spec("pyarrow"):
+        arg_parser.error("Для формата parquet необходимо установить пакет pyarrow")
+
+    if (
+        args.summary
+        and os.path.splitext(args.summary)[1].lower() not in SUMMARY_FORMATS
+    ):
+        arg_parser.error(
+            f"Неподдерживаемый формат файла сводки, ожидается {', '.join(SUMMARY_FORMATS)}"
+        )
+
+    if args.capacity is not None and args.capacity < 1:
+        arg_parser.error("Число мест на предмете должно быть положительным")
+
+    if args.trust_window < 0:
+        arg_parser.error("Время доверия к сессии не может быть отрицательным")
+
+    if args.parallel_sessions < 1:
+        arg_parser.error("Число сессий должно быть положительным")
+
+    if args.jobs < 1:
+        arg_parser.error("Число одновременных запросов должно быть положительным")
+
+    return args
+
+
+def _compile_pattern(value: str) -> re.Pattern[str]:
+    try:
+        return re.compile(value, re.IGNORECASE)
+    except re.error as e:
+        raise ArgumentTypeError(f"Некорректное регулярное выражение. {str(e)}")
+
 
-    return arg_parser.parse_args()
+def _read_course_urls(filename: str) -> Sequence[str]:
+    with open(filename, "r", encoding="utf-8") as file:
+        lines = (line.strip() for line in file)
+        return [line for line in lines if line and not line.startswith("#")]
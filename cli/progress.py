@@ -1,4 +1,4 @@
-from moodle.progress import ProgressHandler
+from moodle.progress import ProgressSnapshot, ThroughputProgressHandler
 from tqdm import tqdm
 from typing import TypeVar
 
@@ -6,7 +6,7 @@ from typing import TypeVar
 T = TypeVar("T")
 
 
-class TDQMProgressHandler(ProgressHandler[int]):
+class TDQMProgressHandler(ThroughputProgressHandler):
     """A handler that integrates with the tqdm library to display a progress bar."""
 
     _bar: tqdm
@@ -15,22 +15,29 @@ class TDQMProgressHandler(ProgressHandler[int]):
     def __init__(self, size: int) -> None:
         """Initialize the progress handler with the given initial state."""
 
-        super().__init__(0)
-        self._bar = tqdm(total=size)
+        super().__init__(size)
+        self._bar = tqdm(total=size, unit="отч.")
 
-    def update(self, new_value: int) -> None:
-        """Abstract method to update the progress.
+    def _render(self, snapshot: ProgressSnapshot) -> None:
+        """Display the state of the progress.
 
         Args:
-            new_value (int): The progress value to update.
+            snapshot (ProgressSnapshot): The current state of the progress.
         """
 
-        delta = max(0, new_value - self._state)
-        self._bar.update(delta)
+        self._bar.total = snapshot.total
+        self._bar.n = snapshot.completed
 
-        self._state = new_value
+        postfix = f"{snapshot.bytes_per_second / 2**20:.2f} МиБ/с"
+        if snapshot.active_children:
+            postfix += f", загрузок: {snapshot.active_children}"
+        if snapshot.eta is not None:
+            postfix += f", осталось {snapshot.eta:.0f} с"
 
-    def close(self) -> None:
-        """Abstract method to close the progress handler."""
+        self._bar.set_postfix_str(postfix, refresh=False)
+        self._bar.refresh()
+
+    def _close(self) -> None:
+        """Close the progress bar."""
 
         self._bar.close()
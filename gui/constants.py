@@ -1,5 +1,20 @@
 FORM_SIZES = "500x180"
 """The default dimensions for the form window in pixels (width x height)."""
 
+MAIN_FORM_SIZES = "500x290"
+"""The dimensions for the main form window in pixels (width x height)."""
+
+ACTION_ROW = 6
+"""The grid row of the main form occupied by the action button and the progress bar."""
+
+CANCEL_ROW = 7
+"""The grid row of the main form occupied by the cancel button while the report is being built."""
+
 SCALE_FACTOR = 5
 """The factor by which certain elements or measurements are scaled."""
+
+WORKER_POLL_INTERVAL = 50
+"""The interval in milliseconds between two checks for the results of the background jobs."""
+
+WORKER_SHUTDOWN_TIMEOUT = 5
+"""The time in seconds given to the background jobs to finish when the application is closed."""
@@ -1,10 +1,11 @@
-from asyncio import run
+from concurrent.futures import Future
 from typing import Any
 from customtkinter import (
     CTk,
     CTkLabel,
     CTkEntry,
     CTkButton,
+    CTkFrame,
     StringVar,
     CTkBaseClass,
     CTkToplevel,
@@ -12,10 +13,18 @@ from customtkinter import (
 )
 from CTkMessagebox import CTkMessagebox
 from gui.progress import ProgressHandlerContext
-from gui.constants import FORM_SIZES, SCALE_FACTOR
+from gui.constants import (
+    ACTION_ROW,
+    CANCEL_ROW,
+    FORM_SIZES,
+    MAIN_FORM_SIZES,
+    SCALE_FACTOR,
+)
 from gui.utils import DisabledContext
-from logic.builder import build_report
-from logic.constants import SESSION_FILE
+from gui.worker import AsyncWorker
+from logic.builder import build_course_report
+from logic.constants import COURSE_CACHE_DIRECTORY, SESSION_FILE
+from logic.filters import ActivityFilter
 from moodle.auth import (
     MoodleCachedSession,
     MoodleCredentials,
@@ -23,8 +32,11 @@ from moodle.auth import (
     restore_session,
     serialize_session,
 )
+from moodle.cache import CourseCache
+from moodle.constants import MOODLE_SESSION_TRUST_WINDOW
 from moodle.session import MoodleSession
 import os
+import re
 
 
 class LoginDialog:
@@ -96,9 +108,17 @@ class MainForm:
     _ctk: CTk
     _course_id: StringVar
     _directory: StringVar
+    _sections: StringVar
+    _name_pattern: StringVar
+    _activity_ids: StringVar
     _clickable: list[CTkBaseClass]
+    _cancel_button: CTkButton
     _cached_session: MoodleCachedSession | None
     _is_destroyed: bool
+    _worker: AsyncWorker
+    _session: MoodleSession | None
+    _build_future: Future[None] | None
+    _disabled: DisabledContext | None
 
     def __init__(self) -> None:
         """Initialize the main form."""
@@ -107,11 +127,21 @@ class MainForm:
         self._ctk = CTk()
         self._course_id = StringVar()
         self._directory = StringVar(self._ctk, os.getcwd())
+        self._sections = StringVar(self._ctk)
+        self._name_pattern = StringVar(self._ctk)
+        self._activity_ids = StringVar(self._ctk)
         self._clickable = []
+        self._cached_session = None
+
+        # Moodle session is owned by the worker thread and is touched only by the submitted coroutines
+        self._worker = AsyncWorker(self._ctk)
+        self._session = None
+        self._build_future = None
+        self._disabled = None
 
         self._init_style()
+        self._ctk.protocol("WM_DELETE_WINDOW", self._close)
         self._init_session()
-        self._ensure_session_init()
 
     def mainloop(self) -> None:
         """Start the main event loop for the form."""
@@ -122,7 +152,7 @@ class MainForm:
     def _init_style(self) -> None:
         ctk = self._ctk
         ctk.title("Создание отчета")
-        ctk.geometry(FORM_SIZES)
+        ctk.geometry(MAIN_FORM_SIZES)
         ctk.resizable(width=False, height=False)
 
         ctk.grid_columnconfigure(0, weight=1)
@@ -178,11 +208,47 @@ class MainForm:
             sticky="ew",
         )
 
+        filter_label = CTkLabel(
+            ctk, text="Разделы, шаблон названия и ID опросов (необязательно):"
+        )
+        filter_label.grid(
+            row=4,
+            column=0,
+            columnspan=2,
+            padx=(SCALE_FACTOR, SCALE_FACTOR),
+            pady=(SCALE_FACTOR, 0),
+            sticky="ew",
+        )
+
+        filter_frame = CTkFrame(ctk, fg_color="transparent")
+        filter_frame.grid(
+            row=5,
+            column=0,
+            columnspan=2,
+            padx=(SCALE_FACTOR, SCALE_FACTOR),
+            pady=(SCALE_FACTOR, 0),
+            sticky="ew",
+        )
+        filter_frame.grid_columnconfigure((0, 1, 2), weight=1)
+
+        filter_entries = []
+        for column, variable in enumerate(
+            (self._sections, self._name_pattern, self._activity_ids)
+        ):
+            filter_entry = CTkEntry(filter_frame, textvariable=variable)
+            filter_entry.grid(
+                row=0,
+                column=column,
+                padx=(0 if column == 0 else SCALE_FACTOR, 0),
+                sticky="ew",
+            )
+            filter_entries.append(filter_entry)
+
         create_report_button = CTkButton(
             ctk, text="Создать отчет", command=self._build_report
         )
         create_report_button.grid(
-            row=4,
+            row=ACTION_ROW,
             column=0,
             columnspan=2,
             padx=(SCALE_FACTOR, SCALE_FACTOR),
@@ -190,8 +256,27 @@ class MainForm:
             sticky="ew",
         )
 
+        self._cancel_button = CTkButton(
+            ctk, text="Отменить", command=self._cancel_build
+        )
+        self._cancel_button.grid(
+            row=CANCEL_ROW,
+            column=0,
+            columnspan=2,
+            padx=(SCALE_FACTOR, SCALE_FACTOR),
+            pady=(SCALE_FACTOR, 0),
+            sticky="ew",
+        )
+        self._cancel_button.grid_remove()
+
         self._clickable.extend(
-            [course_entry, output_entry, select_dir_button, create_report_button]
+            [
+                course_entry,
+                output_entry,
+                select_dir_button,
+                *filter_entries,
+                create_report_button,
+            ]
         )
 
     def _change_directory(self) -> None:
@@ -205,101 +290,213 @@ class MainForm:
             self._directory.set(result)
 
     def _build_report(self) -> None:
-        async def _internal_build_report() -> None:
-            course_id = self._course_id.get()
-            if not course_id:
-                show_error(self._ctk, "Отсутствует ссылка на курс или идентификатор")
-                return
-
-            if not self._cached_session:
-                show_error(
-                    self._ctk,
-                    "Не удалось получить сессию. Выполните повторный вход для продолжения.",
-                )
-                self._ensure_session_init()
-                return
+        course_id = self._course_id.get()
+        if not course_id:
+            show_error(self._ctk, "Отсутствует ссылка на курс или идентификатор")
+            return
 
-            try:
-                await build_report(
-                    self._cached_session,
-                    course_id,
-                    lambda size: ProgressHandlerContext(self._ctk, size),
-                    self._directory.get(),
-                )
-
-                show_information(self._ctk, "Отчет успешно загружен.")
-            except Exception as e:
-                show_error(
-                    self._ctk,
-                    f"Произошла непредвиденная ошибка. {str(e)} Повторите попытку позднее.",
-                )
-
-        with DisabledContext(self._clickable):
-            run(_internal_build_report())
+        if not self._cached_session:
+            show_error(
+                self._ctk,
+                "Не удалось получить сессию. Выполните повторный вход для продолжения.",
+            )
+            self._sign_in(login=None)
+            return
+
+        try:
+            activity_filter = self._get_activity_filter()
+        except ValueError as e:
+            show_error(self._ctk, str(e))
+            return
+
+        self._disable()
+        self._cancel_button.grid()
+        self._build_future = self._worker.submit(
+            self._internal_build_report(
+                course_id, self._directory.get(), activity_filter
+            ),
+            on_success=lambda _: self._on_build_finished("Отчет успешно загружен."),
+            on_error=lambda e: self._on_build_finished(
+                f"Произошла непредвиденная ошибка. {str(e)} Повторите попытку позднее.",
+                is_error=True,
+            ),
+            on_cancel=lambda: self._on_build_finished("Создание отчета отменено."),
+        )
+
+    async def _internal_build_report(
+        self, course_id: str, directory: str, activity_filter: ActivityFilter
+    ) -> None:
+        await build_course_report(
+            self._session,
+            course_id,
+            progress_factory=lambda size: ProgressHandlerContext(
+                self._ctk, size, self._worker.dispatch
+            ),
+            output_directory=directory,
+            activity_filter=activity_filter,
+        )
+
+    def _cancel_build(self) -> None:
+        if self._build_future:
+            self._build_future.cancel()
+
+    def _on_build_finished(self, message: str, is_error: bool = False) -> None:
+        self._build_future = None
+        self._cancel_button.grid_remove()
+        self._enable()
+
+        if is_error:
+            show_error(self._ctk, message)
+        else:
+            show_information(self._ctk, message)
+
+    def _get_activity_filter(self) -> ActivityFilter:
+        sections = [
+            section.strip()
+            for section in self._sections.get().split(",")
+            if section.strip()
+        ]
+
+        try:
+            name_pattern = self._name_pattern.get()
+            name_pattern = (
+                re.compile(name_pattern, re.IGNORECASE) if name_pattern else None
+            )
+        except re.error:
+            raise ValueError("Некорректный шаблон названия опроса.")
+
+        try:
+            activity_ids = frozenset(
+                int(activity_id)
+                for activity_id in self._activity_ids.get().split(",")
+                if activity_id.strip()
+            )
+        except ValueError:
+            raise ValueError("Идентификаторы опросов должны быть числами.")
+
+        return ActivityFilter(sections, name_pattern, activity_ids)
 
     def _init_session(self) -> None:
-        async def _get_valid_cached_session(
-            login: str | None
-        ) -> MoodleCachedSession | None:
-            while True:
-                credentials = LoginDialog(self._ctk, login).credentials
-                if not credentials:
-                    return None
-
-                login = credentials.login
-                try:
-                    session = await authorize(credentials)
-                except Exception:
-                    show_error(
-                        self._ctk, "Некорректный логин или пароль. Попробуйте снова."
-                    )
-                    continue
-
-                try:
-                    await serialize_session(SESSION_FILE, session)
-                except Exception:
-                    show_warning(
-                        self._ctk,
-                        "Не удалось сохранить сессию в файл. Понадобится повторная авторизация после перезапуска приложения.",
-                    )
-
-                return session
-
-        async def _internal_init_session() -> None:
+        self._disable()
+        self._worker.submit(
+            restore_session(SESSION_FILE),
+            on_success=self._check_session,
+            # Session is corrupted or isn't created. Show the login page without login value.
+            on_error=lambda _: self._sign_in(login=None),
+        )
+
+    def _check_session(self, cached_session: MoodleCachedSession) -> None:
+        self._worker.submit(
+            self._open_session(cached_session),
+            on_success=lambda is_valid: self._on_session_checked(
+                cached_session, is_valid
+            ),
+            on_error=lambda _: self._on_session_checked(cached_session, False),
+        )
+
+    def _on_session_checked(
+        self, cached_session: MoodleCachedSession, is_valid: bool
+    ) -> None:
+        if is_valid:
+            self._cached_session = cached_session
+            self._enable()
+            return
+
+        show_warning(
+            self._ctk,
+            "Сессия просрочена. Выполните повторный вход для продолжения.",
+        )
+
+        # Remove expired session file
+        try:
+            os.remove(SESSION_FILE)
+        except Exception:
+            pass
+
+        # Session expired. Show the login page with previous login value.
+        self._sign_in(login=cached_session.login)
+
+    def _sign_in(self, login: str | None) -> None:
+        credentials = LoginDialog(self._ctk, login).credentials
+        if not credentials:
+            self._close()
+            return
+
+        self._disable()
+        self._worker.submit(
+            self._authorize(credentials),
+            on_success=self._on_signed_in,
+            on_error=lambda _: self._on_sign_in_failed(credentials.login),
+        )
+
+    async def _authorize(
+        self, credentials: MoodleCredentials
+    ) -> tuple[MoodleCachedSession, bool]:
+        cached_session = await authorize(credentials)
+        try:
+            await serialize_session(SESSION_FILE, cached_session)
+            is_saved = True
+        except Exception:
+            is_saved = False
+
+        await self._open_session(cached_session)
+        return cached_session, is_saved
+
+    def _on_signed_in(self, result: tuple[MoodleCachedSession, bool]) -> None:
+        cached_session, is_saved = result
+        if not is_saved:
+            show_warning(
+                self._ctk,
+                "Не удалось сохранить сессию в файл. Понадобится повторная авторизация после перезапуска приложения.",
+            )
+
+        self._cached_session = cached_session
+        self._enable()
+
+    def _on_sign_in_failed(self, login: str) -> None:
+        show_error(self._ctk, "Некорректный логин или пароль. Попробуйте снова.")
+        self._sign_in(login)
+
+    async def _open_session(self, cached_session: MoodleCachedSession) -> bool:
+        if self._session:
+            await self._session.close()
+
+        self._session = MoodleSession(
+            cached_session, course_cache=CourseCache(COURSE_CACHE_DIRECTORY)
+        )
+        if not await self._session.is_valid(MOODLE_SESSION_TRUST_WINDOW):
+            return False
+
+        # Save the time of the validation, so the next start doesn't check the session again
+        if self._session.cached_session != cached_session:
             try:
-                cached_session = await restore_session(SESSION_FILE)
+                await serialize_session(SESSION_FILE, self._session.cached_session)
             except Exception:
-                # Session is corrupted or isn't created. Show the login page without login value.
-                self._cached_session = await _get_valid_cached_session(login=None)
-                return
-
-            async with MoodleSession(cached_session) as session:
-                if not await session.is_valid():
-                    show_warning(
-                        self._ctk,
-                        "Сессия просрочена. Выполните повторный вход для продолжения.",
-                    )
-
-                    # Remove expired session file
-                    try:
-                        os.remove(SESSION_FILE)
-                    except Exception:
-                        pass
-
-                    # Session expired. Show the login page with previous login value.
-                    self._cached_session = await _get_valid_cached_session(
-                        login=cached_session.login
-                    )
-                    return
+                pass
 
-            self._cached_session = cached_session
+        return True
 
-        run(_internal_init_session())
+    async def _close_session(self) -> None:
+        if self._session:
+            await self._session.close()
 
-    def _ensure_session_init(self) -> None:
-        if not self._cached_session:
-            self._is_destroyed = True
-            self._ctk.destroy()
+    def _disable(self) -> None:
+        if not self._disabled:
+            self._disabled = DisabledContext(self._clickable)
+            self._disabled.__enter__()
+
+    def _enable(self) -> None:
+        if self._disabled:
+            self._disabled.__exit__()
+            self._disabled = None
+
+    def _close(self) -> None:
+        if self._is_destroyed:
+            return
+
+        self._is_destroyed = True
+        self._worker.close(self._close_session())
+        self._ctk.destroy()
 
 
 def show_information(master: Any, message: str) -> None:
@@ -1,51 +1,78 @@
-from moodle.progress import ProgressHandler
-from typing import Any, TypeVar
+from moodle.progress import ProgressSnapshot, ThroughputProgressHandler
+from typing import Any, Callable, TypeVar
 from customtkinter import CTkProgressBar
-from gui.constants import SCALE_FACTOR
+from gui.constants import ACTION_ROW, SCALE_FACTOR
 
 
 T = TypeVar("T")
 
 
-class ProgressHandlerContext(ProgressHandler[int]):
-    """A context for handling progress using a custom progress bar."""
+class ProgressHandlerContext(ThroughputProgressHandler):
+    """A context for handling progress using a custom progress bar.
 
-    _bar: CTkProgressBar
-    """An instance of the custom progress bar used to display progress."""
+    The handler can be updated from any thread, the progress bar is changed only through the dispatcher.
+    """
 
-    _size: int
-    """The total size or number of steps for the progress bar."""
+    _master: Any
+    """The window the progress bar is placed on."""
 
-    def __init__(self, master: Any, size: int) -> None:
-        """Initialize the progress handler with the given initial state."""
+    _bar: CTkProgressBar | None
+    """An instance of the custom progress bar used to display progress, or None until it is created."""
 
-        super().__init__(0)
-        self._size = size
+    _dispatch: Callable[[Callable[[], None]], None]
+    """Function calling the given callback on the Tk thread."""
 
-        self._bar = CTkProgressBar(master=master, height=28)
+    def __init__(
+        self,
+        master: Any,
+        size: int,
+        dispatch: Callable[[Callable[[], None]], None] | None = None,
+    ) -> None:
+        """Initialize the progress handler with the given initial state.
+
+        Args:
+            master (Any): The window the progress bar is placed on.
+            size (int): The total number of items.
+            dispatch (Callable[[Callable[[], None]], None], optional): Function calling the given callback on the Tk thread. Defaults to calling the callback immediately.
+        """
+
+        super().__init__(size)
+        self._master = master
+        self._bar = None
+        self._dispatch = dispatch or (lambda callback: callback())
+        self._dispatch(self._show)
+
+    def _show(self) -> None:
+        self._bar = CTkProgressBar(master=self._master, height=28)
         self._bar.grid(
-            row=4,
+            row=ACTION_ROW,
             column=0,
             columnspan=2,
             padx=(SCALE_FACTOR, SCALE_FACTOR),
             pady=(2 * SCALE_FACTOR, 0),
             sticky="ew",
         )
-        self._bar.set(self._state)
+        self._bar.set(0)
 
-    def update(self, new_value: int) -> None:
-        """Abstract method to update the progress.
+    def _render(self, snapshot: ProgressSnapshot) -> None:
+        """Display the state of the progress.
 
         Args:
-            new_value (int): The progress value to update.
+            snapshot (ProgressSnapshot): The current state of the progress.
         """
 
-        self._bar.set(new_value / self._size)
-        self._bar.update_idletasks()
+        value = snapshot.completed / snapshot.total if snapshot.total else 0
+        self._dispatch(lambda: self._set(value))
+
+    def _close(self) -> None:
+        """Remove the progress bar from the form."""
 
-        self._state = new_value
+        self._dispatch(self._hide)
 
-    def close(self) -> None:
-        """Abstract method to close the progress handler."""
+    def _set(self, value: float) -> None:
+        if self._bar:
+            self._bar.set(value)
 
-        self._bar.grid_remove()
+    def _hide(self) -> None:
+        if self._bar:
+            self._bar.grid_remove()
@@ -0,0 +1,146 @@
+from concurrent.futures import CancelledError, Future
+from gui.constants import WORKER_POLL_INTERVAL, WORKER_SHUTDOWN_TIMEOUT
+from queue import Empty, SimpleQueue
+from typing import Any, Callable, Coroutine, TypeVar
+import asyncio
+import threading
+
+
+T = TypeVar("T")
+
+
+class AsyncWorker:
+    """Persistent asyncio event loop running on a background thread on behalf of a Tk window.
+
+    Coroutines are submitted from the Tk thread, and their results are passed back to it through `after()`,
+    so the window stays responsive while the coroutines run. Widgets must be touched only by the callbacks
+    passed to `submit` and `dispatch`, which are called on the Tk thread.
+    """
+
+    _master: Any
+    """The Tk window the callbacks are called by."""
+
+    _loop: asyncio.AbstractEventLoop
+    """The event loop running the submitted coroutines."""
+
+    _thread: threading.Thread
+    """The thread running the event loop."""
+
+    _callbacks: SimpleQueue[Callable[[], None]]
+    """Callbacks waiting to be called on the Tk thread."""
+
+    _is_closed: bool
+    """Whether the worker is closed and doesn't accept coroutines anymore."""
+
+    def __init__(self, master: Any) -> None:
+        """Start the event loop thread.
+
+        Args:
+            master (Any): The Tk window the callbacks are called by.
+        """
+
+        self._master = master
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="AsyncWorker", daemon=True
+        )
+        self._callbacks = SimpleQueue()
+        self._is_closed = False
+
+        self._thread.start()
+        self._poll()
+
+    def submit(
+        self,
+        coroutine: Coroutine[Any, Any, T],
+        on_success: Callable[[T], None] | None = None,
+        on_error: Callable[[Exception], None] | None = None,
+        on_cancel: Callable[[], None] | None = None,
+    ) -> Future[T]:
+        """Run a coroutine on the event loop thread.
+
+        Args:
+            coroutine (Coroutine[Any, Any, T]): The coroutine to run.
+            on_success (Callable[[T], None], optional): Called on the Tk thread with the result of the coroutine. Defaults to None.
+            on_error (Callable[[Exception], None], optional): Called on the Tk thread with the exception raised by the coroutine. Defaults to None.
+            on_cancel (Callable[[], None], optional): Called on the Tk thread if the coroutine is cancelled. Defaults to None.
+
+        Returns:
+            Future[T]: The future of the coroutine. Cancelling it cancels the coroutine.
+        """
+
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+        def _on_done(future: Future[T]) -> None:
+            try:
+                result = future.result()
+            except CancelledError:
+                if on_cancel:
+                    self.dispatch(on_cancel)
+            except Exception as e:
+                if on_error:
+                    self.dispatch(lambda error=e: on_error(error))
+            else:
+                if on_success:
+                    self.dispatch(lambda: on_success(result))
+
+        future.add_done_callback(_on_done)
+        return future
+
+    def dispatch(self, callback: Callable[[], None]) -> None:
+        """Call a function on the Tk thread. Can be called from any thread.
+
+        Args:
+            callback (Callable[[], None]): The function to call.
+        """
+
+        self._callbacks.put(callback)
+
+    def close(self, cleanup: Coroutine[Any, Any, Any] | None = None) -> None:
+        """Cancel the running coroutines and stop the event loop thread.
+
+        Args:
+            cleanup (Coroutine[Any, Any, Any], optional): A coroutine to run before the event loop is stopped, e.g. closing the sessions. Defaults to None.
+        """
+
+        if self._is_closed:
+            return
+
+        self._is_closed = True
+        try:
+            asyncio.run_coroutine_threadsafe(
+                self.__shutdown(cleanup), self._loop
+            ).result(WORKER_SHUTDOWN_TIMEOUT)
+        except Exception:
+            # The application is closing, so there is nobody to report the error to
+            pass
+
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(WORKER_SHUTDOWN_TIMEOUT)
+        if not self._thread.is_alive():
+            self._loop.close()
+
+    def _poll(self) -> None:
+        if self._is_closed:
+            return
+
+        # Reschedule first, so modal dialogs opened by the callbacks don't stop the polling
+        self._master.after(WORKER_POLL_INTERVAL, self._poll)
+        while True:
+            try:
+                callback = self._callbacks.get_nowait()
+            except Empty:
+                break
+
+            callback()
+
+    @staticmethod
+    async def __shutdown(cleanup: Coroutine[Any, Any, Any] | None) -> None:
+        current_task = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current_task]
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if cleanup:
+            await cleanup
@@ -1,6 +1,26 @@
-from logic.builder import build_report
+from logic.builder import build_course_report, build_report, build_reports
+from logic.diff import ChangeKind, ChoiceChange, ReportDiff
+from logic.filters import ActivityFilter
+from logic.quiz import StudentDirectory, iter_quiz_report
+from logic.statistics import ReportStatistics, ReportSummary
+from logic.store import ReportStore, StoredChoice
+from logic.writers import OutputFormat, ReportWriter
 
 
 __all__ = [
-    'build_report'
+    'ActivityFilter',
+    'build_course_report',
+    'build_report',
+    'build_reports',
+    'ChangeKind',
+    'ChoiceChange',
+    'iter_quiz_report',
+    'OutputFormat',
+    'ReportStatistics',
+    'ReportDiff',
+    'ReportStore',
+    'ReportSummary',
+    'ReportWriter',
+    'StoredChoice',
+    'StudentDirectory',
 ]
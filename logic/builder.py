@@ -1,61 +1,375 @@
-from logic.serialization import deserialize_report, serialize_report_to_excel
-from moodle.auth import MoodleCachedSession
-from moodle.models import ChoiceMoodleActivity
+from logic.diff import ReportDiff
+from logic.filters import ActivityFilter
+from logic.models import CourseReportResult
+from logic.quiz import StudentDirectory, iter_quiz_report
+from logic.serialization import deserialize_report
+from logic.statistics import ReportStatistics
+from logic.store import ReportStore
+from logic.writers import ExcelReportWriter, ReportWriterFactory
+from moodle.auth import (
+    MoodleCachedSession,
+    MoodleSessionPool,
+    MoodleWebServiceToken,
+    SessionRenewer,
+)
+from moodle.backend import MoodleBackend
+from moodle.cache import CourseCache
+from moodle.cassette import CassettePlayer, CassetteRecorder
+from moodle.constants import MOODLE_DEFAULT_MAX_CONCURRENCY
+from moodle.models import ChoiceMoodleActivity, QuizMoodleActivity
+from moodle.profiling import profile_span
 from moodle.progress import ProgressHandler, ProgressHandlerFactory
 from moodle.session import MoodleSession
+from moodle.tracing import RequestTracer
+from moodle.webservice import MoodleWebServiceSession
+from contextlib import nullcontext
 from os import path
+from typing import TYPE_CHECKING, Any, ContextManager, Iterable, Sequence
 import asyncio
+import os
+import time
+
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 async def build_report(
-    cached_session: MoodleCachedSession,
+    cached_session: MoodleCachedSession | MoodleSessionPool | MoodleWebServiceToken,
     course_id: str | int,
+    *,
     progress_factory: ProgressHandlerFactory[int] | None = None,
     output_directory: str = ".",
+    course_cache: CourseCache | None = None,
+    activity_filter: ActivityFilter | None = None,
+    recorder: CassetteRecorder | None = None,
+    player: CassettePlayer | None = None,
+    tracer: RequestTracer | None = None,
+    session_renewer: SessionRenewer | None = None,
+    report_store: ReportStore | None = None,
+    report_diff: ReportDiff | None = None,
+    writer_factory: ReportWriterFactory | None = None,
+    report_statistics: ReportStatistics | None = None,
+    include_quizzes: bool = False,
 ) -> None:
-    """Generate a report for a specific Moodle course and save it as an Excel file.
+    """Generate a report for a specific Moodle course and save it, by default as Excel files.
 
     Args:
-        cached_session (MoodleCachedSession): The cached Moodle session used to authenticate.
+        cached_session (MoodleCachedSession | MoodleSessionPool | MoodleWebServiceToken): The cached Moodle session, the pool of the sessions of several accounts or the Web Services token used to authenticate.
         course_id (str | int): The ID or URL of the course to generate the report for.
         progress_factory (ProgressHandlerFactory[int], optional): progress_factory (ProgressHandlerFactory[int], optional): A factory to create a progress handler to track the report generation progress. Defaults to None.
         output_directory (str, optional): The directory where the report will be saved. Defaults to the current directory.
+        course_cache (CourseCache, optional): The cache of the parsed course structures. Defaults to None.
+        activity_filter (ActivityFilter, optional): The filter selecting the activities to download. Defaults to None.
+        recorder (CassetteRecorder, optional): The recorder of the request/response pairs. Defaults to None.
+        player (CassettePlayer, optional): The player serving the recorded responses instead of the network. Defaults to None.
+        tracer (RequestTracer, optional): The tracer collecting the timings of the requests. Defaults to None.
+        session_renewer (SessionRenewer, optional): The function signing in again when the session expires during the work. Defaults to None.
+        report_store (ReportStore, optional): The store recording the run into the snapshot database. Defaults to None.
+        report_diff (ReportDiff, optional): The diff collecting the changes of the choices since the previous run. Defaults to None.
+        writer_factory (ReportWriterFactory, optional): A factory to create the writer of the reports in the output directory. Defaults to ExcelReportWriter.
+        report_statistics (ReportStatistics, optional): The statistics collecting the choices of all choice activities. The quizzes aren't included. Defaults to None.
+        include_quizzes (bool, optional): Whether to write the answers given in the quizzes like the choices, with the groups of the students taken from the choice reports of the course. Defaults to False.
     """
 
-    async with MoodleSession(cached_session) as session:
-        course = await session.get_course(course_id)
-        activities_count = sum(
-            1
-            for section in course.sections
-            for activity in section.activities
-            if isinstance(activity, ChoiceMoodleActivity)
-        )
+    async with _open_session(
+        cached_session,
+        max_concurrency=MOODLE_DEFAULT_MAX_CONCURRENCY,
+        course_cache=course_cache,
+        recorder=recorder,
+        player=player,
+        tracer=tracer,
+        session_renewer=session_renewer,
+    ) as session:
+        with _record_run(report_store):
+            await build_course_report(
+                session,
+                course_id,
+                progress_factory=progress_factory,
+                output_directory=output_directory,
+                activity_filter=activity_filter,
+                report_store=report_store,
+                report_diff=report_diff,
+                writer_factory=writer_factory,
+                report_statistics=report_statistics,
+                include_quizzes=include_quizzes,
+            )
+
+
+async def build_reports(
+    cached_session: MoodleCachedSession | MoodleSessionPool | MoodleWebServiceToken,
+    course_ids: Iterable[str | int],
+    *,
+    progress_factory: ProgressHandlerFactory[int] | None = None,
+    output_directory: str = ".",
+    max_concurrency: int = MOODLE_DEFAULT_MAX_CONCURRENCY,
+    course_cache: CourseCache | None = None,
+    activity_filter: ActivityFilter | None = None,
+    recorder: CassetteRecorder | None = None,
+    player: CassettePlayer | None = None,
+    tracer: RequestTracer | None = None,
+    session_renewer: SessionRenewer | None = None,
+    report_store: ReportStore | None = None,
+    report_diff: ReportDiff | None = None,
+    writer_factory: ReportWriterFactory | None = None,
+    report_statistics: ReportStatistics | None = None,
+    include_quizzes: bool = False,
+) -> Sequence[CourseReportResult]:
+    """Generate reports for several Moodle courses concurrently through one shared session.
+
+    Every course is saved into its own subdirectory of the output directory named after the course ID.
+    A failure of one course, including a malformed ID or URL, doesn't interrupt the others and is reported
+    in its result instead.
+
+    Args:
+        cached_session (MoodleCachedSession | MoodleSessionPool | MoodleWebServiceToken): The cached Moodle session, the pool of the sessions of several accounts or the Web Services token used to authenticate.
+        course_ids (Iterable[str | int]): The IDs or URLs of the courses to generate the reports for.
+        progress_factory (ProgressHandlerFactory[int], optional): A factory to create a progress handler for every course. Defaults to None.
+        output_directory (str, optional): The directory where the course subdirectories will be created. Defaults to the current directory.
+        max_concurrency (int, optional): The maximum number of requests in flight across all courses. Defaults to MOODLE_DEFAULT_MAX_CONCURRENCY.
+        course_cache (CourseCache, optional): The cache of the parsed course structures. Defaults to None.
+        activity_filter (ActivityFilter, optional): The filter selecting the activities to download in every course. Defaults to None.
+        recorder (CassetteRecorder, optional): The recorder of the request/response pairs. Defaults to None.
+        player (CassettePlayer, optional): The player serving the recorded responses instead of the network. Defaults to None.
+        tracer (RequestTracer, optional): The tracer collecting the timings of the requests. Defaults to None.
+        session_renewer (SessionRenewer, optional): The function signing in again when the session expires during the work. Defaults to None.
+        report_store (ReportStore, optional): The store recording the run into the snapshot database. Defaults to None.
+        report_diff (ReportDiff, optional): The diff collecting the changes of the choices since the previous run. Defaults to None.
+        writer_factory (ReportWriterFactory, optional): A factory to create the writer of the reports in the output directory. Defaults to ExcelReportWriter.
+        report_statistics (ReportStatistics, optional): The statistics collecting the choices of all choice activities. The quizzes aren't included. Defaults to None.
+        include_quizzes (bool, optional): Whether to write the answers given in the quizzes like the choices, with the groups of the students taken from the choice reports of the course. Defaults to False.
+
+    Returns:
+        Sequence[CourseReportResult]: The results of the courses in the order they were passed.
+    """
+
+    # Preserve order of the courses, but don't build the same course twice. Malformed IDs are kept as
+    # passed, so they fail in their own results instead of aborting the whole run
+    unique_ids = list(dict.fromkeys(_try_get_course_id(id) for id in course_ids))
+
+    async with _open_session(
+        cached_session,
+        max_concurrency=max_concurrency,
+        course_cache=course_cache,
+        recorder=recorder,
+        player=player,
+        tracer=tracer,
+        session_renewer=session_renewer,
+    ) as session:
+        with _record_run(report_store):
+            return await asyncio.gather(
+                *(
+                    _build_course_report_safe(
+                        session,
+                        course_id,
+                        progress_factory=progress_factory,
+                        output_directory=output_directory,
+                        activity_filter=activity_filter,
+                        report_store=report_store,
+                        report_diff=report_diff,
+                        writer_factory=writer_factory,
+                        report_statistics=report_statistics,
+                        include_quizzes=include_quizzes,
+                    )
+                    for course_id in unique_ids
+                )
+            )
+
+
+async def build_course_report(
+    session: MoodleBackend,
+    course_id: str | int,
+    *,
+    progress_factory: ProgressHandlerFactory[int] | None = None,
+    output_directory: str = ".",
+    activity_filter: ActivityFilter | None = None,
+    report_store: ReportStore | None = None,
+    report_diff: ReportDiff | None = None,
+    writer_factory: ReportWriterFactory | None = None,
+    report_statistics: ReportStatistics | None = None,
+    include_quizzes: bool = False,
+) -> None:
+    """Generate a report for a specific Moodle course using an already opened session.
+
+    Args:
+        session (MoodleBackend): The opened Moodle session.
+        course_id (str | int): The ID or URL of the course to generate the report for.
+        progress_factory (ProgressHandlerFactory[int], optional): A factory to create a progress handler to track the report generation progress. Defaults to None.
+        output_directory (str, optional): The directory where the report will be saved. Defaults to the current directory.
+        activity_filter (ActivityFilter, optional): The filter selecting the activities to download. Defaults to None.
+        report_store (ReportStore, optional): The store recording the reports into the snapshot database. Defaults to None.
+        report_diff (ReportDiff, optional): The diff collecting the changes of the choices since the previous run. Must use the same snapshot database as `report_store`. Defaults to None.
+        writer_factory (ReportWriterFactory, optional): A factory to create the writer of the reports in the output directory. Defaults to ExcelReportWriter.
+        report_statistics (ReportStatistics, optional): The statistics collecting the choices of all choice activities. The quizzes aren't included. Defaults to None.
+        include_quizzes (bool, optional): Whether to write the answers given in the quizzes like the choices, with the groups of the students taken from the choice reports of the course. Defaults to False.
+    """
 
-        report_tasks = []
-        for section in course.sections:
-            for activity in section.activities:
-                if not isinstance(activity, ChoiceMoodleActivity):
-                    continue
-
-                report_tasks.append(
-                    (
-                        course.name,
-                        section.name,
-                        activity.name,
-                        asyncio.create_task(session.get_excel_report(activity.id)),
+    progress_factory = progress_factory or ProgressHandler.mock
+    writer = (writer_factory or ExcelReportWriter)(output_directory)
+    directory = StudentDirectory()
+    report_tasks = []
+    quiz_activities = []
+    try:
+        # Progress is created before parsing, so the downloads report their bytes from the start
+        with progress_factory(0) as progress, writer:
+            # Downloads are scheduled while the rest of the course page is still being parsed
+            with profile_span("get_course"):
+                async for course_activity in session.iter_course_activities(course_id):
+                    activity = course_activity.activity
+                    is_quiz = include_quizzes and isinstance(
+                        activity, QuizMoodleActivity
                     )
+                    if not is_quiz and not isinstance(activity, ChoiceMoodleActivity):
+                        continue
+
+                    if activity_filter and not activity_filter.matches(course_activity):
+                        continue
+
+                    # Quizzes are retrieved after the choices, which give the groups of their students
+                    if is_quiz:
+                        quiz_activities.append(course_activity)
+                        progress.resize(len(report_tasks) + len(quiz_activities))
+                        continue
+
+                    report_tasks.append(
+                        (
+                            course_activity,
+                            asyncio.create_task(
+                                _download_report(session, activity.id, progress.child)
+                            ),
+                        )
+                    )
+                    progress.resize(len(report_tasks) + len(quiz_activities))
+
+            count = 0
+            for course_activity, task in report_tasks:
+                df_report = await task
+                with profile_span("deserialize_report"):
+                    report = deserialize_report(df_report)
+
+                with profile_span("write_report"):
+                    writer.write(course_activity, report)
+
+                if report_statistics:
+                    with profile_span("collect_statistics"):
+                        report_statistics.add(course_activity, report)
+
+                payload_hash = (
+                    ReportStore.hash_payload(df_report)
+                    if report_store or report_diff
+                    else ""
                 )
+                if report_diff:
+                    with profile_span("diff_report"):
+                        report_diff.compare(course_activity, report, payload_hash)
 
-        progress_factory = progress_factory or ProgressHandler.mock
-        count = 0
-        with progress_factory(activities_count) as progress:
-            for course_name, section_name, activity_name, task in report_tasks:
-                report = await task
-                report = deserialize_report(report)
+                if report_store:
+                    with profile_span("store_report"):
+                        report_store.store_report(course_activity, report, payload_hash)
 
-                filename = f"{course_name}-{section_name}-{activity_name}.xlsx"
-                filename = path.join(output_directory, filename)
+                if quiz_activities:
+                    directory.add(report)
+                count += 1
+                progress.update(count)
 
-                serialize_report_to_excel(filename, report)
+            # Every page is passed to the writer as soon as it is retrieved. The Excel writer spills it
+            # to disk and the JSON Lines one appends it to the file, so a quiz isn't kept in memory whole.
+            # Quizzes stay out of the statistics, which expect every student of the roster to answer
+            # every activity and can't place the students of no known group
+            for course_activity in quiz_activities:
+                async for report in iter_quiz_report(
+                    session, course_activity.activity.id, directory, progress.child
+                ):
+                    with profile_span("write_report"):
+                        writer.write_page(course_activity, report)
                 count += 1
                 progress.update(count)
+    finally:
+        # Don't leave orphan downloads running if one of the reports failed
+        for _, task in report_tasks:
+            task.cancel()
+
+
+async def _download_report(
+    session: MoodleBackend,
+    report_id: int,
+    progress_factory: ProgressHandlerFactory[int],
+) -> "pd.DataFrame":
+    with profile_span("download"):
+        return await session.get_excel_report(report_id, progress_factory)
+
+
+def _open_session(
+    cached_session: MoodleCachedSession | MoodleSessionPool | MoodleWebServiceToken,
+    *,
+    max_concurrency: int,
+    course_cache: CourseCache | None,
+    recorder: CassetteRecorder | None,
+    player: CassettePlayer | None,
+    tracer: RequestTracer | None,
+    session_renewer: SessionRenewer | None,
+) -> MoodleBackend:
+    if isinstance(cached_session, MoodleWebServiceToken):
+        # Web Services return compact JSON, so there is nothing to cache
+        return MoodleWebServiceSession(cached_session, max_concurrency, tracer=tracer)
+
+    return MoodleSession(
+        cached_session,
+        max_concurrency,
+        course_cache,
+        recorder=recorder,
+        player=player,
+        tracer=tracer,
+        session_renewer=session_renewer,
+    )
+
+
+def _record_run(report_store: ReportStore | None) -> ContextManager[Any]:
+    return report_store.record_run() if report_store else nullcontext()
+
+
+def _try_get_course_id(value: str | int) -> str | int:
+    try:
+        return MoodleSession.get_id(value)
+    except ValueError:
+        return value
+
+
+async def _build_course_report_safe(
+    session: MoodleBackend,
+    course_id: str | int,
+    *,
+    progress_factory: ProgressHandlerFactory[int] | None,
+    output_directory: str,
+    activity_filter: ActivityFilter | None,
+    report_store: ReportStore | None,
+    report_diff: ReportDiff | None,
+    writer_factory: ReportWriterFactory | None,
+    report_statistics: ReportStatistics | None,
+    include_quizzes: bool,
+) -> CourseReportResult:
+    started_at = time.perf_counter()
+    try:
+        course_id = MoodleSession.get_id(course_id)
+        output_directory = path.join(output_directory, str(course_id))
+        os.makedirs(output_directory, exist_ok=True)
+        await build_course_report(
+            session,
+            course_id,
+            progress_factory=progress_factory,
+            output_directory=output_directory,
+            activity_filter=activity_filter,
+            report_store=report_store,
+            report_diff=report_diff,
+            writer_factory=writer_factory,
+            report_statistics=report_statistics,
+            include_quizzes=include_quizzes,
+        )
+    except Exception as e:
+        return CourseReportResult(
+            course_id, output_directory, time.perf_counter() - started_at, e
+        )
+
+    return CourseReportResult(
+        course_id, output_directory, time.perf_counter() - started_at
+    )
@@ -1,2 +1,8 @@
 SESSION_FILE = "session.json"
 """File path for storing the serialized session data."""
+
+COURSE_CACHE_DIRECTORY = ".course_cache"
+"""Directory for storing the parsed course structures between runs."""
+
+REPORT_STORE_FILE = "reports.sqlite3"
+"""File path of the database recording the reports of every run."""
@@ -0,0 +1,289 @@
+from collections import Counter, deque
+from dataclasses import asdict, dataclass
+from enum import Enum
+from logic.exceptions import SerializeReportError
+from logic.models import Report
+from logic.serialization import normalize_subject
+from logic.store import ReportStore, StudentKey
+from moodle.models import MoodleCourseActivity
+from os import path
+from typing import Callable, Mapping, Sequence
+import csv
+import json
+
+
+class ChangeKind(Enum):
+    """Enumeration of the kinds of changes of the students' choices between two runs."""
+
+    ADDED = "added"
+    """The student has made a choice since the previous run."""
+
+    REMOVED = "removed"
+    """The choice of the student has disappeared since the previous run."""
+
+    CHANGED = "changed"
+    """The student has chosen another subject since the previous run."""
+
+
+@dataclass(frozen=True)
+class ChoiceChange:
+    """Class to represent a change of the choice of a student between two runs."""
+
+    kind: ChangeKind
+    """The kind of the change."""
+
+    course_id: int
+    """The unique identifier of the Moodle course."""
+
+    course_name: str
+    """The name or title of the Moodle course."""
+
+    section_name: str
+    """The name or title of the Moodle section."""
+
+    activity_id: int
+    """The unique identifier of the choice activity."""
+
+    activity_name: str
+    """The name of the choice activity."""
+
+    fullname: str
+    """The full name of the student."""
+
+    group: str
+    """The group number of the student."""
+
+    previous_subject: str | None
+    """The subject chosen in the previous run, or None if the choice has been added."""
+
+    subject: str | None
+    """The subject chosen in the current run, or None if the choice has been removed."""
+
+
+DIFF_FORMATS = [".xlsx", ".csv", ".json"]
+"""Extensions of the files the changes can be written to."""
+
+_KIND_TITLES = {
+    ChangeKind.ADDED: "Добавлен",
+    ChangeKind.REMOVED: "Удален",
+    ChangeKind.CHANGED: "Изменен",
+}
+"""Titles of the kinds of changes in the Excel file."""
+
+
+def diff_choices(
+    course_activity: MoodleCourseActivity,
+    previous: Mapping[StudentKey, Sequence[str | None]],
+    report: Report,
+) -> Sequence[ChoiceChange]:
+    """Compare the choices of a report with the choices of the previous snapshot of the activity.
+
+    The previous choices are used as a hash table keyed by the student, so the comparison takes time
+    linear in the number of students. A key may have several rows, e.g. namesakes in the same group
+    or several answers of a student, so the subjects of a key are compared as multisets: the subjects
+    found in both runs are unchanged, and the rest are paired in order as changed ones.
+
+    Args:
+        course_activity (MoodleCourseActivity): The choice activity with its course and section.
+        previous (Mapping[StudentKey, Sequence[str | None]]): The previous subjects keyed by the full name and the group number of the student.
+        report (Report): The current report of the activity.
+
+    Returns:
+        Sequence[ChoiceChange]: The added and changed choices in the order of the report followed by the removed ones.
+    """
+
+    def change(
+        kind: ChangeKind,
+        key: StudentKey,
+        previous_subject: str | None,
+        subject: str | None,
+    ) -> ChoiceChange:
+        return ChoiceChange(
+            kind,
+            course_activity.course_id,
+            course_activity.course_name,
+            course_activity.section_name,
+            course_activity.activity.id,
+            course_activity.activity.name,
+            *key,
+            previous_subject,
+            subject,
+        )
+
+    # Rows whose subject is found among the previous subjects of the student are unchanged
+    remaining = {key: Counter(subjects) for key, subjects in previous.items()}
+    unmatched = []
+    for group, students in report.groups.items():
+        for student in students:
+            key = (student.fullname, str(group))
+            subject = normalize_subject(student.subject)
+            subjects = remaining.get(key)
+            if subjects and subjects[subject] > 0:
+                subjects[subject] -= 1
+            else:
+                unmatched.append((key, subject))
+
+    previous_subjects = {
+        key: deque(subjects.elements()) for key, subjects in remaining.items()
+    }
+    changes = []
+    for key, subject in unmatched:
+        subjects = previous_subjects.get(key)
+        if subjects:
+            changes.append(change(ChangeKind.CHANGED, key, subjects.popleft(), subject))
+        else:
+            changes.append(change(ChangeKind.ADDED, key, None, subject))
+
+    changes.extend(
+        change(ChangeKind.REMOVED, key, subject, None)
+        for key, subjects in previous_subjects.items()
+        for subject in subjects
+    )
+    return changes
+
+
+class ReportDiff:
+    """Class to collect the changes of the students' choices since the previous run.
+
+    Every report is compared with the latest snapshot of its activity stored in the snapshot database
+    before the current run. Activities whose downloaded report hasn't changed are skipped without
+    loading their choices.
+    """
+
+    _store: ReportStore
+    """The snapshot database the previous choices are loaded from."""
+
+    _changes: list[ChoiceChange]
+    """The changes collected so far."""
+
+    def __init__(self, store: ReportStore) -> None:
+        """Initialize the diff.
+
+        Args:
+            store (ReportStore): The snapshot database the previous choices are loaded from.
+        """
+
+        self._store = store
+        self._changes = []
+
+    @property
+    def changes(self) -> Sequence[ChoiceChange]:
+        """The changes collected so far."""
+
+        return self._changes
+
+    def compare(
+        self, course_activity: MoodleCourseActivity, report: Report, payload_hash: str
+    ) -> Sequence[ChoiceChange]:
+        """Compare a report with the previous snapshot of its activity and collect the changes.
+
+        Must be called before the report is stored in the current run.
+
+        Args:
+            course_activity (MoodleCourseActivity): The choice activity with its course and section.
+            report (Report): The current report of the activity.
+            payload_hash (str): The hash of the downloaded report, as returned by `ReportStore.hash_payload`.
+
+        Returns:
+            Sequence[ChoiceChange]: The changes of the activity.
+        """
+
+        activity_id = course_activity.activity.id
+        snapshot = self._store.find_previous_snapshot(activity_id)
+        if snapshot and snapshot.payload_hash == payload_hash:
+            return []
+
+        previous = self._store.load_choices(snapshot, activity_id) if snapshot else {}
+        changes = diff_choices(course_activity, previous, report)
+        self._changes.extend(changes)
+
+        return changes
+
+    def write(self, filename: str) -> None:
+        """Write the collected changes to a file. The format is chosen by the extension of the file.
+
+        Args:
+            filename (str): The path to the file, one of DIFF_FORMATS.
+        """
+
+        write_changes(filename, self._changes)
+
+
+def write_changes(filename: str, changes: Sequence[ChoiceChange]) -> None:
+    """Write the changes of the students' choices to a file. The format is chosen by the extension of the file.
+
+    Args:
+        filename (str): The path to the file, one of DIFF_FORMATS.
+        changes (Sequence[ChoiceChange]): The changes to write.
+    """
+
+    extension = path.splitext(filename)[1].lower()
+    writers: dict[str, Callable[[str, Sequence[ChoiceChange]], None]] = {
+        ".xlsx": _write_excel,
+        ".csv": _write_csv,
+        ".json": _write_json,
+    }
+
+    writer = writers.get(extension)
+    if not writer:
+        raise SerializeReportError(f'Unsupported format of the changes "{extension}".')
+
+    try:
+        writer(filename, changes)
+    except OSError as e:
+        raise SerializeReportError(f'Error of writing changes "{e}".')
+
+
+def _to_row(change: ChoiceChange) -> dict[str, object]:
+    return {**asdict(change), "kind": change.kind.value}
+
+
+def _write_csv(filename: str, changes: Sequence[ChoiceChange]) -> None:
+    with open(filename, "w", encoding="utf-8", newline="") as file:
+        writer = csv.DictWriter(file, ChoiceChange.__dataclass_fields__)
+        writer.writeheader()
+        writer.writerows(map(_to_row, changes))
+
+
+def _write_json(filename: str, changes: Sequence[ChoiceChange]) -> None:
+    grouped: dict[str, list[dict[str, object]]] = {
+        kind.value: [] for kind in ChangeKind
+    }
+    for change in changes:
+        row = _to_row(change)
+        del row["kind"]
+        grouped[change.kind.value].append(row)
+
+    with open(filename, "w", encoding="utf-8") as file:
+        json.dump(grouped, file, ensure_ascii=False, indent=2)
+
+
+def _write_excel(filename: str, changes: Sequence[ChoiceChange]) -> None:
+    import pandas as pd
+
+    df = pd.DataFrame(
+        [
+            {
+                "Курс": change.course_name,
+                "Раздел": change.section_name,
+                "Опрос": change.activity_name,
+                "Группа": change.group,
+                "ФИО": change.fullname,
+                "Изменение": _KIND_TITLES[change.kind],
+                "Было": change.previous_subject,
+                "Стало": change.subject,
+            }
+            for change in changes
+        ],
+        columns=[
+            "Курс",
+            "Раздел",
+            "Опрос",
+            "Группа",
+            "ФИО",
+            "Изменение",
+            "Было",
+            "Стало",
+        ],
+    )
+    df.to_excel(filename, sheet_name="Изменения", index=False, engine="openpyxl")
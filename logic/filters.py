@@ -0,0 +1,79 @@
+from dataclasses import dataclass, field
+from moodle.models import (
+    MoodleActivity,
+    MoodleCourseActivity,
+    MoodleSection,
+)
+from typing import AbstractSet, Sequence
+import re
+
+
+@dataclass(frozen=True)
+class ActivityFilter:
+    """Class to represent a filter selecting the course activities to build the report for.
+
+    All the specified criteria must be satisfied. Empty criteria match every activity.
+    """
+
+    sections: Sequence[str] = field(default_factory=tuple)
+    """Identifiers or names (case-insensitive) of the sections to keep."""
+
+    name_pattern: re.Pattern[str] | None = None
+    """Regex pattern which must be found in the name of the activity."""
+
+    activity_ids: AbstractSet[int] = field(default_factory=frozenset)
+    """Identifiers of the activities to keep."""
+
+    def matches_section(self, section: MoodleSection) -> bool:
+        """Check if the section satisfies the section criteria of the filter.
+
+        Args:
+            section (MoodleSection): The section to check.
+
+        Returns:
+            bool: True if the activities of the section may be kept, False otherwise.
+        """
+
+        return self.__matches_section(section.id, section.name)
+
+    def matches_activity(self, activity: MoodleActivity) -> bool:
+        """Check if the activity satisfies the activity criteria of the filter.
+
+        Args:
+            activity (MoodleActivity): The activity to check.
+
+        Returns:
+            bool: True if the activity may be kept, False otherwise.
+        """
+
+        if self.activity_ids and activity.id not in self.activity_ids:
+            return False
+
+        if self.name_pattern and not self.name_pattern.search(activity.name):
+            return False
+
+        return True
+
+    def matches(self, course_activity: MoodleCourseActivity) -> bool:
+        """Check if the course activity satisfies the filter.
+
+        Args:
+            course_activity (MoodleCourseActivity): The activity with the section it belongs to.
+
+        Returns:
+            bool: True if the activity may be kept, False otherwise.
+        """
+
+        return self.__matches_section(
+            course_activity.section_id, course_activity.section_name
+        ) and self.matches_activity(course_activity.activity)
+
+    def __matches_section(self, section_id: int, section_name: str) -> bool:
+        if not self.sections:
+            return True
+
+        section_name = section_name.casefold()
+        return any(
+            value.strip() == str(section_id) or value.strip().casefold() == section_name
+            for value in self.sections
+        )
@@ -1,8 +1,13 @@
 from dataclasses import dataclass
 from datetime import date
-from typing import Mapping, Sequence
+from functools import lru_cache
+from moodle.models import MoodleCourseActivity
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Mapping, Sequence, overload
 import re
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 _IDENTIFICATOR_PATTERN = re.compile(r"_?([^_]*)")
 """Regex pattern to extract parts of the string separated by underscores."""
@@ -13,8 +18,30 @@ _CURRENT_YEAR_BASE = date.today().year // 100 * 100
 _NON_DIGITS_PATTERN = re.compile(r"[^\d]")
 """Regex pattern to extract non-digits from the string."""
 
-
-@dataclass(frozen=True)
+_IDENTIFICATOR_PARSER = re.compile(
+    r"_?(?P<faculty>[^_]*)_(?P<direction_code>[^_]*)_(?P<direction_name>[^_]*)"
+    r"_(?P<profile>[^_]*)_(?P<group>[^_]*)_(?P<start_year>[^_]*)_(?P<form>[^_]*)"
+    r"_(?P<current_year>[^_]*)"
+)
+"""Regex pattern to parse all parts of an identificator in a single pass. Trailing parts are ignored."""
+
+_IDENTIFICATOR_CACHE_SIZE = 4096
+"""Maximum number of distinct identificator strings whose parsed identificators are kept."""
+
+CHOICE_COLUMNS = [
+    "course_id",
+    "course_name",
+    "section_name",
+    "activity_id",
+    "activity_name",
+    "group",
+    "fullname",
+    "subject",
+]
+"""Columns of the choices collected from the reports of several activities."""
+
+
+@dataclass(frozen=True, slots=True)
 class Direction:
     """Class to represent a direction (field of study) in an academic context."""
 
@@ -36,10 +63,10 @@ class Direction:
         """
 
         code, name, *_ = _IDENTIFICATOR_PATTERN.findall(value.strip())
-        return Direction(code, name)
+        return Direction(name, code)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Identificator:
     """Class to represent a student's identificator, including faculty, direction, group, start year, form, and current year."""
 
@@ -75,43 +102,221 @@ class Identificator:
             Identificator: An Identificator instance with the extracted details.
         """
 
-        (
-            faculty,
-            direction_code,
-            direction_name,
-            profile,
-            group,
-            start_year,
-            form,
-            current_year,
-            *_,
-        ) = _IDENTIFICATOR_PATTERN.findall(value.strip())
-
-        direction = Direction.from_str(f"{direction_code}_{direction_name}")
-        start_year = _CURRENT_YEAR_BASE + int(start_year)
-
-        current_year = _NON_DIGITS_PATTERN.sub("", current_year)
-        current_year = int(current_year)
-
-        return Identificator(
-            faculty, direction, profile, group, start_year, form, current_year
-        )
+        return _parse_identificator(value)
 
+    @staticmethod
+    def from_column(
+        values: Iterable[str],
+    ) -> tuple[Sequence[str], Sequence["Identificator"]]:
+        """Parse a column of identificator strings. Every distinct string is parsed only once.
 
-@dataclass(frozen=True)
+        Args:
+            values (Iterable[str]): The identificator strings, e.g. the "Группа" column of a report.
+
+        Returns:
+            tuple[Sequence[str], Sequence[Identificator]]: The group numbers and the identificators of the rows.
+        """
+
+        parsed: dict[str, Identificator] = {}
+        identificators = []
+        for value in values:
+            identificator = parsed.get(value)
+            if identificator is None:
+                identificator = parsed[value] = _parse_identificator(value)
+
+            identificators.append(identificator)
+
+        return [identificator.group for identificator in identificators], identificators
+
+
+@lru_cache(maxsize=_IDENTIFICATOR_CACHE_SIZE)
+def _parse_identificator(value: str) -> Identificator:
+    # Equal strings share the same instance as long as they stay in the cache
+    match = _IDENTIFICATOR_PARSER.match(value.strip())
+    if not match:
+        raise ValueError(f'Invalid identificator "{value}".')
+
+    current_year = _NON_DIGITS_PATTERN.sub("", match["current_year"])
+    return Identificator(
+        match["faculty"],
+        Direction(match["direction_name"], match["direction_code"]),
+        match["profile"],
+        match["group"],
+        _CURRENT_YEAR_BASE + int(match["start_year"]),
+        match["form"],
+        int(current_year),
+    )
+
+
+@dataclass(frozen=True, slots=True)
 class Student:
     """Class to represent a student."""
 
     fullname: str
     """The full name of the student."""
 
-    subject: str
-    """The subject the student is studying."""
+    subject: str | None
+    """The subject the student is studying, or None if the answer is empty."""
 
+    identificator: Identificator | None = None
+    """The parsed identificator of the student, or None if it is unknown."""
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
+class StudentBatch(Sequence[Student]):
+    """Class to represent the students of a group stored by column.
+
+    The batch doesn't keep an object per student: Student instances are created on access, so the batch
+    can be used wherever a sequence of students is expected.
+    """
+
+    fullnames: Sequence[str]
+    """The full names of the students."""
+
+    subjects: Sequence[str | None]
+    """The subjects the students are studying, None for the empty answers."""
+
+    identificators: Sequence[Identificator | None]
+    """The parsed identificators of the students, None for the unknown ones."""
+
+    def __len__(self) -> int:
+        """Get the number of the students in the batch.
+
+        Returns:
+            int: The number of the students.
+        """
+
+        return len(self.fullnames)
+
+    @overload
+    def __getitem__(self, index: int) -> Student: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "StudentBatch": ...
+
+    def __getitem__(self, index: int | slice) -> "Student | StudentBatch":
+        """Get a student or a slice of the batch.
+
+        Args:
+            index (int | slice): The index of the student or a slice of the indices.
+
+        Returns:
+            Student | StudentBatch: The student, or a batch of the sliced students.
+        """
+
+        if isinstance(index, slice):
+            return StudentBatch(
+                self.fullnames[index], self.subjects[index], self.identificators[index]
+            )
+
+        return Student(
+            self.fullnames[index], self.subjects[index], self.identificators[index]
+        )
+
+    def __iter__(self) -> Iterator[Student]:
+        """Iterate over the students of the batch.
+
+        Returns:
+            Iterator[Student]: An iterator of the students.
+        """
+
+        for row in zip(self.fullnames, self.subjects, self.identificators):
+            yield Student(*row)
+
+
+@dataclass(frozen=True, slots=True)
 class Report:
     """Class to represent a report, which maps group numbers to students."""
 
     groups: Mapping[int, Sequence[Student]]
     """A mapping of group numbers to Student instances."""
+
+
+class ChoiceColumns:
+    """Class to collect the choices of the students of several activities into columns."""
+
+    _columns: dict[str, list[Any]]
+    """The collected choices by column, keyed by the names from CHOICE_COLUMNS."""
+
+    def __init__(self) -> None:
+        """Initialize the empty columns."""
+
+        self._columns = {column: [] for column in CHOICE_COLUMNS}
+
+    def __len__(self) -> int:
+        """Get the number of the collected choices.
+
+        Returns:
+            int: The number of the collected choices.
+        """
+
+        return len(self._columns["fullname"])
+
+    def append(self, course_activity: MoodleCourseActivity, report: Report) -> None:
+        """Append the choices of a choice activity.
+
+        Args:
+            course_activity (MoodleCourseActivity): The choice activity with its course and section.
+            report (Report): The report of the activity.
+        """
+
+        activity_values = [
+            course_activity.course_id,
+            course_activity.course_name,
+            course_activity.section_name,
+            course_activity.activity.id,
+            course_activity.activity.name,
+        ]
+
+        columns = self._columns
+        for group, students in report.groups.items():
+            count = len(students)
+            for column, value in zip(CHOICE_COLUMNS, activity_values):
+                columns[column].extend([value] * count)
+
+            columns["group"].extend([str(group)] * count)
+            if isinstance(students, StudentBatch):
+                # The columns are copied as is, without creating an object per student
+                columns["fullname"].extend(students.fullnames)
+                columns["subject"].extend(students.subjects)
+            else:
+                columns["fullname"].extend(student.fullname for student in students)
+                columns["subject"].extend(student.subject for student in students)
+
+    def to_frame(self) -> "pd.DataFrame":
+        """Convert the collected choices into a DataFrame.
+
+        Returns:
+            pd.DataFrame: The DataFrame with a row per choice and the columns from CHOICE_COLUMNS.
+        """
+
+        import pandas as pd
+
+        return pd.DataFrame(self._columns, columns=CHOICE_COLUMNS)
+
+
+@dataclass(frozen=True)
+class CourseReportResult:
+    """Class to represent the outcome of building the report of a single course in batch mode."""
+
+    course_id: int | str
+    """The unique identifier of the Moodle course, or the value as passed if it isn't a valid one."""
+
+    output_directory: str
+    """The directory where the course report was saved, or the parent directory if the identifier isn't valid."""
+
+    elapsed: float
+    """The time spent on building the course report, in seconds."""
+
+    error: Exception | None = None
+    """The error occurred during the build, or None if the build succeeded."""
+
+    @property
+    def succeeded(self) -> bool:
+        """Check if the course report was built successfully.
+
+        Returns:
+            bool: True if the build succeeded, False otherwise.
+        """
+
+        return self.error is None
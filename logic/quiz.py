@@ -0,0 +1,150 @@
+from collections import defaultdict
+from logic.models import Identificator, Report, StudentBatch
+from moodle.backend import MoodleBackend
+from moodle.models import MoodleAttemptReview, MoodleAttemptStatus, MoodleQuizAttempt
+from moodle.profiling import profile_span
+from moodle.progress import ProgressHandlerFactory
+from typing import AsyncIterable, Mapping, Sequence
+
+
+UNKNOWN_GROUP = "Без группы"
+"""Group of the students who have attempted a quiz, but aren't found among the students of the course."""
+
+_ANSWER_SEPARATOR = "; "
+"""Separator of the answers to several questions of a quiz joined into the subject of a student."""
+
+
+class StudentDirectory:
+    """Class to find the group and the identificator of a student by the full name.
+
+    The quiz reports identify a student by the full name, login and email, but not by the group, so
+    the groups are taken from the choice reports of the course. Names are compared regardless of the
+    case, the order of the words and "ё", since Moodle may display the first name before the last one.
+    """
+
+    _students: dict[str, tuple[str, str, Identificator | None]]
+    """The full name, the group number and the identificator of every student, keyed by the normalized full name."""
+
+    def __init__(self) -> None:
+        """Initialize the empty directory."""
+
+        self._students = {}
+
+    def __len__(self) -> int:
+        """Get the number of the known students.
+
+        Returns:
+            int: The number of the known students.
+        """
+
+        return len(self._students)
+
+    def add(self, report: Report) -> None:
+        """Add the students of the report of a choice activity.
+
+        Args:
+            report (Report): The report of the activity.
+        """
+
+        for group, students in report.groups.items():
+            if isinstance(students, StudentBatch):
+                rows = zip(students.fullnames, students.identificators)
+            else:
+                rows = (
+                    (student.fullname, student.identificator) for student in students
+                )
+
+            for fullname, identificator in rows:
+                self._students[StudentDirectory.__get_key(fullname)] = (
+                    fullname,
+                    str(group),
+                    identificator,
+                )
+
+    def find(self, fullname: str) -> tuple[str, str, Identificator | None] | None:
+        """Find a student by the full name.
+
+        Args:
+            fullname (str): The full name of the student in any order of the words.
+
+        Returns:
+            tuple[str, str, Identificator | None] | None: The full name as in the choice reports, the group number and the identificator of the student, or None if the student is unknown.
+        """
+
+        return self._students.get(StudentDirectory.__get_key(fullname))
+
+    @staticmethod
+    def __get_key(fullname: str) -> str:
+        return " ".join(sorted(fullname.casefold().replace("ё", "е").split()))
+
+
+async def iter_quiz_report(
+    session: MoodleBackend,
+    quiz_id: str | int,
+    directory: StudentDirectory,
+    progress_factory: ProgressHandlerFactory[int] | None = None,
+    page_size: int = 30,
+) -> AsyncIterable[Report]:
+    """Retrieve the answers given in the finished attempts of a quiz as reports of consecutive pages of attempts.
+
+    Only one page of attempts and its reviews are kept in memory at a time, so the pages should be
+    written as soon as they are yielded. The answers to all questions of an attempt are joined into
+    the subject of the student.
+
+    Args:
+        session (MoodleBackend): The opened Moodle session.
+        quiz_id (str | int): The ID or URL of the quiz.
+        directory (StudentDirectory): The students of the course, used to find the groups of the students who have attempted the quiz.
+        progress_factory (ProgressHandlerFactory[int], optional): Factory to create a progress handler to track the progress of fetching attempts. Defaults to None.
+        page_size (int, optional): The number of attempts per page. Defaults to 30.
+
+    Yields:
+        AsyncIterable[Report]: An asynchronous iterable of the reports of the pages, grouped like the report of a choice activity.
+    """
+
+    async for attempts in session.get_quiz_attempts(
+        quiz_id, MoodleAttemptStatus.FINISHED, progress_factory, page_size
+    ):
+        with profile_span("get_attempt_reviews"):
+            reviews = {
+                review.attempt_id: review
+                async for review in session.iter_attempt_reviews(
+                    [attempt.id for attempt in attempts]
+                )
+            }
+
+        with profile_span("join_students"):
+            report = _build_page_report(attempts, reviews, directory)
+
+        yield report
+
+
+def _build_page_report(
+    attempts: Sequence[MoodleQuizAttempt],
+    reviews: Mapping[int, MoodleAttemptReview],
+    directory: StudentDirectory,
+) -> Report:
+    columns: defaultdict[str, tuple[list[str], list[str], list[Identificator | None]]]
+    columns = defaultdict(lambda: ([], [], []))
+
+    for attempt in attempts:
+        student = directory.find(attempt.fullname)
+        fullname, group, identificator = student or (
+            attempt.fullname,
+            UNKNOWN_GROUP,
+            None,
+        )
+
+        review = reviews.get(attempt.id)
+        subject = _ANSWER_SEPARATOR.join(
+            answer
+            for question in (review.questions if review else ())
+            for answer in question.answers
+        )
+
+        fullnames, subjects, identificators = columns[group]
+        fullnames.append(fullname)
+        subjects.append(subject)
+        identificators.append(identificator)
+
+    return Report({group: StudentBatch(*values) for group, values in columns.items()})
@@ -1,64 +1,145 @@
 from collections import defaultdict
-from typing import Any
+from typing import TYPE_CHECKING, Any
 from logic.exceptions import (
     DeserializeReportError,
     InvalidColumnNameError,
     SerializeReportError,
 )
-from logic.models import Report, Identificator, Student
-import pandas as pd
+from logic.models import Report, Identificator, StudentBatch
+from moodle.profiling import profile_span
 
+if TYPE_CHECKING:
+    import pandas as pd
 
-def deserialize_report(df_report: pd.DataFrame) -> Report:
+
+def deserialize_report(df_report: "pd.DataFrame") -> Report:
     """Convert a DataFrame into a Report object.
 
     Args:
         df_report (pd.DataFrame): The DataFrame containing the report data.
 
     Returns:
-        Report: A Report object with parsed student group numbers and student data.
+        Report: A Report object with parsed student group numbers and student data stored by column.
     """
 
     try:
-        student_map = defaultdict(list)
-        for _, row in df_report.iterrows():
-            last_name = row["Фамилия"]
-            first_name = row["Имя"]
-            identificator = Identificator.from_str(row["Группа"])
-            group = identificator.group
-            choice = row["Вариант ответа"]
-            student = Student(f"{last_name} {first_name}", choice)
-            student_map[group].append(student)
+        fullnames = (
+            df_report["Фамилия"].astype(str) + " " + df_report["Имя"].astype(str)
+        ).tolist()
+        subject_column = df_report["Вариант ответа"]
+        subjects = [
+            None if is_missing else normalize_subject(subject)
+            for subject, is_missing in zip(
+                subject_column.tolist(), subject_column.isna().tolist()
+            )
+        ]
+        group_keys, identificators = Identificator.from_column(df_report["Группа"])
+
+        positions = defaultdict(list)
+        for index, group in enumerate(group_keys):
+            positions[group].append(index)
+
+        groups = {
+            group: StudentBatch(
+                [fullnames[index] for index in indices],
+                [subjects[index] for index in indices],
+                [identificators[index] for index in indices],
+            )
+            for group, indices in positions.items()
+        }
     except KeyError as e:
         raise InvalidColumnNameError(f'Invalid dataframe column name "{e}".')
     except Exception as e:
         raise DeserializeReportError(f'Error of creating report "{e}".')
 
-    return Report(student_map)
+    return Report(groups)
+
+
+def normalize_subject(value: Any) -> str | None:
+    """Convert a subject read from a report into a string.
+
+    Excel cells are read as numbers when they look like ones, and a column with empty cells is read as
+    floats, so the same subject may come as 1, 1.0 or "1" in different runs.
+
+    Args:
+        value (Any): The subject as read from the report.
+
+    Returns:
+        str | None: The subject as a string, or None if it is empty.
+    """
+
+    if value is None or value != value:
+        return None
+
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+
+    return str(value)
+
+
+def collation_key(value: str) -> str:
+    """Get a key sorting Russian names in the alphabetical order regardless of the system locale.
+
+    Unlike the code point order, the key ignores the case and treats "ё" as "е", so "Ёлкин"
+    goes between "Елисеев" and "Жуков". Names differing only in these letters are ordered by the case
+    folded name, and then by the name itself. The parts are separated by "\\x01", which sorts before
+    any character of a name, since pandas drops everything after a NUL character when comparing strings.
+
+    Args:
+        value (str): The name.
+
+    Returns:
+        str: The sort key of the name.
+    """
+
+    folded = value.casefold()
+    return f"{folded.replace('ё', 'е')}\x01{folded}\x01{value}"
 
 
 def serialize_report_to_excel(filename: str, report: Report) -> None:
     """Serialize a Report object into an Excel file.
 
+    All students are sorted by name at once, and every sheet is written from a contiguous slice
+    of the sorted rows.
+
     Args:
         filename (str): The path to the file where the report will be saved.
         report (Report): The Report object containing the data to be serialized.
     """
 
+    import pandas as pd
+
+    fullnames = []
+    subjects = []
+    group_indices = []
+    for index, students in enumerate(report.groups.values()):
+        if isinstance(students, StudentBatch):
+            fullnames.extend(students.fullnames)
+            subjects.extend(students.subjects)
+        else:
+            fullnames.extend(student.fullname for student in students)
+            subjects.extend(student.subject for student in students)
+
+        group_indices.extend([index] * len(students))
+
+    # Groups keep their order, so the rows of every group stay contiguous after the sort
+    df = pd.DataFrame({"ФИО": fullnames, "Предмет": subjects})
+    order = pd.DataFrame(
+        {"group": group_indices, "key": [collation_key(name) for name in fullnames]}
+    ).sort_values(["group", "key"])
+    df = df.iloc[order.index].reset_index(drop=True)
+
     with pd.ExcelWriter(filename, engine="openpyxl", mode="w") as writer:
         try:
+            start = 0
             for group, students in report.groups.items():
-                df = pd.DataFrame(
-                    [
-                        {"ФИО": student.fullname, "Предмет": student.subject}
-                        for student in students
-                    ]
-                )
-                df = df.sort_values(by="ФИО")
-                df.to_excel(writer, sheet_name=str(group), index=False)
+                stop = start + len(students)
+                df.iloc[start:stop].to_excel(writer, sheet_name=str(group), index=False)
+                start = stop
 
                 worksheet = writer.sheets[str(group)]
-                _auto_adjust_column_width(worksheet)
+                with profile_span("auto_adjust_column_width"):
+                    _auto_adjust_column_width(worksheet)
         except Exception as e:
             raise SerializeReportError(f'Error of creating report "{e}".')
 
@@ -0,0 +1,224 @@
+from dataclasses import dataclass
+from logic.exceptions import SerializeReportError
+from logic.models import ChoiceColumns, Report
+from moodle.models import MoodleCourseActivity
+from os import path
+from typing import TYPE_CHECKING, Any
+import json
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+SUMMARY_FORMATS = [".xlsx", ".json"]
+"""Extensions of the files the summary can be written to."""
+
+_ACTIVITY_COLUMNS = [
+    "course_id",
+    "course_name",
+    "section_name",
+    "activity_id",
+    "activity_name",
+]
+"""Columns identifying the choice activity of a choice."""
+
+_TITLES = {
+    "course_id": "ID курса",
+    "course_name": "Курс",
+    "section_name": "Раздел",
+    "activity_id": "ID опроса",
+    "activity_name": "Опрос",
+    "group": "Группа",
+    "fullname": "ФИО",
+    "subject": "Предмет",
+    "count": "Выбрали",
+    "share": "Доля",
+    "capacity": "Мест",
+    "fill": "Заполненность",
+}
+"""Titles of the columns in the Excel file."""
+
+
+@dataclass(frozen=True)
+class ReportSummary:
+    """Class to represent the aggregate statistics of the reports of all choice activities of a run."""
+
+    subject_counts: "pd.DataFrame"
+    """The number of the students of every group who have chosen every subject of every activity.
+    The empty answers are counted with a missing subject."""
+
+    subject_fill: "pd.DataFrame"
+    """The number of the students who have chosen every subject of every activity, their share among
+    the respondents of the activity and, if the capacity is known, the filled part of the capacity.
+    The empty answers are counted with a missing subject and have no capacity."""
+
+    missing_students: "pd.DataFrame"
+    """The students who have made a choice in some activity of the course, but not in the given one."""
+
+
+class ReportStatistics:
+    """Class to compute the aggregate statistics of the reports of all choice activities of a run.
+
+    The choices are collected into columns while the reports are processed, and all statistics are
+    computed at once from a single DataFrame, so the saved reports are never read again.
+    """
+
+    _capacity: int | None
+    """The number of places of every subject, or None if it is unknown."""
+
+    _columns: ChoiceColumns
+    """The collected choices."""
+
+    def __init__(self, capacity: int | None = None) -> None:
+        """Initialize the statistics.
+
+        Args:
+            capacity (int, optional): The number of places of every subject. Defaults to None.
+        """
+
+        self._capacity = capacity
+        self._columns = ChoiceColumns()
+
+    def add(self, course_activity: MoodleCourseActivity, report: Report) -> None:
+        """Collect the choices of a choice activity.
+
+        Args:
+            course_activity (MoodleCourseActivity): The choice activity with its course and section.
+            report (Report): The report of the activity.
+        """
+
+        self._columns.append(course_activity, report)
+
+    def summarize(self) -> ReportSummary:
+        """Compute the statistics of the collected choices.
+
+        The roster of a course is the set of the students who have made a choice in any of its
+        activities, since the reports contain only the students who have made a choice.
+
+        Returns:
+            ReportSummary: The statistics of the collected choices.
+        """
+
+        df_choices = self._columns.to_frame()
+
+        # Empty answers are counted as a subject of their own, so the shares of an activity sum to 1
+        subject_counts = (
+            df_choices.groupby(
+                _ACTIVITY_COLUMNS + ["subject", "group"], sort=False, dropna=False
+            )
+            .size()
+            .rename("count")
+            .reset_index()
+        )
+
+        subject_fill = (
+            subject_counts.groupby(
+                _ACTIVITY_COLUMNS + ["subject"], sort=False, dropna=False
+            )["count"]
+            .sum()
+            .reset_index()
+        )
+        respondents = df_choices.groupby("activity_id").size()
+        subject_fill["share"] = subject_fill["count"] / subject_fill["activity_id"].map(
+            respondents
+        )
+        if self._capacity:
+            # Empty answers take no place of a subject
+            answered = subject_fill["subject"].notna()
+            subject_fill["capacity"] = self._capacity
+            subject_fill["fill"] = subject_fill["count"] / self._capacity
+            subject_fill.loc[~answered, ["capacity", "fill"]] = None
+
+        # Every activity expects every student of the roster of its course
+        students = df_choices[["course_id", "group", "fullname"]].drop_duplicates()
+        activities = df_choices[_ACTIVITY_COLUMNS].drop_duplicates()
+        expected = activities.merge(students, on="course_id")
+        responded = df_choices[["activity_id", "group", "fullname"]].drop_duplicates()
+        missing_students = expected.merge(
+            responded,
+            on=["activity_id", "group", "fullname"],
+            how="left",
+            indicator=True,
+        )
+        missing_students = missing_students[
+            missing_students["_merge"] == "left_only"
+        ].drop(columns="_merge")
+
+        return ReportSummary(
+            subject_counts,
+            subject_fill,
+            missing_students.reset_index(drop=True),
+        )
+
+    def write(self, filename: str) -> None:
+        """Compute the statistics and write them to a file. The format is chosen by the extension of the file.
+
+        Args:
+            filename (str): The path to the file, one of SUMMARY_FORMATS.
+        """
+
+        extension = path.splitext(filename)[1].lower()
+        if extension not in SUMMARY_FORMATS:
+            raise SerializeReportError(
+                f'Unsupported format of the summary "{extension}".'
+            )
+
+        summary = self.summarize()
+        try:
+            if extension == ".json":
+                _write_json(filename, summary)
+            else:
+                _write_excel(filename, summary)
+        except (OSError, ValueError) as e:
+            raise SerializeReportError(f'Error of writing summary "{e}".')
+
+
+def _write_json(filename: str, summary: ReportSummary) -> None:
+    with open(filename, "w", encoding="utf-8") as file:
+        json.dump(
+            {
+                "subject_counts": _to_records(summary.subject_counts),
+                "subject_fill": _to_records(summary.subject_fill),
+                "missing_students": _to_records(summary.missing_students),
+            },
+            file,
+            ensure_ascii=False,
+            indent=2,
+            default=int,
+        )
+
+
+def _to_records(df: "pd.DataFrame") -> list[dict[str, Any]]:
+    # Missing values, e.g. the empty answers, are written as null instead of the invalid NaN
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def _write_excel(filename: str, summary: ReportSummary) -> None:
+    import pandas as pd
+
+    # Groups become the columns, so the counts of a subject are read in one row. Group numbers are
+    # compared by length first, so "10" goes after "9"
+    subject_counts = summary.subject_counts.pivot_table(
+        index=_ACTIVITY_COLUMNS + ["subject"],
+        columns="group",
+        values="count",
+        aggfunc="sum",
+        fill_value=0,
+        sort=False,
+        dropna=False,
+    )
+    subject_counts = subject_counts[
+        sorted(subject_counts.columns, key=lambda group: (len(group), group))
+    ]
+    subject_counts["Всего"] = subject_counts.sum(axis=1)
+    subject_counts = subject_counts.reset_index().rename(columns=_TITLES)
+    subject_counts.columns.name = None
+
+    with pd.ExcelWriter(filename, engine="openpyxl", mode="w") as writer:
+        subject_counts.to_excel(writer, sheet_name="По группам", index=False)
+        summary.subject_fill.rename(columns=_TITLES).to_excel(
+            writer, sheet_name="Заполненность", index=False
+        )
+        summary.missing_students.rename(columns=_TITLES).to_excel(
+            writer, sheet_name="Не выбрали", index=False
+        )
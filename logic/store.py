@@ -0,0 +1,374 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+from logic.models import Report, Student
+from logic.serialization import normalize_subject
+from moodle.models import MoodleCourseActivity
+from typing import TYPE_CHECKING, Any, Iterator, Sequence
+import hashlib
+import sqlite3
+import time
+
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS courses (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    course_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (run_id, course_id)
+);
+CREATE TABLE IF NOT EXISTS activities (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    activity_id INTEGER NOT NULL,
+    course_id INTEGER NOT NULL,
+    section_id INTEGER NOT NULL,
+    section_name TEXT NOT NULL,
+    name TEXT NOT NULL,
+    payload_hash TEXT NOT NULL,
+    PRIMARY KEY (run_id, activity_id)
+);
+CREATE TABLE IF NOT EXISTS choices (
+    run_id INTEGER NOT NULL,
+    activity_id INTEGER NOT NULL,
+    fullname TEXT NOT NULL,
+    group_name TEXT NOT NULL,
+    faculty TEXT,
+    direction_code TEXT,
+    direction_name TEXT,
+    profile TEXT,
+    start_year INTEGER,
+    form TEXT,
+    current_year INTEGER,
+    subject TEXT,
+    FOREIGN KEY (run_id, activity_id) REFERENCES activities (run_id, activity_id)
+);
+CREATE INDEX IF NOT EXISTS choices_activity ON choices (run_id, activity_id);
+CREATE INDEX IF NOT EXISTS choices_group ON choices (group_name, subject);
+CREATE INDEX IF NOT EXISTS choices_subject ON choices (subject);
+CREATE INDEX IF NOT EXISTS choices_student ON choices (fullname);
+CREATE INDEX IF NOT EXISTS activities_latest ON activities (activity_id, run_id);
+"""
+"""Schema of the snapshot database. Every run adds its own rows, so the previous snapshots are kept."""
+
+_LATEST_ACTIVITIES = """
+SELECT activity_id, MAX(run_id) AS run_id FROM activities GROUP BY activity_id
+"""
+"""Query selecting the run which stored the latest snapshot of every activity."""
+
+StudentKey = tuple[str, str]
+"""Key identifying a student within an activity: the full name and the group number."""
+
+
+@dataclass(frozen=True)
+class StoredChoice:
+    """Class to represent the choice of a student stored in the snapshot database."""
+
+    run_id: int
+    """The identifier of the run the choice was stored by."""
+
+    course_id: int
+    """The unique identifier of the Moodle course."""
+
+    course_name: str
+    """The name or title of the Moodle course."""
+
+    section_name: str
+    """The name or title of the Moodle section."""
+
+    activity_id: int
+    """The unique identifier of the choice activity."""
+
+    activity_name: str
+    """The name of the choice activity."""
+
+    fullname: str
+    """The full name of the student."""
+
+    group: str
+    """The group number of the student."""
+
+    subject: str | None
+    """The subject the student has chosen, or None if the answer is empty."""
+
+
+@dataclass(frozen=True)
+class ActivitySnapshot:
+    """Class to represent a stored snapshot of a choice activity."""
+
+    run_id: int
+    """The identifier of the run the snapshot was stored by."""
+
+    payload_hash: str
+    """The hash of the downloaded report, as returned by `ReportStore.hash_payload`."""
+
+
+class ReportStore:
+    """Class to record the reports of every run into a SQLite database.
+
+    The database keeps the course tree, the choice of every student and the hashes of the downloaded
+    reports of all runs, indexed by group, subject and student, so the choices can be queried without
+    opening the workbooks.
+    """
+
+    _connection: sqlite3.Connection
+    """Connection to the snapshot database."""
+
+    _run_id: int | None
+    """The identifier of the run being recorded, or None if no run is in progress."""
+
+    def __init__(self, filename: str) -> None:
+        """Open the snapshot database, creating it if it doesn't exist.
+
+        Args:
+            filename (str): The path to the database file.
+        """
+
+        self._connection = sqlite3.connect(filename)
+        self._connection.executescript(_SCHEMA)
+        self._run_id = None
+
+    @staticmethod
+    def hash_payload(df_report: "pd.DataFrame") -> str:
+        """Calculate a hash of the downloaded report, which changes only if its content changes.
+
+        Args:
+            df_report (pd.DataFrame): The DataFrame containing the report data.
+
+        Returns:
+            str: The hex digest of the report.
+        """
+
+        import pandas as pd
+
+        digest = hashlib.sha1()
+        digest.update("\0".join(map(str, df_report.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(df_report, index=False).values)
+
+        return digest.hexdigest()
+
+    @contextmanager
+    def record_run(self) -> Iterator[int]:
+        """Record the reports stored within the context as a single run.
+
+        Yields:
+            Iterator[int]: The identifier of the run.
+        """
+
+        with self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO runs (started_at) VALUES (?)", (time.time(),)
+            )
+
+        self._run_id = cursor.lastrowid
+        try:
+            yield self._run_id
+        finally:
+            with self._connection:
+                self._connection.execute(
+                    "UPDATE runs SET finished_at = ? WHERE id = ?",
+                    (time.time(), self._run_id),
+                )
+
+            self._run_id = None
+
+    def store_report(
+        self, course_activity: MoodleCourseActivity, report: Report, payload_hash: str
+    ) -> None:
+        """Store the report of a choice activity in the run being recorded.
+
+        Args:
+            course_activity (MoodleCourseActivity): The choice activity with its course and section.
+            report (Report): The report of the activity.
+            payload_hash (str): The hash of the downloaded report, as returned by `hash_payload`.
+        """
+
+        if self._run_id is None:
+            raise RuntimeError("No run is being recorded.")
+
+        run_id = self._run_id
+        activity_id = course_activity.activity.id
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO courses (run_id, course_id, name) VALUES (?, ?, ?)",
+                (run_id, course_activity.course_id, course_activity.course_name),
+            )
+            self._connection.execute(
+                "DELETE FROM choices WHERE run_id = ? AND activity_id = ?",
+                (run_id, activity_id),
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO activities VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    activity_id,
+                    course_activity.course_id,
+                    course_activity.section_id,
+                    course_activity.section_name,
+                    course_activity.activity.name,
+                    payload_hash,
+                ),
+            )
+            self._connection.executemany(
+                "INSERT INTO choices VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        run_id,
+                        activity_id,
+                        *ReportStore.__get_student_row(group, student),
+                    )
+                    for group, students in report.groups.items()
+                    for student in students
+                ),
+            )
+
+    def find_choices(
+        self,
+        group: str | int | None = None,
+        subject: str | None = None,
+        student: str | None = None,
+        course_id: int | None = None,
+    ) -> Sequence[StoredChoice]:
+        """Find the choices of the students in the latest stored snapshot of every activity.
+
+        Args:
+            group (str | int, optional): The group number of the students. Defaults to None.
+            subject (str, optional): The chosen subject. Defaults to None.
+            student (str, optional): The full name of the student. Defaults to None.
+            course_id (int, optional): The unique identifier of the Moodle course. Defaults to None.
+
+        Returns:
+            Sequence[StoredChoice]: The matching choices ordered by course, activity and student name.
+        """
+
+        conditions = []
+        parameters: list[Any] = []
+        for column, value in [
+            ("choices.group_name", str(group) if group is not None else None),
+            ("choices.subject", subject),
+            ("choices.fullname", student),
+            ("activities.course_id", course_id),
+        ]:
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(value)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._connection.execute(
+            f"""
+            SELECT
+                choices.run_id, activities.course_id, courses.name,
+                activities.section_name, activities.activity_id, activities.name,
+                choices.fullname, choices.group_name, choices.subject
+            FROM ({_LATEST_ACTIVITIES}) AS latest
+            JOIN activities USING (activity_id, run_id)
+            JOIN courses USING (run_id, course_id)
+            JOIN choices USING (run_id, activity_id)
+            {where}
+            ORDER BY activities.course_id, activities.activity_id, choices.fullname
+            """,
+            parameters,
+        )
+
+        return [StoredChoice(*row) for row in rows]
+
+    def find_previous_snapshot(self, activity_id: int) -> ActivitySnapshot | None:
+        """Find the latest snapshot of a choice activity stored before the run being recorded.
+
+        Args:
+            activity_id (int): The unique identifier of the choice activity.
+
+        Returns:
+            ActivitySnapshot | None: The previous snapshot, or None if the activity has never been stored.
+        """
+
+        condition = "AND run_id < ?" if self._run_id is not None else ""
+        parameters = [activity_id]
+        if self._run_id is not None:
+            parameters.append(self._run_id)
+
+        row = self._connection.execute(
+            f"""
+            SELECT run_id, payload_hash FROM activities
+            WHERE activity_id = ? {condition}
+            ORDER BY run_id DESC LIMIT 1
+            """,
+            parameters,
+        ).fetchone()
+
+        return ActivitySnapshot(*row) if row else None
+
+    def load_choices(
+        self, snapshot: ActivitySnapshot, activity_id: int
+    ) -> dict[StudentKey, list[str | None]]:
+        """Load the choices of the students stored in a snapshot of a choice activity.
+
+        Namesakes in the same group and several answers of a student share the same key, so every key
+        maps to the subjects of all its rows.
+
+        Args:
+            snapshot (ActivitySnapshot): The snapshot, as returned by `find_previous_snapshot`.
+            activity_id (int): The unique identifier of the choice activity.
+
+        Returns:
+            dict[StudentKey, list[str | None]]: The chosen subjects in the stored order keyed by the full name and the group number of the student, None for the empty answers.
+        """
+
+        rows = self._connection.execute(
+            "SELECT fullname, group_name, subject FROM choices "
+            "WHERE run_id = ? AND activity_id = ? ORDER BY rowid",
+            (snapshot.run_id, activity_id),
+        )
+
+        choices: dict[StudentKey, list[str | None]] = {}
+        for fullname, group, subject in rows:
+            choices.setdefault((fullname, group), []).append(subject)
+
+        return choices
+
+    def close(self) -> None:
+        """Close the snapshot database."""
+
+        self._connection.close()
+
+    def __enter__(self) -> "ReportStore":
+        """Enter the context manager.
+
+        Returns:
+            ReportStore: The current instance of ReportStore.
+        """
+
+        return self
+
+    def __exit__(self, *_) -> None:
+        """Exit the context manager and close the snapshot database."""
+
+        self.close()
+
+    @staticmethod
+    def __get_student_row(group: str | int, student: Student) -> tuple[Any, ...]:
+        # Reports which weren't deserialized may still contain the values as read by pandas
+        subject = normalize_subject(student.subject)
+        identificator = student.identificator
+        if not identificator:
+            return (student.fullname, str(group), *(None,) * 7, subject)
+
+        return (
+            student.fullname,
+            str(group),
+            identificator.faculty,
+            identificator.direction.code,
+            identificator.direction.name,
+            identificator.profile,
+            identificator.start_year,
+            identificator.form,
+            identificator.current_year,
+            subject,
+        )
@@ -0,0 +1,460 @@
+from abc import ABC, abstractmethod
+from enum import Enum
+from logic.exceptions import SerializeReportError
+from logic.models import ChoiceColumns, Report
+from logic.serialization import collation_key, serialize_report_to_excel
+from moodle.models import MoodleCourseActivity
+from moodle.profiling import profile_span
+from os import path
+from typing import IO, TYPE_CHECKING, Callable, Iterable, Self
+import json
+import sqlite3
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+_EXCEL_HEADER = ["ФИО", "Предмет"]
+"""Titles of the columns of the sheets of an activity."""
+
+_EXCEL_COLUMN_PADDING = 2
+"""Extra width of the columns of the sheets of an activity, the same as for the choice sheets."""
+
+_SPILL_SCHEMA = """
+CREATE TABLE students (
+    activity_id INTEGER NOT NULL,
+    student_group TEXT NOT NULL,
+    key TEXT NOT NULL,
+    fullname TEXT NOT NULL,
+    subject TEXT
+);
+CREATE INDEX students_order ON students (activity_id, student_group, key);
+"""
+"""Schema of the temporary database the pages of the activities written page by page are spilled into."""
+
+
+class OutputFormat(Enum):
+    """Enumeration of the formats the reports can be written in."""
+
+    EXCEL = "excel"
+    """A workbook per choice activity with a sheet per group."""
+
+    WORKBOOK = "workbook"
+    """A single workbook per course with a sheet per group and a column per choice activity."""
+
+    CSV = "csv"
+    """A CSV file per group with the choices of all activities of the course."""
+
+    PARQUET = "parquet"
+    """A Parquet dataset partitioned by group with the choices of all activities of the course."""
+
+    JSON_LINES = "jsonl"
+    """A JSON Lines file per course with a line per choice."""
+
+
+class ReportWriter(ABC):
+    """Abstract base class for writing the reports of the choice activities of a course.
+
+    The writer is used as a context manager: the reports are passed to `write` one by one, and the
+    formats combining several reports are saved when the writer is closed.
+    """
+
+    _output_directory: str
+    """The directory where the reports are saved."""
+
+    def __init__(self, output_directory: str) -> None:
+        """Initialize the writer.
+
+        Args:
+            output_directory (str): The directory where the reports are saved.
+        """
+
+        self._output_directory = output_directory
+
+    @abstractmethod
+    def write(self, course_activity: MoodleCourseActivity, report: Report) -> None:
+        """Write the report of a choice activity.
+
+        Args:
+            course_activity (MoodleCourseActivity): The choice activity with its course and section.
+            report (Report): The report of the activity.
+        """
+
+        pass
+
+    def write_page(self, course_activity: MoodleCourseActivity, report: Report) -> None:
+        """Write a page of the report of an activity whose report is written page by page.
+
+        By default the pages are written like the reports of separate activities, which suits the
+        writers appending every report to the same output.
+
+        Args:
+            course_activity (MoodleCourseActivity): The activity with its course and section.
+            report (Report): The report of the page.
+        """
+
+        self.write(course_activity, report)
+
+    def close(self) -> None:
+        """Save the reports combined by the writer and release its resources."""
+
+        return
+
+    @staticmethod
+    def create(output_format: OutputFormat, output_directory: str) -> "ReportWriter":
+        """Create a writer of the given format.
+
+        Args:
+            output_format (OutputFormat): The format of the reports.
+            output_directory (str): The directory where the reports are saved.
+
+        Returns:
+            ReportWriter: The writer of the format.
+        """
+
+        writers: dict[OutputFormat, Callable[[str], ReportWriter]] = {
+            OutputFormat.EXCEL: ExcelReportWriter,
+            OutputFormat.WORKBOOK: WorkbookReportWriter,
+            OutputFormat.CSV: CsvReportWriter,
+            OutputFormat.PARQUET: ParquetReportWriter,
+            OutputFormat.JSON_LINES: JsonLinesReportWriter,
+        }
+
+        return writers[output_format](output_directory)
+
+    def __enter__(self) -> Self:
+        """Enter the runtime context related to this object.
+
+        Returns:
+            Self: The writer instance.
+        """
+
+        return self
+
+    def __exit__(self, *_) -> None:
+        """Exit the runtime context and close the writer."""
+
+        self.close()
+
+
+ReportWriterFactory = Callable[[str], ReportWriter]
+"""A factory type creating a ReportWriter for the output directory of a course."""
+
+
+class ExcelReportWriter(ReportWriter):
+    """Writer saving every choice activity into its own workbook with a sheet per group.
+
+    The pages of the reports written page by page are spilled into a temporary database on disk as
+    they arrive, and every such activity is saved from it when the writer is closed. The database
+    sorts the rows, so the sheets are ordered and sized like the ones of a choice activity without
+    keeping the pages in memory.
+    """
+
+    _spill: sqlite3.Connection | None
+    """The temporary database the pages are spilled into, or None if no page has been written yet."""
+
+    _paged_activities: dict[int, tuple[MoodleCourseActivity, dict[str, None]]]
+    """The activities written page by page and their groups in the order of appearance, keyed by activity ID."""
+
+    def __init__(self, output_directory: str) -> None:
+        """Initialize the writer.
+
+        Args:
+            output_directory (str): The directory where the reports are saved.
+        """
+
+        super().__init__(output_directory)
+        self._spill = None
+        self._paged_activities = {}
+
+    def write(self, course_activity: MoodleCourseActivity, report: Report) -> None:
+        """Write the report of a choice activity into its own workbook.
+
+        Args:
+            course_activity (MoodleCourseActivity): The choice activity with its course and section.
+            report (Report): The report of the activity.
+        """
+
+        with profile_span("serialize_report_to_excel"):
+            serialize_report_to_excel(self.__get_filename(course_activity), report)
+
+    def write_page(self, course_activity: MoodleCourseActivity, report: Report) -> None:
+        """Spill a page of the report of an activity to disk until the writer is closed.
+
+        Args:
+            course_activity (MoodleCourseActivity): The activity with its course and section.
+            report (Report): The report of the page.
+        """
+
+        if self._spill is None:
+            # An empty file name opens a private database on disk, which is removed when it's closed
+            self._spill = sqlite3.connect("")
+            self._spill.executescript(_SPILL_SCHEMA)
+
+        activity_id = course_activity.activity.id
+        _, groups = self._paged_activities.setdefault(
+            activity_id, (course_activity, {})
+        )
+        for group, students in report.groups.items():
+            groups[str(group)] = None
+            self._spill.executemany(
+                "INSERT INTO students VALUES (?, ?, ?, ?, ?)",
+                (
+                    (
+                        activity_id,
+                        str(group),
+                        collation_key(student.fullname),
+                        student.fullname,
+                        student.subject,
+                    )
+                    for student in students
+                ),
+            )
+
+    def close(self) -> None:
+        """Save the activities spilled page by page and remove the temporary database."""
+
+        spill, self._spill = self._spill, None
+        paged_activities, self._paged_activities = self._paged_activities, {}
+        if spill is None:
+            return
+
+        try:
+            for activity_id, (course_activity, groups) in paged_activities.items():
+                with profile_span("serialize_pages_to_excel"):
+                    self.__save_pages(spill, activity_id, course_activity, groups)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            raise SerializeReportError(f'Error of creating report "{e}".')
+        finally:
+            spill.close()
+
+    def __save_pages(
+        self,
+        spill: sqlite3.Connection,
+        activity_id: int,
+        course_activity: MoodleCourseActivity,
+        groups: Iterable[str],
+    ) -> None:
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        for group in groups:
+            worksheet = workbook.create_sheet(group)
+
+            # Rows of a write-only sheet can't be revisited, so the widths are set before the rows
+            lengths = spill.execute(
+                "SELECT MAX(LENGTH(fullname)), MAX(LENGTH(subject)) FROM students "
+                "WHERE activity_id = ? AND student_group = ?",
+                (activity_id, group),
+            ).fetchone()
+            for letter, title, length in zip("AB", _EXCEL_HEADER, lengths):
+                worksheet.column_dimensions[letter].width = (
+                    max(len(title), length or 0) + _EXCEL_COLUMN_PADDING
+                )
+
+            worksheet.append(_EXCEL_HEADER)
+            for row in spill.execute(
+                "SELECT fullname, subject FROM students "
+                "WHERE activity_id = ? AND student_group = ? ORDER BY key, rowid",
+                (activity_id, group),
+            ):
+                worksheet.append(row)
+
+        workbook.save(self.__get_filename(course_activity))
+
+    def __get_filename(self, course_activity: MoodleCourseActivity) -> str:
+        filename = (
+            f"{course_activity.course_name}-{course_activity.section_name}-"
+            f"{course_activity.activity.name}.xlsx"
+        )
+
+        return path.join(self._output_directory, filename)
+
+
+class _ColumnarReportWriter(ReportWriter):
+    """Base class of the writers collecting the choices of all activities into columns."""
+
+    _columns: ChoiceColumns
+    """The collected choices."""
+
+    _course_name: str | None
+    """The name of the course, or None if nothing has been written yet."""
+
+    def __init__(self, output_directory: str) -> None:
+        """Initialize the writer.
+
+        Args:
+            output_directory (str): The directory where the reports are saved.
+        """
+
+        super().__init__(output_directory)
+        self._columns = ChoiceColumns()
+        self._course_name = None
+
+    def write(self, course_activity: MoodleCourseActivity, report: Report) -> None:
+        """Collect the choices of a choice activity.
+
+        Args:
+            course_activity (MoodleCourseActivity): The choice activity with its course and section.
+            report (Report): The report of the activity.
+        """
+
+        self._course_name = course_activity.course_name
+        self._columns.append(course_activity, report)
+
+    def close(self) -> None:
+        """Save the collected choices, if any."""
+
+        if self._course_name is None:
+            return
+
+        try:
+            self._save(self._columns.to_frame())
+        except (OSError, ValueError) as e:
+            raise SerializeReportError(f'Error of creating report "{e}".')
+
+    @abstractmethod
+    def _save(self, df_choices: "pd.DataFrame") -> None:
+        pass
+
+
+class WorkbookReportWriter(_ColumnarReportWriter):
+    """Writer saving the whole course into a single workbook.
+
+    Every group gets its own sheet with a row per student and a column per choice activity.
+    """
+
+    def _save(self, df_choices: "pd.DataFrame") -> None:
+        import pandas as pd
+
+        df_choices["activity"] = (
+            df_choices["section_name"] + ". " + df_choices["activity_name"]
+        )
+        activities = list(dict.fromkeys(df_choices["activity"]))
+
+        filename = path.join(self._output_directory, f"{self._course_name}.xlsx")
+        with pd.ExcelWriter(filename, engine="openpyxl", mode="w") as writer:
+            for group, df_group in df_choices.groupby("group", sort=False):
+                # Namesakes and several answers of a student are numbered, so they get their own
+                # rows instead of being merged, and the empty answers stay as blank cells
+                df_group = df_group.assign(
+                    row=df_group.groupby(["activity", "fullname"]).cumcount()
+                )
+                df_sheet = df_group.pivot(
+                    index=["fullname", "row"], columns="activity", values="subject"
+                )
+                df_sheet = df_sheet.reindex(
+                    columns=[name for name in activities if name in df_sheet.columns]
+                )
+                df_sheet = df_sheet.sort_index(
+                    key=lambda level: (
+                        level.map(collation_key) if level.name == "fullname" else level
+                    )
+                ).droplevel("row")
+                df_sheet.index.name = "ФИО"
+                df_sheet.columns.name = None
+                df_sheet.to_excel(writer, sheet_name=str(group))
+
+
+class CsvReportWriter(_ColumnarReportWriter):
+    """Writer saving the choices of the whole course into a CSV file per group."""
+
+    def _save(self, df_choices: "pd.DataFrame") -> None:
+        for group, df_group in df_choices.groupby("group", sort=False):
+            df_group.drop(columns="group").to_csv(
+                path.join(self._output_directory, f"{group}.csv"), index=False
+            )
+
+
+class ParquetReportWriter(_ColumnarReportWriter):
+    """Writer saving the choices of the whole course into a Parquet dataset partitioned by group.
+
+    Requires the pyarrow package.
+    """
+
+    def __init__(self, output_directory: str) -> None:
+        """Initialize the writer.
+
+        Args:
+            output_directory (str): The directory where the reports are saved.
+
+        Raises:
+            SerializeReportError: If the pyarrow package isn't installed.
+        """
+
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SerializeReportError(
+                "Writing Parquet requires the pyarrow package to be installed."
+            )
+
+        super().__init__(output_directory)
+
+    def _save(self, df_choices: "pd.DataFrame") -> None:
+        df_choices.to_parquet(
+            path.join(self._output_directory, f"{self._course_name}.parquet"),
+            index=False,
+            partition_cols=["group"],
+        )
+
+
+class JsonLinesReportWriter(ReportWriter):
+    """Writer streaming the choices of the whole course into a JSON Lines file."""
+
+    _file: IO[str] | None
+    """The opened file, or None if nothing has been written yet."""
+
+    def __init__(self, output_directory: str) -> None:
+        """Initialize the writer.
+
+        Args:
+            output_directory (str): The directory where the reports are saved.
+        """
+
+        super().__init__(output_directory)
+        self._file = None
+
+    def write(self, course_activity: MoodleCourseActivity, report: Report) -> None:
+        """Append the choices of a choice activity to the file.
+
+        Args:
+            course_activity (MoodleCourseActivity): The choice activity with its course and section.
+            report (Report): The report of the activity.
+        """
+
+        if not self._file:
+            filename = path.join(
+                self._output_directory, f"{course_activity.course_name}.jsonl"
+            )
+            self._file = open(filename, "w", encoding="utf-8")
+
+        activity_values = {
+            "course_id": course_activity.course_id,
+            "course_name": course_activity.course_name,
+            "section_name": course_activity.section_name,
+            "activity_id": course_activity.activity.id,
+            "activity_name": course_activity.activity.name,
+        }
+
+        self._file.writelines(
+            json.dumps(
+                {
+                    **activity_values,
+                    "group": str(group),
+                    "fullname": student.fullname,
+                    "subject": student.subject,
+                },
+                ensure_ascii=False,
+            )
+            + "\n"
+            for group, students in report.groups.items()
+            for student in students
+        )
+
+    def close(self) -> None:
+        """Close the file."""
+
+        if self._file:
+            self._file.close()
+            self._file = None
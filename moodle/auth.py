@@ -1,13 +1,22 @@
 from dataclasses import dataclass
-from moodle.constants import MOODLE_BASE_ADDRESS, MOODLE_SESSION_COOKIE_NAME
+from moodle.constants import (
+    MOODLE_BASE_ADDRESS,
+    MOODLE_SESSION_COOKIE_NAME,
+    MOODLE_WEB_SERVICE_NAME,
+    MOODLE_WEB_SERVICE_TOKEN_PATH,
+)
 from moodle.exceptions import (
     CorruptedSessionError,
     OpeningSessionFileError,
     IncorrectCredentialsError,
     SavingSessionFileError,
 )
+from moodle.tracing import RequestTracer
 from aiohttp import ClientSession
 from aiofiles import open
+from enum import Enum
+from typing import Any, Awaitable, Callable, Sequence
+import asyncio
 import re
 import json
 
@@ -36,20 +45,74 @@ class MoodleCachedSession:
     moodle_session_cookie: str
     """The cookie string used to maintain the Moodle session."""
 
+    validated_at: float | None = None
+    """The UNIX time of the last successful validation of the session, or None if it was never validated."""
+
+    lifetime: float | None = None
+    """The time in seconds the session was observed to stay valid after the validation, or None if unknown."""
+
+
+class SessionBalancing(Enum):
+    """Enumeration of the strategies spreading the requests across the accounts of a session pool."""
+
+    ROUND_ROBIN = "round-robin"
+    """Strategy sending the requests on behalf of the accounts in turn."""
+
+    LEAST_LOADED = "least-loaded"
+    """Strategy sending every request on behalf of the account with the fewest requests in flight."""
+
+
+@dataclass(frozen=True)
+class MoodleSessionPool:
+    """Class to store the cached sessions of several Moodle accounts the requests are spread across.
+
+    Moodle locks the session for the duration of every request, so the requests sent with the same cookie
+    are processed one by one, while the requests of different sessions are processed in parallel.
+    """
+
+    sessions: Sequence[MoodleCachedSession]
+    """The cached sessions of the accounts."""
+
+    balancing: SessionBalancing = SessionBalancing.LEAST_LOADED
+    """The strategy spreading the requests across the accounts."""
 
-async def authorize(credentials: MoodleCredentials) -> MoodleCachedSession:
+
+SessionRenewer = Callable[[MoodleCachedSession], Awaitable[MoodleCachedSession | None]]
+"""A function signing in again when the session expires, returning the new session or None to give up."""
+
+
+@dataclass(frozen=True)
+class MoodleWebServiceToken:
+    """Class to store a Moodle Web Services token."""
+
+    login: str
+    """The login username the token was issued for."""
+
+    token: str
+    """The token used to authenticate the Web Services requests."""
+
+
+async def authorize(
+    credentials: MoodleCredentials,
+    base_address: str = MOODLE_BASE_ADDRESS,
+    tracer: RequestTracer | None = None,
+) -> MoodleCachedSession:
     """Authorize the user and create a new Moodle session.
 
     Args:
         credentials (MoodleCredentials): The login credentials for Moodle.
+        base_address (str, optional): Base URL of the Moodle instance. Defaults to MOODLE_BASE_ADDRESS.
+        tracer (RequestTracer, optional): The tracer collecting the timings of the requests. Defaults to None.
 
     Returns:
         MoodleCachedSession: An authenticated Moodle session.
     """
 
-    auth_preparation_endpoint = f"{MOODLE_BASE_ADDRESS}/login/index.php"
+    auth_preparation_endpoint = f"{base_address}/login/index.php"
 
-    async with ClientSession() as session:
+    async with ClientSession(
+        trace_configs=[tracer.trace_config] if tracer else None
+    ) as session:
         async with session.get(auth_preparation_endpoint) as auth_preparation_response:
             login_token = _get_auth_preparation_token(
                 await auth_preparation_response.text()
@@ -63,7 +126,7 @@ async def authorize(credentials: MoodleCredentials) -> MoodleCachedSession:
 
         try:
             async with await session.post(
-                f"{MOODLE_BASE_ADDRESS}/login/index.php", data=data
+                f"{base_address}/login/index.php", data=data
             ) as auth_response:
                 text = await auth_response.text()
         except Exception:
@@ -82,9 +145,88 @@ async def authorize(credentials: MoodleCredentials) -> MoodleCachedSession:
         return cached_session
 
 
+async def authorize_many(
+    credentials: MoodleCredentials,
+    count: int,
+    base_address: str = MOODLE_BASE_ADDRESS,
+    tracer: RequestTracer | None = None,
+) -> Sequence[MoodleCachedSession]:
+    """Authorize the user several times to create independent Moodle sessions of the same account.
+
+    Moodle locks the session for the duration of every request, so the requests sent with one cookie are
+    processed one by one. Requests of the independent sessions are processed in parallel.
+    Moodle may limit the number of concurrent sessions of a user, terminating the oldest ones.
+
+    Args:
+        credentials (MoodleCredentials): The login credentials for Moodle.
+        count (int): The number of sessions to create.
+        base_address (str, optional): Base URL of the Moodle instance. Defaults to MOODLE_BASE_ADDRESS.
+        tracer (RequestTracer, optional): The tracer collecting the timings of the requests. Defaults to None.
+
+    Returns:
+        Sequence[MoodleCachedSession]: The authenticated Moodle sessions.
+    """
+
+    return await asyncio.gather(
+        *(authorize(credentials, base_address, tracer) for _ in range(count))
+    )
+
+
+async def authorize_web_service(
+    credentials: MoodleCredentials,
+    service: str = MOODLE_WEB_SERVICE_NAME,
+    base_address: str = MOODLE_BASE_ADDRESS,
+    tracer: RequestTracer | None = None,
+) -> MoodleWebServiceToken:
+    """Authorize the user and request a new Moodle Web Services token.
+
+    Args:
+        credentials (MoodleCredentials): The login credentials for Moodle.
+        service (str, optional): The name of the external service. Defaults to MOODLE_WEB_SERVICE_NAME.
+        base_address (str, optional): Base URL of the Moodle instance. Defaults to MOODLE_BASE_ADDRESS.
+        tracer (RequestTracer, optional): The tracer collecting the timings of the requests. Defaults to None.
+
+    Returns:
+        MoodleWebServiceToken: A token for the Moodle Web Services.
+    """
+
+    token_endpoint = f"{base_address}{MOODLE_WEB_SERVICE_TOKEN_PATH}"
+    data = {
+        "username": credentials.login,
+        "password": credentials.password,
+        "service": service,
+    }
+
+    try:
+        async with ClientSession(
+            trace_configs=[tracer.trace_config] if tracer else None
+        ) as session:
+            async with session.post(token_endpoint, data=data) as token_response:
+                token_json = await token_response.json(content_type=None)
+    except Exception:
+        raise ConnectionError(
+            f'Unable to connect to the endpoint "{token_endpoint}". Check the internet connection.'
+        )
+
+    # Moodle reports the errors as a JSON object too, anything else isn't a token endpoint response
+    if not isinstance(token_json, dict):
+        raise ConnectionError(
+            f'Unexpected response of the endpoint "{token_endpoint}". Check the base address of Moodle.'
+        )
+
+    if "token" not in token_json:
+        raise IncorrectCredentialsError(
+            "Invald credentials. Check login and password correctness."
+        )
+
+    return MoodleWebServiceToken(credentials.login, token_json["token"])
+
+
 async def restore_session(filename: str) -> MoodleCachedSession:
     """Restore a Moodle session from a cached session file.
 
+    If the file contains the sessions of several accounts, the first one is restored.
+
     Args:
         filename (str): The path to the file containing the cached session.
 
@@ -92,36 +234,71 @@ async def restore_session(filename: str) -> MoodleCachedSession:
         MoodleCachedSession: An authenticated Moodle session.
     """
 
+    return (await restore_sessions(filename))[0]
+
+
+async def restore_sessions(filename: str) -> Sequence[MoodleCachedSession]:
+    """Restore the Moodle sessions of all accounts from a cached session file.
+
+    Args:
+        filename (str): The path to the file containing the cached sessions.
+
+    Returns:
+        Sequence[MoodleCachedSession]: The authenticated Moodle sessions, the first one is the main account.
+    """
+
     try:
         async with open(filename, "r") as file:
             auth_json = json.loads(await file.read())
     except Exception:
         raise OpeningSessionFileError("Unable to open session file.")
 
-    try:
-        login = auth_json["login"]
-        session_key = auth_json["session_key"]
-        moodle_session_cookie = auth_json["moodle_session_cookie"]
-    except Exception:
+    # Files saved by the previous versions contain a single session
+    sessions_json = (
+        auth_json.get("sessions")
+        if isinstance(auth_json, dict) and "sessions" in auth_json
+        else [auth_json]
+    )
+    if not isinstance(sessions_json, list) or not sessions_json:
         raise CorruptedSessionError("Session is corrupted.")
 
-    cached_session = MoodleCachedSession(login, session_key, moodle_session_cookie)
-    return cached_session
+    return [_parse_session(session_json) for session_json in sessions_json]
 
 
 async def serialize_session(filename: str, session: MoodleCachedSession) -> None:
-    """Read session from a cached session file.
+    """Save session to a cached session file.
+
+    If the file contains the sessions of several accounts, only the first one is replaced.
 
     Args:
         filename (str): The path to the file containing the cached session.
         session (MoodleCachedSession): A cached Moodle session.
     """
 
-    auth_info = {
-        "login": session.login,
-        "session_key": session.session_key,
-        "moodle_session_cookie": session.moodle_session_cookie,
-    }
+    try:
+        sessions = await restore_sessions(filename)
+    except (OpeningSessionFileError, CorruptedSessionError):
+        sessions = []
+
+    await serialize_sessions(filename, [session, *sessions[1:]])
+
+
+async def serialize_sessions(
+    filename: str, sessions: Sequence[MoodleCachedSession]
+) -> None:
+    """Save the sessions of all accounts to a cached session file.
+
+    Args:
+        filename (str): The path to the file containing the cached sessions.
+        sessions (Sequence[MoodleCachedSession]): The cached Moodle sessions, the first one is the main account.
+    """
+
+    sessions_json = [_dump_session(session) for session in sessions]
+
+    # Single session is saved in the format readable by the previous versions
+    auth_info = (
+        sessions_json[0] if len(sessions_json) == 1 else {"sessions": sessions_json}
+    )
     try:
         async with open(filename, "w") as file:
             json_object = json.dumps(auth_info, indent=4)
@@ -130,6 +307,35 @@ async def serialize_session(filename: str, session: MoodleCachedSession) -> None
         raise SavingSessionFileError("Unable to save session file.")
 
 
+def _parse_session(auth_json: Any) -> MoodleCachedSession:
+    try:
+        login = auth_json["login"]
+        session_key = auth_json["session_key"]
+        moodle_session_cookie = auth_json["moodle_session_cookie"]
+
+        # Validation info is missing in the files saved by the previous versions
+        validated_at = auth_json.get("validated_at")
+        lifetime = auth_json.get("lifetime")
+        validated_at = float(validated_at) if validated_at is not None else None
+        lifetime = float(lifetime) if lifetime is not None else None
+    except Exception:
+        raise CorruptedSessionError("Session is corrupted.")
+
+    return MoodleCachedSession(
+        login, session_key, moodle_session_cookie, validated_at, lifetime
+    )
+
+
+def _dump_session(session: MoodleCachedSession) -> dict[str, Any]:
+    return {
+        "login": session.login,
+        "session_key": session.session_key,
+        "moodle_session_cookie": session.moodle_session_cookie,
+        "validated_at": session.validated_at,
+        "lifetime": session.lifetime,
+    }
+
+
 def _get_api_token_key(html: str) -> str:
     match = re.search(r'<(?:.*?)name="sesskey"(?:.*?)value="(.*?)">', html)
 
@@ -0,0 +1,127 @@
+from moodle.models import (
+    MoodleAttemptReview,
+    MoodleAttemptStatus,
+    MoodleCourse,
+    MoodleCourseActivity,
+    MoodleQuizAttempt,
+)
+from moodle.progress import ProgressHandlerFactory
+from typing import TYPE_CHECKING, AsyncIterable, Protocol, Self, Sequence
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class MoodleBackend(Protocol):
+    """Protocol of the sessions retrieving the course data from Moodle."""
+
+    async def is_valid(self) -> bool:
+        """Check if the current session is still valid.
+
+        Returns:
+            bool: True if the session is valid, False otherwise.
+        """
+
+        ...
+
+    async def get_course(self, course_id: str | int) -> MoodleCourse:
+        """Retrieve information about a specific Moodle course.
+
+        Args:
+            course_id (str | int): The course ID or a URL string containing the course ID.
+
+        Returns:
+            MoodleCourse: An object representing the Moodle course.
+        """
+
+        ...
+
+    def iter_course_activities(
+        self, course_id: str | int
+    ) -> AsyncIterable[MoodleCourseActivity]:
+        """Retrieve the activities of a specific Moodle course one by one.
+
+        Args:
+            course_id (str | int): The course ID or a URL string containing the course ID.
+
+        Yields:
+            AsyncIterable[MoodleCourseActivity]: An asynchronous iterable of the course activities.
+        """
+
+        ...
+
+    async def get_excel_report(
+        self,
+        report_id: str | int,
+        progress_factory: ProgressHandlerFactory[int] | None = None,
+    ) -> "pd.DataFrame":
+        """Retrieve a report of a choice activity.
+
+        Args:
+            report_id (str | int): The ID or URL of the choice activity.
+            progress_factory (ProgressHandlerFactory[int], optional): Factory to create a progress handler of the downloaded bytes. Defaults to None.
+
+        Returns:
+            pd.DataFrame: A DataFrame containing the report data formatted for Excel.
+        """
+
+        ...
+
+    def get_quiz_attempts(
+        self,
+        quiz_id: str | int,
+        query: MoodleAttemptStatus | None = None,
+        progress_factory: ProgressHandlerFactory[int] | None = None,
+        page_size: int = 30,
+    ) -> AsyncIterable[Sequence[MoodleQuizAttempt]]:
+        """Retrieve quiz attempts for a given quiz ID, optionally filtered by status.
+
+        Args:
+            quiz_id (str | int): The ID or URL of the quiz.
+            query (MoodleAttemptStatus, optional): The status filter for the quiz attempts. Defaults to FINISHED.
+            progress_factory (ProgressHandlerFactory[int], optional): Factory to create a progress handler to track the progress of fetching attempts. Defaults to None.
+            page_size (int, optional): The number of attempts to fetch per page. Defaults to 30.
+
+        Yields:
+            AsyncIterable[Sequence[MoodleQuizAttempt]]: An asynchronous iterable of sequences of MoodleQuizAttempt.
+        """
+
+        ...
+
+    def iter_attempt_reviews(
+        self,
+        attempt_ids: Sequence[str | int],
+        progress_factory: ProgressHandlerFactory[int] | None = None,
+        max_in_flight: int | None = None,
+    ) -> AsyncIterable[MoodleAttemptReview]:
+        """Retrieve the answers given in quiz attempts concurrently.
+
+        Args:
+            attempt_ids (Sequence[str | int]): The IDs or review URLs of the quiz attempts.
+            progress_factory (ProgressHandlerFactory[int], optional): Factory to create a progress handler counting the retrieved attempts. Defaults to None.
+            max_in_flight (int, optional): The maximum number of attempts requested but not yet yielded. Defaults to the concurrency limit of the session.
+
+        Yields:
+            AsyncIterable[MoodleAttemptReview]: An asynchronous iterable of the attempt reviews in the order they are retrieved.
+        """
+
+        ...
+
+    async def close(self) -> None:
+        """Close the current session."""
+
+        ...
+
+    async def __aenter__(self) -> Self:
+        """Enter the asynchronous context manager.
+
+        Returns:
+            Self: The current instance of the session.
+        """
+
+        ...
+
+    async def __aexit__(self, *_) -> None:
+        """Exit the asynchronous context manager and close the session."""
+
+        ...
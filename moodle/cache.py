@@ -0,0 +1,178 @@
+from dataclasses import dataclass
+from moodle.models import (
+    ChoiceMoodleActivity,
+    LazyMoodleCourse,
+    MoodleActivity,
+    MoodleCourse,
+    MoodleSection,
+    QuizMoodleActivity,
+)
+from aiofiles import open
+from typing import Any, Mapping
+import hashlib
+import json
+import os
+import re
+
+
+_CACHE_FORMAT_VERSION = 1
+"""Version of the cache file format. Files of other versions are treated as missing."""
+
+_COURSE_FINGERPRINT_PATTERN = re.compile(
+    r'id="section-[^"]*"|data-id="\d+"|data-activityname="[^"]*"'
+    r'|href="[^"]*/(?:course/view\.php\?id=\d+"|mod/\w+/)|title="[^"]*"|<h3[^>]*>.*?</h3>',
+    re.S,
+)
+"""Regex pattern matching every part of the course page the course parser depends on."""
+
+_ACTIVITY_TYPES: Mapping[str, type[MoodleActivity]] = {
+    "choice": ChoiceMoodleActivity,
+    "quiz": QuizMoodleActivity,
+    "activity": MoodleActivity,
+}
+"""Mapping of the serialized activity type names to the activity classes."""
+
+
+@dataclass(frozen=True)
+class CachedMoodleCourse:
+    """Class to represent a Moodle course structure stored in the cache."""
+
+    fingerprint: str
+    """The fingerprint of the course page the course was parsed from."""
+
+    course: MoodleCourse
+    """The parsed Moodle course."""
+
+
+class CourseCache:
+    """Class to store parsed Moodle courses on disk, keyed by course ID."""
+
+    _directory: str
+    """The directory where the cache files are stored."""
+
+    def __init__(self, directory: str) -> None:
+        """Initialize the course cache.
+
+        Args:
+            directory (str): The directory where the cache files are stored. It is created on the first write.
+        """
+
+        self._directory = directory
+
+    @staticmethod
+    def fingerprint(course_html: str) -> str:
+        """Calculate a fingerprint of the course page structure.
+
+        Only the parts of the page which affect the parsed course are taken into account, so the fingerprint
+        stays the same between sessions, while a single regex pass is much cheaper than the full parse.
+
+        Args:
+            course_html (str): The HTML content of the course page.
+
+        Returns:
+            str: The hex digest of the course page structure.
+        """
+
+        digest = hashlib.sha1()
+        for match in _COURSE_FINGERPRINT_PATTERN.finditer(course_html):
+            digest.update(match[0].encode())
+            digest.update(b"\0")
+
+        return digest.hexdigest()
+
+    async def load(self, course_id: int) -> CachedMoodleCourse | None:
+        """Load a course from the cache.
+
+        Args:
+            course_id (int): The ID of the course.
+
+        Returns:
+            CachedMoodleCourse | None: The cached course, or None if it is missing or corrupted.
+        """
+
+        try:
+            async with open(self.__get_filename(course_id), "r") as file:
+                cache_json = json.loads(await file.read())
+
+            if cache_json["version"] != _CACHE_FORMAT_VERSION:
+                return None
+
+            return CachedMoodleCourse(
+                cache_json["fingerprint"], _course_from_json(cache_json["course"])
+            )
+        except Exception:
+            # Cache is only an optimization, so broken files are the same as missing ones
+            return None
+
+    async def store(self, fingerprint: str, course: MoodleCourse) -> None:
+        """Store a course in the cache.
+
+        A lazy course is stored only if all its sections have been parsed, since serializing it would
+        parse the rest of the page.
+
+        Args:
+            fingerprint (str): The fingerprint of the course page the course was parsed from.
+            course (MoodleCourse): The parsed Moodle course.
+        """
+
+        if isinstance(course, LazyMoodleCourse) and not course.is_parsed:
+            return
+
+        cache_json = {
+            "version": _CACHE_FORMAT_VERSION,
+            "fingerprint": fingerprint,
+            "course": _course_to_json(course),
+        }
+
+        try:
+            os.makedirs(self._directory, exist_ok=True)
+            async with open(self.__get_filename(course.id), "w") as file:
+                await file.write(json.dumps(cache_json, ensure_ascii=False))
+        except Exception:
+            # Unable to save cache. The course will be parsed again on the next run.
+            pass
+
+    def __get_filename(self, course_id: int) -> str:
+        return os.path.join(self._directory, f"course-{course_id}.json")
+
+
+def _course_to_json(course: MoodleCourse) -> Mapping[str, Any]:
+    activity_types = {cls: name for name, cls in _ACTIVITY_TYPES.items()}
+
+    return {
+        "id": course.id,
+        "name": course.name,
+        "sections": [
+            {
+                "id": section.id,
+                "name": section.name,
+                "activities": [
+                    {
+                        "id": activity.id,
+                        "name": activity.name,
+                        "type": activity_types[type(activity)],
+                    }
+                    for activity in section.activities
+                ],
+            }
+            for section in course.sections
+        ],
+    }
+
+
+def _course_from_json(course_json: Mapping[str, Any]) -> MoodleCourse:
+    sections = [
+        MoodleSection(
+            section_json["id"],
+            section_json["name"],
+            [
+                _ACTIVITY_TYPES[activity_json["type"]](
+                    activity_json["id"], activity_json["name"]
+                )
+                for activity_json in section_json["activities"]
+            ],
+        )
+        for section_json in course_json["sections"]
+    ]
+
+    return MoodleCourse(course_json["id"], course_json["name"], sections)
@@ -0,0 +1,220 @@
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from typing import Any, Mapping
+import asyncio
+import base64
+import gzip
+import json
+
+
+_CASSETTE_FORMAT_VERSION = 1
+"""Version of the cassette file format."""
+
+_SESSION_KEY_PLACEHOLDER = "SESSKEY"
+"""Value replacing the session key in the recorded requests and responses."""
+
+_SCRUBBED_PARAMS = frozenset(["sesskey", "logintoken", "password", "wstoken"])
+"""Names of the request parameters whose values are never written to the cassette."""
+
+
+@dataclass(frozen=True)
+class MoodleResponse:
+    """Class to represent a response of Moodle read completely into memory."""
+
+    url: str
+    """The final URL of the response after following the redirects."""
+
+    status: int
+    """The HTTP status code of the response."""
+
+    content_type: str
+    """The content type of the response."""
+
+    charset: str
+    """The charset of the response body."""
+
+    body: bytes
+    """The body of the response."""
+
+    def text(self) -> str:
+        """Decode the response body.
+
+        Returns:
+            str: The decoded response body.
+        """
+
+        return self.body.decode(self.charset, errors="replace")
+
+
+class CassetteRecorder:
+    """Class to record the request/response pairs of a Moodle session into a compressed cassette file.
+
+    Session keys, login tokens and passwords are scrubbed from the requests and the textual responses.
+    Cookies are never recorded.
+    """
+
+    _filename: str
+    """The path to the cassette file."""
+
+    _interactions: list[Mapping[str, Any]]
+    """The recorded interactions in the order they were completed."""
+
+    def __init__(self, filename: str) -> None:
+        """Initialize the cassette recorder.
+
+        Args:
+            filename (str): The path to the cassette file written by `save`.
+        """
+
+        self._filename = filename
+        self._interactions = []
+
+    def record(
+        self,
+        method: str,
+        url: str,
+        params: Mapping[str, Any] | None,
+        data: Mapping[str, Any] | None,
+        response: MoodleResponse,
+        elapsed: float,
+        session_key: str,
+    ) -> None:
+        """Record a request/response pair.
+
+        Args:
+            method (str): The HTTP method of the request.
+            url (str): The relative URL of the request.
+            params (Mapping[str, Any] | None): The query parameters of the request.
+            data (Mapping[str, Any] | None): The form data of the request.
+            response (MoodleResponse): The response.
+            elapsed (float): The time spent on the request, in seconds.
+            session_key (str): The session key to scrub from the response.
+        """
+
+        body = response.body
+        if session_key and _is_textual(response.content_type):
+            body = body.replace(session_key.encode(), _SESSION_KEY_PLACEHOLDER.encode())
+
+        self._interactions.append(
+            {
+                "key": _get_interaction_key(method, url, params, data),
+                "url": (
+                    response.url.replace(session_key, _SESSION_KEY_PLACEHOLDER)
+                    if session_key
+                    else response.url
+                ),
+                "status": response.status,
+                "content_type": response.content_type,
+                "charset": response.charset,
+                "elapsed": elapsed,
+                "body": base64.b64encode(body).decode(),
+            }
+        )
+
+    def save(self) -> None:
+        """Write the recorded interactions to the cassette file."""
+
+        with gzip.open(self._filename, "wt", encoding="utf-8") as file:
+            file.write(json.dumps({"version": _CASSETTE_FORMAT_VERSION}) + "\n")
+            for interaction in self._interactions:
+                file.write(json.dumps(interaction, ensure_ascii=False) + "\n")
+
+
+class CassettePlayer:
+    """Class to serve the responses of a Moodle session from a cassette file instead of the network.
+
+    Identical requests are served in the order they were recorded, and the last response is repeated
+    once they are exhausted.
+    """
+
+    _responses: Mapping[str, deque[tuple[MoodleResponse, float]]]
+    """The recorded responses with their latencies, keyed by the request."""
+
+    _realtime: bool
+    """Whether the recorded latency is reproduced."""
+
+    def __init__(self, filename: str, realtime: bool = False) -> None:
+        """Initialize the cassette player.
+
+        Args:
+            filename (str): The path to the cassette file.
+            realtime (bool, optional): Reproduce the recorded latency of every response. Defaults to False.
+
+        Raises:
+            ValueError: If the cassette file is of an unsupported version.
+        """
+
+        responses = defaultdict(deque)
+        with gzip.open(filename, "rt", encoding="utf-8") as file:
+            header = json.loads(file.readline())
+            if header.get("version") != _CASSETTE_FORMAT_VERSION:
+                raise ValueError("Unsupported cassette file version.")
+
+            for line in file:
+                interaction = json.loads(line)
+                response = MoodleResponse(
+                    interaction["url"],
+                    interaction["status"],
+                    interaction["content_type"],
+                    interaction["charset"],
+                    base64.b64decode(interaction["body"]),
+                )
+                responses[interaction["key"]].append((response, interaction["elapsed"]))
+
+        self._responses = responses
+        self._realtime = realtime
+
+    async def play(
+        self,
+        method: str,
+        url: str,
+        params: Mapping[str, Any] | None,
+        data: Mapping[str, Any] | None,
+    ) -> MoodleResponse:
+        """Serve the recorded response of the request.
+
+        Args:
+            method (str): The HTTP method of the request.
+            url (str): The relative URL of the request.
+            params (Mapping[str, Any] | None): The query parameters of the request.
+            data (Mapping[str, Any] | None): The form data of the request.
+
+        Returns:
+            MoodleResponse: The recorded response.
+
+        Raises:
+            ConnectionError: If the request wasn't recorded.
+        """
+
+        key = _get_interaction_key(method, url, params, data)
+        recorded = self._responses.get(key)
+        if not recorded:
+            raise ConnectionError(f'Request "{key}" is missing in the cassette.')
+
+        response, elapsed = recorded.popleft() if len(recorded) > 1 else recorded[0]
+        if self._realtime:
+            await asyncio.sleep(elapsed)
+
+        return response
+
+
+def _get_interaction_key(
+    method: str,
+    url: str,
+    params: Mapping[str, Any] | None,
+    data: Mapping[str, Any] | None,
+) -> str:
+    def _scrub(values: Mapping[str, Any] | None) -> list[tuple[str, str]]:
+        return sorted(
+            (
+                str(name),
+                _SESSION_KEY_PLACEHOLDER if name in _SCRUBBED_PARAMS else str(value),
+            )
+            for name, value in (values or {}).items()
+        )
+
+    return json.dumps([method.upper(), url, _scrub(params), _scrub(data)])
+
+
+def _is_textual(content_type: str) -> bool:
+    return content_type.startswith("text/") or "json" in content_type
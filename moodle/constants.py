@@ -15,3 +15,21 @@ MOODLE_QUIZ_ACTIVITY_PATH = "/mod/quiz"
 
 MOODLE_SESSION_COOKIE_NAME = "MoodleSession"
 """Constant defining the name of the Moodle session cookie. """
+
+MOODLE_AJAX_SERVICE_PATH = "/lib/ajax/service.php"
+"""Path to the AJAX endpoint of the Moodle external functions called by the pages of a signed in user."""
+
+MOODLE_SESSION_TRUST_WINDOW = 15 * 60
+"""Time in seconds after a successful validation during which a session is considered valid without checking it."""
+
+MOODLE_DEFAULT_MAX_CONCURRENCY = 8
+"""Default maximum number of requests sent concurrently through one Moodle session."""
+
+MOODLE_WEB_SERVICE_PATH = "/webservice/rest/server.php"
+"""Path to the REST endpoint of the Moodle Web Services."""
+
+MOODLE_WEB_SERVICE_TOKEN_PATH = "/login/token.php"
+"""Path to the endpoint issuing the Moodle Web Services tokens."""
+
+MOODLE_WEB_SERVICE_NAME = "moodle_mobile_app"
+"""Name of the Moodle external service the Web Services tokens are requested for."""
@@ -26,3 +26,13 @@ class CorruptedSessionError(Exception):
 class CorruptedHtmlError(Exception):
     def __init__(self, message) -> None:
         super().__init__(message)
+
+
+class WebServiceError(Exception):
+    def __init__(self, message) -> None:
+        super().__init__(message)
+
+
+class SessionExpiredError(Exception):
+    def __init__(self, message) -> None:
+        super().__init__(message)
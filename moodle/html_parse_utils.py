@@ -1,10 +1,20 @@
+from bisect import bisect_left
 from collections import deque
 from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from html import unescape
 from moodle.exceptions import CorruptedHtmlError
-from typing import Iterable, Mapping
+from typing import Iterable, Mapping, NamedTuple
 import re
 
 
+_ATTRIBUTE_PATTERN = re.compile(r'([^\s]*?)="(.*?)"', re.S)
+"""Regex pattern to extract the attributes and their values from the head of a tag."""
+
+_ANY_TAG_PATTERN = re.compile(r"<[^>]*>")
+"""Regex pattern to match any open, close or one-liner tag."""
+
+
 @dataclass(frozen=True)
 class HtmlTag:
     """Represents an HTML tag with its attributes and inner text."""
@@ -70,7 +80,7 @@ def enumerate_tag_by_name(html: str, name: str) -> Iterable[HtmlTag]:
             yield HtmlTag(name, attributes, inner_text)
             continue
 
-        attributes = __parse_tag_attributes(tag[1])
+        attributes = _parse_tag_attributes(tag[1])
 
         if is_one_liner:
             yield HtmlTag(name, attributes, None)
@@ -83,6 +93,215 @@ def enumerate_tag_by_name(html: str, name: str) -> Iterable[HtmlTag]:
         raise CorruptedHtmlError(f'Found unpaired open tag in position "{tag_pos}".')
 
 
-def __parse_tag_attributes(raw_attributes: str) -> Mapping[str, str]:
-    ATTRIBUTE_PATTERN = re.compile(r'([^\s]*?)="(.*?)"', re.S)
-    return {m[1]: m[2] for m in ATTRIBUTE_PATTERN.finditer(raw_attributes)}
+def strip_tags(html: str) -> str:
+    """Convert an HTML fragment into plain text.
+
+    Args:
+        html (str): The HTML fragment.
+
+    Returns:
+        str: The text of the fragment without tags, with unescaped entities and collapsed whitespace.
+    """
+
+    return " ".join(unescape(_ANY_TAG_PATTERN.sub(" ", html)).split())
+
+
+class IndexedHtmlTag(HtmlTag):
+    """Represents an HTML tag of an indexed HTML document.
+
+    Attributes and inner text are extracted from the document on first access, and nested tags are looked up
+    in the document index instead of rescanning the inner text.
+    """
+
+    _document: "IndexedHtml"
+    """The indexed HTML document the tag belongs to."""
+
+    _span: "_TagSpan"
+    """The position of the tag in the document."""
+
+    def __init__(self, document: "IndexedHtml", name: str, span: "_TagSpan") -> None:
+        """Initialize the tag of an indexed HTML document.
+
+        Args:
+            document (IndexedHtml): The indexed HTML document the tag belongs to.
+            name (str): The name of the HTML tag.
+            span (_TagSpan): The position of the tag in the document.
+        """
+
+        # Bypass the frozen dataclass guard, the tag is immutable once created
+        self.__dict__.update(name=name, _document=document, _span=span)
+
+    @cached_property
+    def attributes(self) -> Mapping[str, str]:
+        """A dictionary of the tag's attributes and their values."""
+
+        return _parse_tag_attributes(self._span.raw_attributes)
+
+    @cached_property
+    def inner_text(self) -> str | None:
+        """The inner text contained within the HTML tag, if any."""
+
+        if self._span.inner_end is None:
+            return None
+
+        return self._document.html[self._span.inner_start : self._span.inner_end]
+
+    def enumerate_tag_by_name(self, name: str) -> Iterable[HtmlTag]:
+        """Enumerates nested HTML tags by name and yields HtmlTag objects.
+
+        Args:
+            name (str): The name of the HTML tag to search for.
+
+        Yields:
+            HtmlTag: An HtmlTag object representing a found tag with its attributes and inner text.
+
+        Raises:
+            CorruptedHtmlError: If an unpaired open or close tag is found.
+        """
+
+        if self._span.inner_end is None:
+            return ()
+
+        return self._document.enumerate_tag_by_name(
+            name, self._span.inner_start, self._span.inner_end
+        )
+
+
+class IndexedHtml:
+    """Represents an HTML document with the positions of its tags indexed by tag name.
+
+    A tag name is indexed when it is searched for in the whole document, and the following lookups of
+    the nested tags of that name are answered from the index with a binary search. Tags of not indexed
+    names are searched for only in the requested part of the document without copying it.
+    """
+
+    _html: str
+    """The HTML content of the document."""
+
+    _indexes: dict[str, "_TagIndex"]
+    """The indexes of the tag names searched for in the whole document."""
+
+    def __init__(self, html: str) -> None:
+        """Initialize the indexed HTML document.
+
+        Args:
+            html (str): The HTML content as a string.
+        """
+
+        self._html = html
+        self._indexes = {}
+
+    @property
+    def html(self) -> str:
+        """The HTML content of the document."""
+
+        return self._html
+
+    def enumerate_tag_by_name(
+        self, name: str, start: int = 0, end: int | None = None
+    ) -> Iterable[HtmlTag]:
+        """Enumerates HTML tags by name located between the positions and yields HtmlTag objects.
+
+        Tags are yielded in the same order as `enumerate_tag_by_name` does for the same part of the document.
+
+        Args:
+            name (str): The name of the HTML tag to search for.
+            start (int, optional): The position in the document to search from. Defaults to 0.
+            end (int, optional): The position in the document to search to. Defaults to the end of the document.
+
+        Yields:
+            HtmlTag: An HtmlTag object representing a found tag with its attributes and inner text.
+
+        Raises:
+            CorruptedHtmlError: If an unpaired open or close tag is found.
+        """
+
+        end = len(self._html) if end is None else end
+        index = self._indexes.get(name)
+
+        if index is None and (start, end) == (0, len(self._html)):
+            index = self._indexes[name] = _build_tag_index(self._html, name)
+
+        if index is None:
+            spans, error_position = _scan_tags(self._html, name, start, end)
+        else:
+            first = bisect_left(index.starts, start)
+            last = bisect_left(index.starts, end)
+            spans = sorted(
+                (span for span in index.spans[first:last] if span.end <= end),
+                key=lambda span: span.end,
+            )
+            error_position = index.error_position
+
+        for span in spans:
+            yield IndexedHtmlTag(self, name, span)
+
+        if error_position is not None and start <= error_position < end:
+            raise CorruptedHtmlError(
+                f'Found unpaired tag in position "{error_position}".'
+            )
+
+
+class _TagSpan(NamedTuple):
+    start: int
+    end: int
+    inner_start: int
+    inner_end: int | None
+    raw_attributes: str
+
+
+class _TagIndex(NamedTuple):
+    starts: list[int]
+    spans: list[_TagSpan]
+    error_position: int | None
+
+
+def _build_tag_index(html: str, name: str) -> _TagIndex:
+    spans, error_position = _scan_tags(html, name, 0, len(html))
+    spans = sorted(spans, key=lambda span: span.start)
+
+    return _TagIndex([span.start for span in spans], spans, error_position)
+
+
+def _scan_tags(
+    html: str, name: str, start: int, end: int
+) -> tuple[list[_TagSpan], int | None]:
+    tag_stack = deque()
+    spans = []
+    error_position = None
+
+    for tag in _get_tag_pattern(name).finditer(html, start, end):
+        is_close_tag = tag[1] is None
+        is_one_liner = tag[2] is not None
+        tag_start, tag_end = tag.span()
+
+        if is_close_tag:
+            if not tag_stack:
+                error_position = tag_start if error_position is None else error_position
+                continue
+
+            head_start, head_end, raw_attributes = tag_stack.pop()
+            spans.append(
+                _TagSpan(head_start, tag_end, head_end, tag_start, raw_attributes)
+            )
+            continue
+
+        if is_one_liner:
+            spans.append(_TagSpan(tag_start, tag_end, tag_end, None, tag[1]))
+            continue
+
+        tag_stack.append((tag_start, tag_end, tag[1]))
+
+    if tag_stack and error_position is None:
+        error_position, *_ = tag_stack[0]
+
+    return spans, error_position
+
+
+@lru_cache
+def _get_tag_pattern(name: str) -> re.Pattern[str]:
+    return re.compile(rf"(?:<\/{name}>)|(?:<{name}(.*?)(\/)?>)", re.S)
+
+
+def _parse_tag_attributes(raw_attributes: str) -> Mapping[str, str]:
+    return {m[1]: m[2] for m in _ATTRIBUTE_PATTERN.finditer(raw_attributes)}
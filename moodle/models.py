@@ -1,6 +1,8 @@
+from array import array
 from dataclasses import dataclass
 from enum import Flag, auto
-from typing import Sequence
+from functools import cached_property
+from typing import Callable, Iterable, Iterator, Sequence, overload
 
 
 @dataclass(frozen=True)
@@ -56,6 +58,127 @@ class MoodleCourse:
     """A sequence of MoodleSection objects representing the sections within the course."""
 
 
+class LazyMoodleSection(MoodleSection):
+    """Class to represent a section in a Moodle course whose activities are parsed on first access."""
+
+    _activities_loader: Callable[[], Sequence[MoodleActivity]]
+    """Function which parses the activities of the section."""
+
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        activities_loader: Callable[[], Sequence[MoodleActivity]],
+    ) -> None:
+        """Initialize the lazy Moodle section.
+
+        Args:
+            id (int): The unique identifier for the Moodle section.
+            name (str): The name or title of the Moodle section.
+            activities_loader (Callable[[], Sequence[MoodleActivity]]): Function which parses the activities of the section.
+        """
+
+        object.__setattr__(self, "id", id)
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "_activities_loader", activities_loader)
+
+    @cached_property
+    def activities(self) -> Sequence[MoodleActivity]:
+        """A sequence of MoodleActivity objects representing the activities within the section."""
+
+        return self._activities_loader()
+
+    @property
+    def is_parsed(self) -> bool:
+        """Whether the activities of the section have already been parsed."""
+
+        return "activities" in self.__dict__
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, MoodleSection):
+            return NotImplemented
+
+        return (self.id, self.name, self.activities) == (
+            other.id,
+            other.name,
+            other.activities,
+        )
+
+    __hash__ = MoodleSection.__hash__
+
+
+class LazyMoodleCourse(MoodleCourse):
+    """Class to represent a Moodle course whose sections are parsed on first access."""
+
+    _sections_loader: Callable[[], Sequence[MoodleSection]]
+    """Function which parses the sections of the course."""
+
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        sections_loader: Callable[[], Sequence[MoodleSection]],
+    ) -> None:
+        """Initialize the lazy Moodle course.
+
+        Args:
+            id (int): The unique identifier for the Moodle course.
+            name (str): The name or title of the Moodle course.
+            sections_loader (Callable[[], Sequence[MoodleSection]]): Function which parses the sections of the course.
+        """
+
+        object.__setattr__(self, "id", id)
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "_sections_loader", sections_loader)
+
+    @cached_property
+    def sections(self) -> Sequence[MoodleSection]:
+        """A sequence of MoodleSection objects representing the sections within the course."""
+
+        return self._sections_loader()
+
+    @property
+    def is_parsed(self) -> bool:
+        """Whether the sections of the course and all their activities have already been parsed."""
+
+        return "sections" in self.__dict__ and all(
+            not isinstance(section, LazyMoodleSection) or section.is_parsed
+            for section in self.sections
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, MoodleCourse):
+            return NotImplemented
+
+        return (self.id, self.name, self.sections) == (
+            other.id,
+            other.name,
+            other.sections,
+        )
+
+    __hash__ = MoodleCourse.__hash__
+
+
+@dataclass(frozen=True)
+class MoodleCourseActivity:
+    """Class to represent a Moodle activity together with the course and section it belongs to."""
+
+    course_id: int
+    """The unique identifier of the Moodle course."""
+
+    course_name: str
+    """The name or title of the Moodle course."""
+
+    section_id: int
+    """The unique identifier of the Moodle section."""
+
+    section_name: str
+    """The name or title of the Moodle section."""
+
+    activity: MoodleActivity
+    """The Moodle activity."""
+
+
 class MoodleAttemptStatus(Flag):
     """Enumeration for Moodle attempt statuses."""
 
@@ -78,7 +201,7 @@ class MoodleAttemptStatus(Flag):
     """Status indicating only the regraded attempt."""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MoodleQuizAttempt:
     """Data class representing a Moodle quiz attempt."""
 
@@ -96,3 +219,130 @@ class MoodleQuizAttempt:
 
     finished: bool
     """Boolean indicating whether the quiz attempt is finished."""
+
+
+@dataclass(frozen=True, slots=True)
+class MoodleQuestionAnswer:
+    """Data class representing the answer to a question given in a Moodle quiz attempt."""
+
+    slot: int
+    """The number of the question in the quiz."""
+
+    question: str
+    """The text of the question."""
+
+    answers: Sequence[str]
+    """The texts of the chosen options or the entered answers, empty if the question isn't answered."""
+
+
+@dataclass(frozen=True, slots=True)
+class MoodleAttemptReview:
+    """Data class representing the answers given in a Moodle quiz attempt."""
+
+    attempt_id: int
+    """The unique identifier of the quiz attempt."""
+
+    questions: Sequence[MoodleQuestionAnswer]
+    """The answers to the questions of the quiz in the order of the questions."""
+
+
+@dataclass(frozen=True, slots=True)
+class MoodleQuizAttemptBatch(Sequence[MoodleQuizAttempt]):
+    """Class to represent a batch of Moodle quiz attempts stored by column.
+
+    The batch doesn't keep an object per attempt: MoodleQuizAttempt instances are created on access,
+    so the batch can be used wherever a sequence of attempts is expected.
+    """
+
+    ids: array
+    """The unique identifiers of the quiz attempts, as an array of 64-bit integers."""
+
+    fullnames: Sequence[str]
+    """The full names of the users who attempted the quiz."""
+
+    logins: Sequence[str]
+    """The login names of the users who attempted the quiz."""
+
+    emails: Sequence[str]
+    """The email addresses of the users who attempted the quiz."""
+
+    finished: array
+    """The flags indicating whether the quiz attempts are finished, as an array of bytes."""
+
+    @staticmethod
+    def from_rows(
+        rows: Iterable[tuple[int, str, str, str, bool]],
+    ) -> "MoodleQuizAttemptBatch":
+        """Create a batch from the fields of the quiz attempts.
+
+        Args:
+            rows (Iterable[tuple[int, str, str, str, bool]]): The id, full name, login, email and finished flag of every attempt.
+
+        Returns:
+            MoodleQuizAttemptBatch: The batch of the quiz attempts.
+        """
+
+        ids, fullnames, logins, emails, finished = list(zip(*rows)) or [()] * 5
+        return MoodleQuizAttemptBatch(
+            array("q", ids),
+            list(fullnames),
+            list(logins),
+            list(emails),
+            array("b", finished),
+        )
+
+    def __len__(self) -> int:
+        """Get the number of the quiz attempts in the batch.
+
+        Returns:
+            int: The number of the quiz attempts.
+        """
+
+        return len(self.ids)
+
+    @overload
+    def __getitem__(self, index: int) -> MoodleQuizAttempt: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "MoodleQuizAttemptBatch": ...
+
+    def __getitem__(
+        self, index: int | slice
+    ) -> "MoodleQuizAttempt | MoodleQuizAttemptBatch":
+        """Get a quiz attempt or a slice of the batch.
+
+        Args:
+            index (int | slice): The index of the quiz attempt or a slice of the indices.
+
+        Returns:
+            MoodleQuizAttempt | MoodleQuizAttemptBatch: The quiz attempt, or a batch of the sliced attempts.
+        """
+
+        if isinstance(index, slice):
+            return MoodleQuizAttemptBatch(
+                self.ids[index],
+                self.fullnames[index],
+                self.logins[index],
+                self.emails[index],
+                self.finished[index],
+            )
+
+        return MoodleQuizAttempt(
+            self.ids[index],
+            self.fullnames[index],
+            self.logins[index],
+            self.emails[index],
+            bool(self.finished[index]),
+        )
+
+    def __iter__(self) -> Iterator[MoodleQuizAttempt]:
+        """Iterate over the quiz attempts of the batch.
+
+        Returns:
+            Iterator[MoodleQuizAttempt]: An iterator of the quiz attempts.
+        """
+
+        for row in zip(
+            self.ids, self.fullnames, self.logins, self.emails, self.finished
+        ):
+            yield MoodleQuizAttempt(*row[:4], bool(row[4]))
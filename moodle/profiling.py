@@ -0,0 +1,244 @@
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import ContextManager, Iterator, Sequence
+import asyncio
+import json
+import threading
+import time
+
+
+_CRITICAL_PATH_TOLERANCE = 1e-3
+"""Maximum gap in seconds between two spans for them to be considered consecutive on the critical path."""
+
+_current_profiler: ContextVar["StageProfiler | None"] = ContextVar(
+    "current_profiler", default=None
+)
+"""Profiler collecting the spans of the current context, or None if profiling is disabled."""
+
+_current_depth: ContextVar[tuple[int, int] | None] = ContextVar(
+    "current_depth", default=None
+)
+"""Lane and nesting depth of the innermost span opened in the current context."""
+
+
+@dataclass(frozen=True)
+class ProfileSpan:
+    """Class to represent a single timed stage of a run."""
+
+    name: str
+    """The name of the stage (e.g. download, read_excel)."""
+
+    start: float
+    """The time the stage started, in seconds since the start of the profiling."""
+
+    end: float
+    """The time the stage ended, in seconds since the start of the profiling."""
+
+    lane: int
+    """The number of the task or thread the stage ran in."""
+
+    depth: int
+    """The nesting depth of the stage within its lane, zero for the outermost stages."""
+
+    @property
+    def duration(self) -> float:
+        """The time spent on the stage, in seconds."""
+
+        return self.end - self.start
+
+
+@dataclass(frozen=True)
+class StageSummary:
+    """Class to represent the aggregated timings of all spans of one stage."""
+
+    name: str
+    """The name of the stage."""
+
+    count: int
+    """The number of the spans of the stage."""
+
+    total: float
+    """The summary time of the spans, in seconds."""
+
+    max: float
+    """The longest span of the stage, in seconds."""
+
+    @property
+    def mean(self) -> float:
+        """The mean time of the spans, in seconds."""
+
+        return self.total / self.count if self.count else 0.0
+
+
+class StageProfiler:
+    """Class to collect the timings of the stages of a run.
+
+    Stages are timed with `profile_span`, which is a no-op unless a profiler is activated in the current
+    context, so the instrumented code doesn't need to know whether it is profiled.
+    """
+
+    _started_at: float
+    """The time the profiler was created, as returned by `time.perf_counter`."""
+
+    _spans: list[ProfileSpan]
+    """The completed spans in the order they were completed."""
+
+    _lanes: dict[int, int]
+    """Numbers of the lanes, keyed by the identifier of the task or thread."""
+
+    def __init__(self) -> None:
+        """Initialize the stage profiler."""
+
+        self._started_at = time.perf_counter()
+        self._spans = []
+        self._lanes = {}
+
+    @property
+    def spans(self) -> Sequence[ProfileSpan]:
+        """The completed spans ordered by their start time."""
+
+        return sorted(self._spans, key=lambda span: span.start)
+
+    @property
+    def wall_time(self) -> float:
+        """The time between the start of the first span and the end of the last one, in seconds."""
+
+        if not self._spans:
+            return 0.0
+
+        return max(span.end for span in self._spans) - min(
+            span.start for span in self._spans
+        )
+
+    @contextmanager
+    def activate(self) -> Iterator["StageProfiler"]:
+        """Make the profiler collect the spans of the current context and the tasks started from it.
+
+        Yields:
+            Iterator[StageProfiler]: The profiler itself.
+        """
+
+        token = _current_profiler.set(self)
+        try:
+            yield self
+        finally:
+            _current_profiler.reset(token)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time a stage.
+
+        Args:
+            name (str): The name of the stage.
+        """
+
+        lane = self.__get_lane()
+        parent = _current_depth.get()
+        depth = parent[1] + 1 if parent and parent[0] == lane else 0
+
+        token = _current_depth.set((lane, depth))
+        start = time.perf_counter() - self._started_at
+        try:
+            yield
+        finally:
+            end = time.perf_counter() - self._started_at
+            _current_depth.reset(token)
+            self._spans.append(ProfileSpan(name, start, end, lane, depth))
+
+    def summary(self) -> Sequence[StageSummary]:
+        """Aggregate the spans by stage.
+
+        Returns:
+            Sequence[StageSummary]: The stages ordered by their summary time, the longest first.
+        """
+
+        durations = defaultdict(list)
+        for span in self._spans:
+            durations[span.name].append(span.duration)
+
+        summaries = [
+            StageSummary(name, len(values), sum(values), max(values))
+            for name, values in durations.items()
+        ]
+        return sorted(summaries, key=lambda summary: summary.total, reverse=True)
+
+    def critical_path(self) -> Sequence[ProfileSpan]:
+        """Find the chain of the outermost spans which determined the wall time of the run.
+
+        The chain is built backwards from the span which ended last: every previous span is the one which
+        ended last before the current one started.
+
+        Returns:
+            Sequence[ProfileSpan]: The spans of the critical path in the chronological order.
+        """
+
+        spans = [span for span in self._spans if span.depth == 0]
+        if not spans:
+            return []
+
+        current = max(spans, key=lambda span: span.end)
+        path = [current]
+        while True:
+            previous = [
+                span
+                for span in spans
+                if span.end <= current.start + _CRITICAL_PATH_TOLERANCE
+                and span is not current
+                and span.start < current.start
+            ]
+            if not previous:
+                break
+
+            current = max(previous, key=lambda span: span.end)
+            path.append(current)
+
+        return path[::-1]
+
+    def export_chrome_trace(self, filename: str) -> None:
+        """Write the spans to a file in the Chrome trace event format.
+
+        The file can be opened in chrome://tracing or Perfetto to see the stages as a flame graph.
+
+        Args:
+            filename (str): The path to the file.
+        """
+
+        events = [
+            {
+                "name": span.name,
+                "ph": "X",
+                "ts": span.start * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": 0,
+                "tid": span.lane,
+            }
+            for span in self.spans
+        ]
+
+        with open(filename, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": events}, file)
+
+    def __get_lane(self) -> int:
+        try:
+            owner = id(asyncio.current_task())
+        except RuntimeError:
+            # There is no running event loop, so the span belongs to the thread
+            owner = threading.get_ident()
+
+        return self._lanes.setdefault(owner, len(self._lanes))
+
+
+def profile_span(name: str) -> ContextManager[None]:
+    """Time a stage with the profiler activated in the current context.
+
+    Args:
+        name (str): The name of the stage.
+
+    Returns:
+        ContextManager[None]: A context manager timing the stage, or doing nothing if profiling is disabled.
+    """
+
+    profiler = _current_profiler.get()
+    return profiler.span(name) if profiler else nullcontext()
@@ -1,9 +1,14 @@
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
 from typing import Callable, Generic, Self, TypeVar
+import time
 
 
 T = TypeVar("T")
 
+DEFAULT_REFRESH_INTERVAL = 0.1
+"""Default minimum time in seconds between two renders of a throughput progress handler."""
+
 
 class ProgressHandler(Generic[T], ABC):
     """Abstract base class for handling progress updates."""
@@ -32,6 +37,27 @@ class ProgressHandler(Generic[T], ABC):
 
         pass
 
+    def resize(self, size: int) -> None:
+        """Change the total size of the progress.
+
+        Args:
+            size (int): The new total size.
+        """
+
+        return
+
+    def child(self, size: int) -> "ProgressHandler[int]":
+        """Create a progress handler for a part of the work, e.g. a single download.
+
+        Args:
+            size (int): The total size of the part in bytes, or 0 if it is unknown.
+
+        Returns:
+            ProgressHandler[int]: A progress handler of the part.
+        """
+
+        return ProgressHandler.mock(0)
+
     @staticmethod
     def mock[G](init_state: G) -> "ProgressHandler[G]":
         """Create a mock progress handler.
@@ -83,5 +109,225 @@ class _MockProgressHandler(ProgressHandler[T]):
         return
 
 
+@dataclass(frozen=True)
+class ProgressSnapshot:
+    """Class to represent the state of a throughput progress handler at a moment."""
+
+    completed: int
+    """The number of completed items."""
+
+    total: int
+    """The total number of items."""
+
+    transferred_bytes: int
+    """The number of bytes downloaded by the child progress handlers."""
+
+    active_children: int
+    """The number of child progress handlers which aren't closed yet."""
+
+    elapsed: float
+    """The time since the progress handler was created, in seconds."""
+
+    @property
+    def items_per_second(self) -> float:
+        """The number of items completed per second."""
+
+        return self.completed / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        """The number of bytes downloaded per second."""
+
+        return self.transferred_bytes / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def eta(self) -> float | None:
+        """The estimated time in seconds until all items are completed, or None if it can't be estimated yet."""
+
+        if not self.completed:
+            return None
+
+        return max(self.total - self.completed, 0) / self.items_per_second
+
+
+class ThroughputProgressHandler(ProgressHandler[int], ABC):
+    """Abstract base class for progress handlers tracking both completed items and downloaded bytes.
+
+    Bytes are reported by the child progress handlers of the single downloads. Renders are coalesced, so
+    bursts of updates don't render more often than once per refresh interval.
+    """
+
+    _total: int
+    """The total number of items."""
+
+    _transferred_bytes: int
+    """The number of bytes downloaded by the child progress handlers."""
+
+    _active_children: int
+    """The number of child progress handlers which aren't closed yet."""
+
+    _started_at: float
+    """The time the progress handler was created, as returned by `time.monotonic`."""
+
+    _refresh_interval: float
+    """The minimum time in seconds between two renders."""
+
+    _rendered_at: float | None
+    """The time of the last render, or None if nothing was rendered yet."""
+
+    _closed: bool
+    """Whether the progress handler is closed, so nothing is rendered anymore."""
+
+    def __init__(
+        self, total: int, refresh_interval: float = DEFAULT_REFRESH_INTERVAL
+    ) -> None:
+        """Initialize the progress handler.
+
+        Args:
+            total (int): The total number of items.
+            refresh_interval (float, optional): The minimum time in seconds between two renders. Defaults to DEFAULT_REFRESH_INTERVAL.
+        """
+
+        super().__init__(0)
+        self._total = total
+        self._transferred_bytes = 0
+        self._active_children = 0
+        self._started_at = time.monotonic()
+        self._refresh_interval = refresh_interval
+        self._rendered_at = None
+        self._closed = False
+
+    @property
+    def snapshot(self) -> ProgressSnapshot:
+        """The current state of the progress."""
+
+        return ProgressSnapshot(
+            self._state,
+            self._total,
+            self._transferred_bytes,
+            self._active_children,
+            time.monotonic() - self._started_at,
+        )
+
+    def update(self, progress: int) -> None:
+        """Update the number of completed items.
+
+        Args:
+            progress (int): The number of completed items.
+        """
+
+        self._state = progress
+        self._refresh(force=progress >= self._total)
+
+    def resize(self, size: int) -> None:
+        """Change the total number of items.
+
+        Args:
+            size (int): The new total number of items.
+        """
+
+        self._total = size
+        self._refresh()
+
+    def child(self, size: int) -> ProgressHandler[int]:
+        """Create a progress handler of a single download, which reports its bytes to this handler.
+
+        Args:
+            size (int): The size of the download in bytes, or 0 if it is unknown.
+
+        Returns:
+            ProgressHandler[int]: A progress handler updated with the number of downloaded bytes.
+        """
+
+        self._active_children += 1
+        return _ChildProgressHandler(self)
+
+    def close(self) -> None:
+        """Render the final state and release the resources of the progress handler."""
+
+        if self._closed:
+            return
+
+        self._render(self.snapshot)
+        self._closed = True
+        self._close()
+
+    def _add_bytes(self, count: int) -> None:
+        self._transferred_bytes += count
+        self._refresh()
+
+    def _remove_child(self) -> None:
+        self._active_children -= 1
+        self._refresh()
+
+    def _refresh(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if self._closed:
+            return
+
+        if (
+            not force
+            and self._rendered_at is not None
+            and now - self._rendered_at < self._refresh_interval
+        ):
+            return
+
+        self._rendered_at = now
+        self._render(self.snapshot)
+
+    @abstractmethod
+    def _render(self, snapshot: ProgressSnapshot) -> None:
+        """Abstract method to display the state of the progress.
+
+        Args:
+            snapshot (ProgressSnapshot): The current state of the progress.
+        """
+
+        pass
+
+    @abstractmethod
+    def _close(self) -> None:
+        """Abstract method to release the resources used to display the progress."""
+
+        pass
+
+
+class _ChildProgressHandler(ProgressHandler[int]):
+    """Progress handler of a single download, which reports the downloaded bytes to its parent."""
+
+    _parent: ThroughputProgressHandler
+    """The progress handler the downloaded bytes are reported to."""
+
+    _closed: bool
+    """Whether the progress handler is detached from its parent."""
+
+    def __init__(self, parent: ThroughputProgressHandler) -> None:
+        """Initialize the progress handler with its parent."""
+
+        super().__init__(0)
+        self._parent = parent
+        self._closed = False
+
+    def update(self, new_value: int) -> None:
+        """Update the number of downloaded bytes.
+
+        Args:
+            new_value (int): The number of bytes downloaded so far.
+        """
+
+        self._parent._add_bytes(max(0, new_value - self._state))
+        self._state = new_value
+
+    def close(self) -> None:
+        """Detach the progress handler from its parent."""
+
+        # Closing explicitly and then leaving the context must not detach it twice
+        if self._closed:
+            return
+
+        self._closed = True
+        self._parent._remove_child()
+
+
 ProgressHandlerFactory = Callable[[T], ProgressHandler[T]]
 """A factory type for creating ProgressHandler instances."""
@@ -1,64 +1,264 @@
 from io import BytesIO
 from aiohttp import ClientSession
-from moodle.auth import MoodleCachedSession
+from dataclasses import dataclass, field
+from moodle.auth import (
+    MoodleCachedSession,
+    MoodleSessionPool,
+    SessionBalancing,
+    SessionRenewer,
+)
+from moodle.cache import CourseCache
+from moodle.cassette import CassettePlayer, CassetteRecorder, MoodleResponse
 from moodle.constants import (
+    MOODLE_AJAX_SERVICE_PATH,
     MOODLE_BASE_ADDRESS,
     MOODLE_CHOICE_ACTIVITY_PATH,
     MOODLE_COURSE_VIEW_PATH,
+    MOODLE_DEFAULT_MAX_CONCURRENCY,
     MOODLE_MAIN_PAGE_PATH,
     MOODLE_QUIZ_ACTIVITY_PATH,
     MOODLE_SESSION_COOKIE_NAME,
 )
-from moodle.html_parse_utils import HtmlTag, enumerate_tag_by_name
+from moodle.exceptions import SessionExpiredError
+from moodle.html_parse_utils import (
+    HtmlTag,
+    IndexedHtml,
+    enumerate_tag_by_name,
+    strip_tags,
+)
+from moodle.profiling import profile_span
 from moodle.progress import ProgressHandler, ProgressHandlerFactory
+from moodle.tracing import RequestTracer
 from moodle.models import (
     ChoiceMoodleActivity,
+    LazyMoodleCourse,
+    LazyMoodleSection,
     MoodleActivity,
+    MoodleAttemptReview,
     MoodleAttemptStatus,
     MoodleCourse,
+    MoodleCourseActivity,
     MoodleQuizAttempt,
+    MoodleQuestionAnswer,
+    MoodleQuizAttemptBatch,
     MoodleSection,
     QuizMoodleActivity,
 )
-from typing import AsyncIterable, Self, Sequence
-import pandas as pd
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Mapping,
+    Self,
+    Sequence,
+)
+from yarl import URL
+import asyncio
 import re
+import time
+
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+_CHUNK_SIZE = 64 * 1024
+"""Size of the chunks the response bodies are read by, in bytes."""
+
+_LOGIN_PATH = "/login/"
+"""Path prefix of the login pages Moodle redirects to when the session has expired."""
+
+_SESSION_ERROR_CODES = frozenset(
+    ["servicerequireslogin", "invalidsesskey", "requireloginerror"]
+)
+"""Error codes of the AJAX service meaning that the session is no longer valid."""
+
+
+@dataclass
+class _MoodleAccount:
+    """Class to represent an account of the session pool together with the state of its Moodle session."""
+
+    client: ClientSession
+    """Instance of `ClientSession` with the cookies of the account, used to send its requests."""
+
+    login: str
+    """The login username of the account."""
+
+    session_key: str
+    """The key of the Moodle session, sent with the signed requests. Replaced when the session is renewed."""
+
+    session_cookie: str
+    """The cookie string of the Moodle session. Replaced when the session is renewed."""
+
+    validated_at: float | None
+    """The UNIX time of the last successful validation of the session, or None if it was never validated."""
+
+    lifetime: float | None
+    """The time in seconds the session was observed to stay valid after the validation, or None if unknown."""
+
+    renewal_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    """Lock making the requests which found the session expired renew it one at a time. The requests
+    waiting for the lock compare the session key with the one they were sent with and don't renew the
+    session again if it has already been replaced."""
+
+    in_flight: int = 0
+    """The number of the requests sent on behalf of the account and not completed yet. The least loaded
+    balancing sends every request on behalf of the active account with the fewest requests in flight."""
+
+    is_active: bool = True
+    """Whether requests are sent on behalf of the account. Cleared for good when the session expires and
+    can't be renewed, so the rest of the work is spread across the other accounts of the pool, and the
+    account isn't saved with the sessions."""
+
+    @property
+    def cached_session(self) -> MoodleCachedSession:
+        """The current state of the Moodle session of the account, as it is saved between runs."""
+
+        return MoodleCachedSession(
+            self.login,
+            self.session_key,
+            self.session_cookie,
+            self.validated_at,
+            self.lifetime,
+        )
 
 
 class MoodleSession:
-    """Class to manage a Moodle session, allowing interaction with Moodle's API."""
+    """Class to manage a Moodle session, allowing interaction with Moodle's API.
+
+    The session may be backed by a pool of the sessions of several accounts. Moodle processes the requests
+    of one session one by one, so the requests are spread across the accounts to be processed in parallel.
+    """
 
-    _client: ClientSession
-    """Instance of `ClientSession` used to handle HTTP requests and maintain a session."""
+    _accounts: Sequence[_MoodleAccount]
+    """Accounts the requests are sent on behalf of, each with its own `ClientSession` and cookies."""
 
-    _session_key: str
-    """Key representing the current session, used to authenticate and manage session state."""
+    _balancing: SessionBalancing
+    """Strategy choosing the account every request is sent on behalf of."""
 
-    def __init__(self, cached_session: MoodleCachedSession) -> None:
+    _next_account: int
+    """Index of the account the next request is sent on behalf of with the round-robin balancing."""
+
+    _session_renewer: SessionRenewer | None
+    """Function signing in again when the session expires during the work, or None to fail instead."""
+
+    _limiter: asyncio.Semaphore
+    """Semaphore limiting the number of requests which are sent concurrently through the session."""
+
+    _max_concurrency: int
+    """The maximum number of requests in flight at the same time across all accounts."""
+
+    _course_cache: CourseCache | None
+    """Cache of the parsed course structures, or None if courses are parsed on every request."""
+
+    _base_address: str
+    """Base URL of the Moodle instance."""
+
+    _recorder: CassetteRecorder | None
+    """Recorder of the request/response pairs, or None if the requests aren't recorded."""
+
+    _player: CassettePlayer | None
+    """Player serving the recorded responses instead of the network, or None if the requests are sent to Moodle."""
+
+    def __init__(
+        self,
+        cached_session: MoodleCachedSession | MoodleSessionPool,
+        max_concurrency: int = MOODLE_DEFAULT_MAX_CONCURRENCY,
+        course_cache: CourseCache | None = None,
+        base_address: str = MOODLE_BASE_ADDRESS,
+        recorder: CassetteRecorder | None = None,
+        player: CassettePlayer | None = None,
+        tracer: RequestTracer | None = None,
+        session_renewer: SessionRenewer | None = None,
+    ) -> None:
         """Initialize the Moodle session with a cached session.
 
         Args:
-            cached_session (MoodleCachedSession): A cached session object for Moodle.
+            cached_session (MoodleCachedSession | MoodleSessionPool): A cached session object for Moodle or a pool of the sessions of several accounts.
+            max_concurrency (int, optional): The maximum number of requests in flight at the same time across all accounts. Defaults to MOODLE_DEFAULT_MAX_CONCURRENCY.
+            course_cache (CourseCache, optional): The cache of the parsed course structures. Defaults to None.
+            base_address (str, optional): Base URL of the Moodle instance. Defaults to MOODLE_BASE_ADDRESS.
+            recorder (CassetteRecorder, optional): The recorder of the request/response pairs. Defaults to None.
+            player (CassettePlayer, optional): The player serving the recorded responses instead of the network. Defaults to None.
+            tracer (RequestTracer, optional): The tracer collecting the timings of the requests. Defaults to None.
+            session_renewer (SessionRenewer, optional): The function signing in again when a session expires during the work. Defaults to None.
         """
 
-        self._client = ClientSession(
-            cookies={
-                MOODLE_SESSION_COOKIE_NAME: cached_session.moodle_session_cookie,
-            },
-            base_url=MOODLE_BASE_ADDRESS,
+        pool = (
+            cached_session
+            if isinstance(cached_session, MoodleSessionPool)
+            else MoodleSessionPool([cached_session])
         )
-        self._session_key = cached_session.session_key
-
-    async def is_valid(self) -> bool:
+        if not pool.sessions:
+            raise ValueError("Session pool is empty.")
+
+        self._accounts = [
+            _MoodleAccount(
+                ClientSession(
+                    cookies={
+                        MOODLE_SESSION_COOKIE_NAME: session.moodle_session_cookie,
+                    },
+                    base_url=base_address,
+                    trace_configs=[tracer.trace_config] if tracer else None,
+                ),
+                session.login,
+                session.session_key,
+                session.moodle_session_cookie,
+                session.validated_at,
+                session.lifetime,
+            )
+            for session in pool.sessions
+        ]
+        self._balancing = pool.balancing
+        self._next_account = 0
+        self._session_renewer = session_renewer
+        self._limiter = asyncio.Semaphore(max_concurrency)
+        self._max_concurrency = max_concurrency
+        self._course_cache = course_cache
+        self._base_address = base_address
+        self._recorder = recorder
+        self._player = player
+
+    @property
+    def cached_session(self) -> MoodleCachedSession:
+        """The current state of the session of the first account to save, including the renewed keys and the time of the last validation."""
+
+        return self._accounts[0].cached_session
+
+    @property
+    def cached_sessions(self) -> Sequence[MoodleCachedSession]:
+        """The current state of the sessions of all accounts which are still in use."""
+
+        return [
+            account.cached_session for account in self._accounts if account.is_active
+        ]
+
+    async def is_valid(self, trust_window: float = 0.0) -> bool:
         """Check if the current session is still valid.
 
+        The check is skipped if the session was known to be valid less than `trust_window` seconds ago
+        and the lifetime reported by Moodle hasn't run out since then.
+        With a pool of sessions, the sessions of all accounts are checked concurrently.
+
+        Args:
+            trust_window (float, optional): The time in seconds a validated session is trusted without checking it. Defaults to 0.
+
         Returns:
-            bool: True if the session is valid, False otherwise.
+            bool: True if the sessions of all accounts are valid, False otherwise.
         """
 
-        async with self._client.get(url=MOODLE_MAIN_PAGE_PATH) as response:
-            # Session is valid if is redirected to /my path
-            return MOODLE_MAIN_PAGE_PATH in str(response.url)
+        results = await asyncio.gather(
+            *(
+                self.__is_account_valid(account, trust_window)
+                for account in self._accounts
+                if account.is_active
+            )
+        )
+        return all(results)
 
     async def get_course(self, course_id: str | int) -> MoodleCourse:
         """Retrieve information about a specific Moodle course.
@@ -73,25 +273,88 @@ class MoodleSession:
         if isinstance(course_id, str):
             course_id = MoodleSession.__get_id_from_url(course_id)
 
-        course_url = f"{MOODLE_COURSE_VIEW_PATH}/view.php?id={course_id}"
-        try:
-            async with self._client.get(course_url) as response:
-                course_html = await response.text()
-        except Exception:
-            raise ConnectionError(
-                f'Unable to connect to the endpoint "{MOODLE_BASE_ADDRESS}{course_url}". Check the internet connection.'
-            )
+        course_html = await self.__get_course_html(course_id)
+
+        if self._course_cache:
+            fingerprint = CourseCache.fingerprint(course_html)
+            cached_course = await self._course_cache.load(course_id)
+            if cached_course and cached_course.fingerprint == fingerprint:
+                return cached_course.course
+
+        # Sections and their activities are parsed from the indexed page only when accessed. The lazy
+        # course isn't cached, since storing it would parse the whole page; iter_course_activities,
+        # which parses it anyway, fills the cache instead
+        document = IndexedHtml(course_html)
+        course_name = MoodleSession.__get_course_name(document)
+        return LazyMoodleCourse(
+            course_id, course_name, lambda: MoodleSession.__get_sections(document)
+        )
+
+    async def iter_course_activities(
+        self, course_id: str | int
+    ) -> AsyncIterable[MoodleCourseActivity]:
+        """Retrieve the activities of a specific Moodle course one by one as soon as they are parsed.
+
+        Control is returned to the event loop after every activity, so the work scheduled by the caller
+        (e.g. report downloads) runs concurrently with parsing the rest of the course page.
 
-        course_name = MoodleSession.__get_course_name(course_html)
-        course_section = MoodleSession.__get_sections(course_html)
+        Args:
+            course_id (str | int): The course ID or a URL string containing the course ID.
+
+        Yields:
+            AsyncIterable[MoodleCourseActivity]: An asynchronous iterable of the course activities.
+        """
+
+        if isinstance(course_id, str):
+            course_id = MoodleSession.__get_id_from_url(course_id)
+
+        course_html = await self.__get_course_html(course_id)
+
+        if self._course_cache:
+            fingerprint = CourseCache.fingerprint(course_html)
+            cached_course = await self._course_cache.load(course_id)
+            if cached_course and cached_course.fingerprint == fingerprint:
+                course = cached_course.course
+                for section in course.sections:
+                    for activity in section.activities:
+                        yield MoodleCourseActivity(
+                            course.id, course.name, section.id, section.name, activity
+                        )
+                return
+
+        document = IndexedHtml(course_html)
+        course_name = MoodleSession.__get_course_name(document)
+        sections = []
+        for section_id, section_name, section_tag in MoodleSession.__iter_sections(
+            document
+        ):
+            activities = []
+            for activity in MoodleSession.__iter_activities(section_tag):
+                activities.append(activity)
+                yield MoodleCourseActivity(
+                    course_id, course_name, section_id, section_name, activity
+                )
+
+                # Let the work scheduled for the activity start before parsing the next one
+                await asyncio.sleep(0)
 
-        return MoodleCourse(course_id, course_name, course_section)
+            sections.append(MoodleSection(section_id, section_name, activities))
 
-    async def get_excel_report(self, report_id: str | int) -> pd.DataFrame:
+        if self._course_cache:
+            await self._course_cache.store(
+                fingerprint, MoodleCourse(course_id, course_name, sections)
+            )
+
+    async def get_excel_report(
+        self,
+        report_id: str | int,
+        progress_factory: ProgressHandlerFactory[int] | None = None,
+    ) -> "pd.DataFrame":
         """Retrieve a Excel report from Moodle.
 
         Args:
             report_id (str | int): The ID or URL of the report to be retrieved.
+            progress_factory (ProgressHandlerFactory[int], optional): Factory to create a progress handler of the downloaded bytes. Defaults to None.
 
         Returns:
             pd.DataFrame: A DataFrame containing the report data formatted for Excel.
@@ -104,18 +367,29 @@ class MoodleSession:
         params = {
             "id": report_id,
             "download": "xls",
-            "sesskey": self._session_key,
         }
 
         try:
-            async with self._client.get(report_url, params=params) as response:
-                report_xsls_bytes = await response.content.read()
+            response = await self.__request(
+                "GET",
+                report_url,
+                params=params,
+                progress_factory=progress_factory,
+                signed=True,
+            )
+            report_xsls_bytes = response.body
+        except SessionExpiredError:
+            raise
         except Exception:
             raise ConnectionError(
-                f'Unable to connect to the endpoint "{MOODLE_BASE_ADDRESS}{report_url}". Check the internet connection.'
+                f'Unable to connect to the endpoint "{self._base_address}{report_url}". Check the internet connection.'
             )
 
-        return pd.read_excel(BytesIO(report_xsls_bytes))
+        # Pandas is imported only when a report is built, so it doesn't slow down the startup
+        import pandas as pd
+
+        with profile_span("read_excel"):
+            return pd.read_excel(BytesIO(report_xsls_bytes))
 
     async def get_quiz_attempts(
         self,
@@ -133,7 +407,7 @@ class MoodleSession:
             page_size (int, optional): The number of attempts to fetch per page. Defaults to 30.
 
         Yields:
-            AsyncIterable[Sequence[MoodleQuizAttempt]]: An asynchronous iterable of sequences of MoodleQuizAttempt.
+            AsyncIterable[Sequence[MoodleQuizAttempt]]: An asynchronous iterable of the pages of the attempts, stored by column in MoodleQuizAttemptBatch.
         """
 
         query = query or MoodleAttemptStatus.FINISHED
@@ -145,6 +419,7 @@ class MoodleSession:
 
         page = 0
         uploaded_count = 0
+        progress: ProgressHandler[int] | None = None
 
         while True:
             data = {
@@ -160,15 +435,23 @@ class MoodleSession:
                 "pagesize": page_size,
                 "slotmarks": 0,
                 "page": page,
-                "sesskey": self._session_key,
             }
 
             try:
-                async with self._client.post(quiz_url, data=data) as response:
-                    attempts_page_html = await response.text()
+                # Pages after the first one are tracked as the children of the attempts progress
+                response = await self.__request(
+                    "POST",
+                    quiz_url,
+                    data=data,
+                    progress_factory=progress.child if progress else None,
+                    signed=True,
+                )
+                attempts_page_html = response.text()
+            except SessionExpiredError:
+                raise
             except Exception:
                 raise ConnectionError(
-                    f'Unable to connect to the endpoint "{MOODLE_BASE_ADDRESS}{quiz_url}". Check the internet connection.'
+                    f'Unable to connect to the endpoint "{self._base_address}{quiz_url}". Check the internet connection.'
                 )
 
             if page == 0:
@@ -191,10 +474,88 @@ class MoodleSession:
             if uploaded_count >= attempts_count:
                 break
 
+    async def iter_attempt_reviews(
+        self,
+        attempt_ids: Sequence[str | int],
+        progress_factory: ProgressHandlerFactory[int] | None = None,
+        max_in_flight: int | None = None,
+    ) -> AsyncIterable[MoodleAttemptReview]:
+        """Retrieve the answers given in quiz attempts from their review pages concurrently.
+
+        The pages are requested through the concurrency limit of the session, and the reviews are yielded
+        as soon as they are parsed, so a slow page doesn't hold back the others.
+
+        Args:
+            attempt_ids (Sequence[str | int]): The IDs or review URLs of the quiz attempts.
+            progress_factory (ProgressHandlerFactory[int], optional): Factory to create a progress handler counting the retrieved attempts. Defaults to None.
+            max_in_flight (int, optional): The maximum number of pages requested but not yet yielded. Defaults to the concurrency limit of the session.
+
+        Yields:
+            AsyncIterable[MoodleAttemptReview]: An asynchronous iterable of the attempt reviews in the order they are retrieved.
+        """
+
+        progress_factory = progress_factory or ProgressHandler.mock
+        ids = [MoodleSession.__get_attempt_id(attempt_id) for attempt_id in attempt_ids]
+
+        with progress_factory(len(ids)) as progress:
+            count = 0
+            async for review in iter_bounded(
+                ids,
+                self.__get_attempt_review,
+                max_in_flight or self._max_concurrency,
+            ):
+                count += 1
+                progress.update(count)
+                yield review
+
+    @staticmethod
+    def parse_attempt_review(review_html: str) -> Sequence[MoodleQuestionAnswer]:
+        """Parse the answers to the questions from the HTML of a quiz attempt review.
+
+        Chosen options are the checked radio buttons and checkboxes, entered answers are the values of the
+        text fields.
+
+        Args:
+            review_html (str): The HTML of the review page or of the questions of the attempt.
+
+        Returns:
+            Sequence[MoodleQuestionAnswer]: The answers in the order of the questions.
+        """
+
+        document = IndexedHtml(review_html)
+        questions = []
+        for question_tag in document.enumerate_tag_by_name("div"):
+            if "que" not in question_tag.attributes.get("class", "").split():
+                continue
+
+            questions.append(MoodleSession.__parse_question(question_tag))
+
+        return sorted(questions, key=lambda question: question.slot)
+
+    @staticmethod
+    def get_id(value: str | int) -> int:
+        """Extract the Moodle identifier from a URL or return the given identifier as is.
+
+        Args:
+            value (str | int): The identifier or a URL string containing the identifier.
+
+        Returns:
+            int: The Moodle identifier.
+        """
+
+        if isinstance(value, str):
+            return (
+                int(value)
+                if value.strip().isdigit()
+                else MoodleSession.__get_id_from_url(value)
+            )
+
+        return value
+
     async def close(self) -> None:
         """Close the current Moodle session."""
 
-        await self._client.close()
+        await asyncio.gather(*(account.client.close() for account in self._accounts))
 
     async def __aenter__(self) -> Self:
         """Enter the asynchronous context manager.
@@ -216,6 +577,215 @@ class MoodleSession:
 
         return await self.close()
 
+    async def __request(
+        self,
+        method: str,
+        url: str,
+        params: Mapping[str, Any] | None = None,
+        data: Mapping[str, Any] | None = None,
+        progress_factory: ProgressHandlerFactory[int] | None = None,
+        signed: bool = False,
+    ) -> MoodleResponse:
+        renewed_accounts = set()
+        while True:
+            account = self.__choose_account()
+            session_key = account.session_key
+            if signed:
+                # Key of the session is sent in the form if there is one, otherwise in the query string
+                if data is not None:
+                    data = {**data, "sesskey": session_key}
+                else:
+                    params = {**(params or {}), "sesskey": session_key}
+
+            account.in_flight += 1
+            try:
+                response = await self.__send(
+                    account, method, url, params, data, progress_factory
+                )
+            finally:
+                account.in_flight -= 1
+
+            if not MoodleSession.__is_login_page(response):
+                # Every page behind the login proves the session is still alive
+                account.validated_at = time.time()
+                return response
+
+            # Session expired in the middle of the work, so renew it and send the request once again
+            if id(account) in renewed_accounts:
+                raise SessionExpiredError("Session expired. Sign in again.")
+
+            renewed_accounts.add(id(account))
+            await self.__renew(account, session_key)
+
+    async def __send(
+        self,
+        account: _MoodleAccount,
+        method: str,
+        url: str,
+        params: Mapping[str, Any] | None = None,
+        data: Mapping[str, Any] | None = None,
+        progress_factory: ProgressHandlerFactory[int] | None = None,
+    ) -> MoodleResponse:
+        progress_factory = progress_factory or ProgressHandler.mock
+        async with self._limiter:
+            if self._player:
+                response = await self._player.play(method, url, params, data)
+                with progress_factory(len(response.body)) as progress:
+                    progress.update(len(response.body))
+
+                return response
+
+            started = time.perf_counter()
+            async with account.client.request(
+                method, url, params=params, data=data
+            ) as response:
+                with progress_factory(response.content_length or 0) as progress:
+                    body = bytearray()
+                    async for chunk in response.content.iter_chunked(_CHUNK_SIZE):
+                        body += chunk
+                        progress.update(len(body))
+
+                result = MoodleResponse(
+                    str(response.url),
+                    response.status,
+                    response.content_type,
+                    response.charset or "utf-8",
+                    bytes(body),
+                )
+
+        if self._recorder:
+            self._recorder.record(
+                method,
+                url,
+                params,
+                data,
+                result,
+                time.perf_counter() - started,
+                account.session_key,
+            )
+
+        return result
+
+    def __choose_account(self) -> _MoodleAccount:
+        accounts = [account for account in self._accounts if account.is_active]
+        if not accounts:
+            raise SessionExpiredError("Session expired. Sign in again.")
+
+        if self._balancing == SessionBalancing.LEAST_LOADED:
+            # The first of the equally loaded accounts is the one which waits the longest
+            account = min(accounts, key=lambda account: account.in_flight)
+        else:
+            account = accounts[self._next_account % len(accounts)]
+
+        self._next_account += 1
+        return account
+
+    async def __is_account_valid(
+        self, account: _MoodleAccount, trust_window: float
+    ) -> bool:
+        if account.validated_at is not None:
+            elapsed = time.time() - account.validated_at
+            lifetime = (
+                account.lifetime if account.lifetime is not None else trust_window
+            )
+            if 0 <= elapsed < min(trust_window, lifetime):
+                return True
+
+        return await self.__validate(account)
+
+    async def __validate(self, account: _MoodleAccount) -> bool:
+        try:
+            time_remaining = await self.__get_time_remaining(account)
+            is_valid = time_remaining is not None
+        except ValueError:
+            # AJAX service may be unavailable, so fall back to rendering the dashboard
+            response = await self.__send(account, "GET", MOODLE_MAIN_PAGE_PATH)
+
+            # Session is valid if is redirected to /my path
+            is_valid = MOODLE_MAIN_PAGE_PATH in response.url
+            time_remaining = account.lifetime
+
+        if is_valid:
+            account.validated_at = time.time()
+            account.lifetime = time_remaining
+
+        return is_valid
+
+    async def __get_time_remaining(self, account: _MoodleAccount) -> float | None:
+        # Asking for the remaining time of the session is much cheaper than rendering the dashboard
+        if self._player:
+            raise ValueError("AJAX service isn't recorded.")
+
+        params = {
+            "sesskey": account.session_key,
+            "info": "core_session_time_remaining",
+        }
+        payload = [
+            {"index": 0, "methodname": "core_session_time_remaining", "args": {}}
+        ]
+        async with self._limiter:
+            async with account.client.post(
+                MOODLE_AJAX_SERVICE_PATH, params=params, json=payload
+            ) as response:
+                try:
+                    result = await response.json(content_type=None)
+                except Exception:
+                    raise ValueError("Unable to parse AJAX service response.")
+
+        # Failed requests are answered with a single error object instead of the list of results
+        if isinstance(result, list) and result and isinstance(result[0], dict):
+            result = result[0]
+            if not result.get("error"):
+                try:
+                    time_remaining = float(result["data"]["timeremaining"])
+                except Exception:
+                    raise ValueError("Unable to parse AJAX service response.")
+
+                return time_remaining if time_remaining > 0 else None
+
+            result = result.get("exception")
+
+        if isinstance(result, dict) and result.get("errorcode") in _SESSION_ERROR_CODES:
+            return None
+
+        raise ValueError("AJAX service is unavailable.")
+
+    async def __renew(self, account: _MoodleAccount, session_key: str) -> None:
+        async with account.renewal_lock:
+            # Other request has already renewed the session while this one was waiting for the lock
+            if account.session_key != session_key or not account.is_active:
+                return
+
+            # Redirect to the login page may be caused by a transient failure
+            if await self.__validate(account):
+                return
+
+            cached_session = (
+                await self._session_renewer(account.cached_session)
+                if self._session_renewer
+                else None
+            )
+            if not cached_session:
+                # Requests are sent on behalf of the other accounts of the pool, if there are any
+                account.is_active = False
+                return
+
+            account.login = cached_session.login
+            account.session_key = cached_session.session_key
+            account.session_cookie = cached_session.moodle_session_cookie
+            account.validated_at = cached_session.validated_at or time.time()
+            account.lifetime = cached_session.lifetime
+
+            # Login page may have set an anonymous session cookie, which must not be sent anymore
+            account.client.cookie_jar.clear()
+            account.client.cookie_jar.update_cookies(
+                {MOODLE_SESSION_COOKIE_NAME: cached_session.moodle_session_cookie}
+            )
+
+    @staticmethod
+    def __is_login_page(response: MoodleResponse) -> bool:
+        return URL(response.url).path.startswith(_LOGIN_PATH)
+
     @staticmethod
     def __get_id_from_url(url: str, param_name: str = "id") -> int:
         match = re.search(rf"{param_name}=(\d+)", url)
@@ -225,8 +795,83 @@ class MoodleSession:
         return int(match[1])
 
     @staticmethod
-    def __get_course_name(course_html: str) -> str:
-        for tag in enumerate_tag_by_name(course_html, "a"):
+    def __get_attempt_id(attempt_id: str | int) -> int:
+        if isinstance(attempt_id, str) and not attempt_id.isdigit():
+            return MoodleSession.__get_id_from_url(attempt_id, "attempt")
+
+        return int(attempt_id)
+
+    async def __get_attempt_review(self, attempt_id: int) -> MoodleAttemptReview:
+        review_url = f"{MOODLE_QUIZ_ACTIVITY_PATH}/review.php"
+        try:
+            response = await self.__request(
+                "GET", review_url, params={"attempt": attempt_id, "showall": 1}
+            )
+            review_html = response.text()
+        except SessionExpiredError:
+            raise
+        except Exception:
+            raise ConnectionError(
+                f'Unable to connect to the endpoint "{self._base_address}{review_url}". Check the internet connection.'
+            )
+
+        with profile_span("parse_attempt_review"):
+            return MoodleAttemptReview(
+                attempt_id, MoodleSession.parse_attempt_review(review_html)
+            )
+
+    @staticmethod
+    def __parse_question(question_tag: HtmlTag) -> MoodleQuestionAnswer:
+        # The id of a question is "question-<usage id>-<slot>"
+        slot = int(question_tag.attributes.get("id", "0").rsplit("-", 1)[-1] or 0)
+
+        question = ""
+        labels = {}
+        for tag in question_tag.enumerate_tag_by_name("div"):
+            classes = tag.attributes.get("class", "").split()
+            if "qtext" in classes:
+                question = strip_tags(tag.inner_text or "")
+            elif tag.attributes.get("data-region") == "answer-label":
+                labels[tag.attributes.get("id", "")] = tag
+
+        # Older themes label the options with <label for="..."> instead of the labelled div
+        for tag in question_tag.enumerate_tag_by_name("label"):
+            if "for" in tag.attributes:
+                labels[f"{tag.attributes['for']}_label"] = tag
+
+        answers = []
+        for tag in question_tag.enumerate_tag_by_name("input"):
+            attributes = tag.attributes
+            input_type = attributes.get("type")
+            if input_type in ("radio", "checkbox") and "checked" in attributes:
+                label = labels.get(
+                    attributes.get("aria-labelledby", f"{attributes.get('id')}_label")
+                )
+                if label:
+                    answers.append(MoodleSession.__get_option_text(label))
+            elif input_type == "text" and attributes.get("value"):
+                answers.append(strip_tags(attributes["value"]))
+
+        return MoodleQuestionAnswer(slot, question, answers)
+
+    @staticmethod
+    def __get_option_text(label_tag: HtmlTag) -> str:
+        text = strip_tags(label_tag.inner_text or "")
+
+        # Options are prefixed with their numbers, e.g. "a. "
+        for tag in label_tag.enumerate_tag_by_name("span"):
+            if "answernumber" in tag.attributes.get("class", "").split():
+                number = strip_tags(tag.inner_text or "")
+                if text.startswith(number):
+                    text = text[len(number) :].lstrip()
+                break
+
+        return text
+
+    @staticmethod
+    def __get_course_name(document: IndexedHtml) -> str:
+        # Title is located at the top of the page, so don't index all links of the page to find it
+        for tag in enumerate_tag_by_name(document.html, "a"):
             if (
                 "href" in tag.attributes
                 and "title" in tag.attributes
@@ -236,10 +881,36 @@ class MoodleSession:
 
         raise ValueError("Unable to find course title.")
 
+    async def __get_course_html(self, course_id: int) -> str:
+        course_url = f"{MOODLE_COURSE_VIEW_PATH}/view.php?id={course_id}"
+        try:
+            response = await self.__request("GET", course_url)
+            return response.text()
+        except SessionExpiredError:
+            raise
+        except Exception:
+            raise ConnectionError(
+                f'Unable to connect to the endpoint "{self._base_address}{course_url}". Check the internet connection.'
+            )
+
     @staticmethod
-    def __get_sections(course_html: str) -> Sequence[MoodleSection]:
-        sections = []
-        for tag in enumerate_tag_by_name(course_html, "li"):
+    def __get_sections(document: IndexedHtml) -> Sequence[MoodleSection]:
+        return [
+            LazyMoodleSection(
+                section_id,
+                section_name,
+                lambda section_tag=section_tag: MoodleSession.__get_activities(
+                    section_tag
+                ),
+            )
+            for section_id, section_name, section_tag in MoodleSession.__iter_sections(
+                document
+            )
+        ]
+
+    @staticmethod
+    def __iter_sections(document: IndexedHtml) -> Iterable[tuple[int, str, HtmlTag]]:
+        for tag in document.enumerate_tag_by_name("li"):
             if (
                 "id" in tag.attributes
                 and "data-id" in tag.attributes
@@ -256,42 +927,38 @@ class MoodleSession:
                         raise ValueError("Unable to find name of section.")
 
                     section_name = section_name.strip()
-
-                    activities = MoodleSession.__get_activities(tag.inner_text)
-                    section = MoodleSection(section_id, section_name, activities)
-
-                    sections.append(section)
                 except ValueError:
                     raise
                 except Exception:
                     raise ValueError("Unable to parse section.")
 
-        return sections
+                yield section_id, section_name, tag
+
+    @staticmethod
+    def __get_activities(section_tag: HtmlTag) -> Sequence[MoodleActivity]:
+        return list(MoodleSession.__iter_activities(section_tag))
 
     @staticmethod
-    def __get_activities(section_html: str) -> Sequence[MoodleActivity]:
-        activities = []
-        for tag in enumerate_tag_by_name(section_html, "li"):
+    def __iter_activities(section_tag: HtmlTag) -> Iterable[MoodleActivity]:
+        for tag in section_tag.enumerate_tag_by_name("li"):
             if (
                 "class" in tag.attributes
                 and "data-id" in tag.attributes
                 and "activity" in tag.attributes["class"]
             ):
-                activity_id = int(tag.attributes["data-id"])
-
-                activity_name_iter = iter(
-                    inner_tag.attributes["data-activityname"]
-                    for inner_tag in tag.enumerate_tag_by_name("div")
-                    if "data-activityname" in inner_tag.attributes
-                )
-                activity_name = next(activity_name_iter).strip()
-
-                activity = MoodleSession.__build_activity(
-                    activity_id, activity_name, tag
-                )
-                activities.append(activity)
+                try:
+                    activity_id = int(tag.attributes["data-id"])
+
+                    activity_name_iter = iter(
+                        inner_tag.attributes["data-activityname"]
+                        for inner_tag in tag.enumerate_tag_by_name("div")
+                        if "data-activityname" in inner_tag.attributes
+                    )
+                    activity_name = next(activity_name_iter).strip()
+                except Exception:
+                    raise ValueError("Unable to parse activity.")
 
-        return activities
+                yield MoodleSession.__build_activity(activity_id, activity_name, tag)
 
     @staticmethod
     def __build_activity(id: int, name: str, section_tag: HtmlTag) -> MoodleActivity:
@@ -319,8 +986,8 @@ class MoodleSession:
     @staticmethod
     def __parse_attempts_page(
         attempts_page_html: str, page_size: int
-    ) -> Sequence[MoodleQuizAttempt]:
-        attempts = []
+    ) -> MoodleQuizAttemptBatch:
+        rows = []
 
         for index, tag in enumerate(enumerate_tag_by_name(attempts_page_html, "tr")):
             if index > page_size:
@@ -330,12 +997,12 @@ class MoodleSession:
                 "id" in tag.attributes
                 and "mod-quiz-report-overview" in tag.attributes["id"]
             ):
-                attempts.append(MoodleSession.__parse_attempt(tag))
+                rows.append(MoodleSession.__parse_attempt(tag))
 
-        return attempts
+        return MoodleQuizAttemptBatch.from_rows(rows)
 
     @staticmethod
-    def __parse_attempt(attempt_tag: HtmlTag) -> MoodleQuizAttempt:
+    def __parse_attempt(attempt_tag: HtmlTag) -> tuple[int, str, str, str, bool]:
         tags = iter(attempt_tag.enumerate_tag_by_name("td"))
 
         # Skip checkbox column
@@ -371,4 +1038,43 @@ class MoodleSession:
 
         id = MoodleSession.__get_id_from_url(url, "attempt")
 
-        return MoodleQuizAttempt(id, fullname, login, email, finished)
+        return id, fullname, login, email, finished
+
+
+async def iter_bounded[T, R](
+    items: Iterable[T], fetch: Callable[[T], Awaitable[R]], max_in_flight: int
+) -> AsyncIterator[R]:
+    """Run a coroutine for every item concurrently and yield the results as soon as they are ready.
+
+    New coroutines are started only when the previous results are taken, so no more than `max_in_flight`
+    results are running or waiting to be taken at the same time.
+
+    Args:
+        items (Iterable[T]): The items to run the coroutine for.
+        fetch (Callable[[T], Awaitable[R]]): The coroutine function.
+        max_in_flight (int): The maximum number of the started but not yet taken results.
+
+    Yields:
+        AsyncIterator[R]: The results in the order they are ready.
+    """
+
+    items = iter(items)
+    pending: set[asyncio.Task[R]] = set()
+    try:
+        while True:
+            for item in items:
+                pending.add(asyncio.ensure_future(fetch(item)))
+                if len(pending) >= max_in_flight:
+                    break
+
+            if not pending:
+                return
+
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,320 @@
+from aiohttp import (
+    ClientSession,
+    TraceConfig,
+    TraceConnectionCreateEndParams,
+    TraceConnectionCreateStartParams,
+    TraceDnsResolveHostEndParams,
+    TraceDnsResolveHostStartParams,
+    TraceRequestEndParams,
+    TraceRequestExceptionParams,
+    TraceRequestStartParams,
+    TraceResponseChunkReceivedParams,
+)
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from moodle.constants import (
+    MOODLE_AJAX_SERVICE_PATH,
+    MOODLE_CHOICE_ACTIVITY_PATH,
+    MOODLE_COURSE_VIEW_PATH,
+    MOODLE_MAIN_PAGE_PATH,
+    MOODLE_QUIZ_ACTIVITY_PATH,
+    MOODLE_WEB_SERVICE_PATH,
+)
+from types import SimpleNamespace
+from typing import Sequence
+from yarl import URL
+import json
+import time
+
+
+_ENDPOINTS = [
+    ("login", "/login/"),
+    ("web_service", MOODLE_WEB_SERVICE_PATH),
+    ("ajax_service", MOODLE_AJAX_SERVICE_PATH),
+    ("choice_report", f"{MOODLE_CHOICE_ACTIVITY_PATH}/report.php"),
+    ("quiz_report", f"{MOODLE_QUIZ_ACTIVITY_PATH}/report.php"),
+    ("course_view", f"{MOODLE_COURSE_VIEW_PATH}/view.php"),
+    ("main_page", MOODLE_MAIN_PAGE_PATH),
+]
+"""Names of the endpoints the requests are grouped by, with the path prefixes they are recognized by."""
+
+_OTHER_ENDPOINT = "other"
+"""Name of the endpoint of the requests which don't match any known endpoint."""
+
+_PHASES = ["dns", "connect", "ttfb", "transfer", "total"]
+"""Phases of a request exported to Prometheus."""
+
+
+@dataclass(frozen=True)
+class RequestTrace:
+    """Class to represent the timings of a single HTTP request.
+
+    All the timings are in seconds. DNS and connect time are zero if a pooled connection was reused.
+    """
+
+    endpoint: str
+    """The name of the endpoint the request was sent to (e.g. course_view, choice_report)."""
+
+    method: str
+    """The HTTP method of the request."""
+
+    url: str
+    """The URL of the request without the query string."""
+
+    status: int | None
+    """The HTTP status code of the final response, or None if the request failed."""
+
+    dns: float
+    """The time spent on resolving the host name."""
+
+    connect: float
+    """The time spent on establishing the connection, including the TLS handshake."""
+
+    ttfb: float
+    """The time from sending the request to receiving the response headers, excluding DNS and connect time."""
+
+    transfer: float
+    """The time spent on receiving the response body."""
+
+    total: float
+    """The time from starting the request to receiving the last byte of the response."""
+
+    bytes: int
+    """The number of received response body bytes."""
+
+    error: str | None = None
+    """The name of the exception the request failed with, or None if it succeeded."""
+
+
+@dataclass
+class _RequestTiming:
+    endpoint: str
+    method: str
+    url: str
+    started_at: float
+    status: int | None = None
+    dns: float = 0.0
+    connect: float = 0.0
+    dns_started_at: float = 0.0
+    connect_started_at: float = 0.0
+    dns_before_connect: float = 0.0
+    responded_at: float | None = None
+    last_chunk_at: float | None = None
+    bytes: int = 0
+    error: str | None = None
+
+
+class RequestTracer:
+    """Class to collect the timings of every request sent by the sessions it is attached to.
+
+    The timings are collected through the `aiohttp` tracing signals, so the tracer can be attached to any
+    `ClientSession` by passing `trace_config` to it.
+    The signals are handled on the event loop, so the timings also include the time the loop was busy
+    with other work (e.g. parsing the reports) when the response arrived.
+    """
+
+    _trace_config: TraceConfig
+    """Tracing configuration with the hooks recording the timings."""
+
+    _requests: list[_RequestTiming]
+    """Timings of the started requests in the order they were started."""
+
+    def __init__(self) -> None:
+        """Initialize the request tracer."""
+
+        self._requests = []
+        self._trace_config = TraceConfig()
+        self._trace_config.on_request_start.append(self.__on_request_start)
+        self._trace_config.on_dns_resolvehost_start.append(self.__on_dns_start)
+        self._trace_config.on_dns_resolvehost_end.append(self.__on_dns_end)
+        self._trace_config.on_connection_create_start.append(self.__on_connect_start)
+        self._trace_config.on_connection_create_end.append(self.__on_connect_end)
+        self._trace_config.on_request_end.append(self.__on_request_end)
+        self._trace_config.on_response_chunk_received.append(self.__on_chunk_received)
+        self._trace_config.on_request_exception.append(self.__on_request_exception)
+
+    @property
+    def trace_config(self) -> TraceConfig:
+        """Tracing configuration to pass to a `ClientSession` to trace its requests."""
+
+        return self._trace_config
+
+    @property
+    def traces(self) -> Sequence[RequestTrace]:
+        """The timings of the requests which have completed, in the order they were started."""
+
+        return [
+            RequestTracer.__build_trace(timing)
+            for timing in self._requests
+            if timing.responded_at is not None
+        ]
+
+    def export_json_lines(self, filename: str) -> None:
+        """Write the timings of every request to a JSON lines file.
+
+        Args:
+            filename (str): The path to the file.
+        """
+
+        with open(filename, "w", encoding="utf-8") as file:
+            for trace in self.traces:
+                file.write(json.dumps(asdict(trace), ensure_ascii=False) + "\n")
+
+    def export_prometheus(self, filename: str) -> None:
+        """Write the timings aggregated by endpoint to a file in the Prometheus text exposition format.
+
+        Args:
+            filename (str): The path to the file.
+        """
+
+        requests = defaultdict(int)
+        received_bytes = defaultdict(int)
+        phase_sums = defaultdict(float)
+        phase_counts = defaultdict(int)
+        for trace in self.traces:
+            status = str(trace.status) if trace.status is not None else "error"
+            requests[trace.endpoint, status] += 1
+            received_bytes[trace.endpoint] += trace.bytes
+            for phase in _PHASES:
+                phase_sums[trace.endpoint, phase] += getattr(trace, phase)
+                phase_counts[trace.endpoint, phase] += 1
+
+        lines = [
+            "# HELP moodle_requests_total Number of requests sent to Moodle.",
+            "# TYPE moodle_requests_total counter",
+        ]
+        for (endpoint, status), count in sorted(requests.items()):
+            lines.append(
+                f'moodle_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}'
+            )
+
+        lines += [
+            "# HELP moodle_response_bytes_total Number of response body bytes received from Moodle.",
+            "# TYPE moodle_response_bytes_total counter",
+        ]
+        for endpoint, count in sorted(received_bytes.items()):
+            lines.append(
+                f'moodle_response_bytes_total{{endpoint="{endpoint}"}} {count}'
+            )
+
+        lines += [
+            "# HELP moodle_request_duration_seconds Time spent on the phases of the requests to Moodle.",
+            "# TYPE moodle_request_duration_seconds summary",
+        ]
+        for endpoint, phase in sorted(phase_sums):
+            labels = f'endpoint="{endpoint}",phase="{phase}"'
+            lines.append(
+                f"moodle_request_duration_seconds_sum{{{labels}}} "
+                f"{phase_sums[endpoint, phase]:.6f}"
+            )
+            lines.append(
+                f"moodle_request_duration_seconds_count{{{labels}}} "
+                f"{phase_counts[endpoint, phase]}"
+            )
+
+        with open(filename, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+
+    async def __on_request_start(
+        self,
+        _: ClientSession,
+        context: SimpleNamespace,
+        params: TraceRequestStartParams,
+    ) -> None:
+        context.timing = _RequestTiming(
+            RequestTracer.__get_endpoint(params.url),
+            params.method,
+            str(params.url.with_query(None)),
+            time.perf_counter(),
+        )
+        self._requests.append(context.timing)
+
+    async def __on_dns_start(
+        self,
+        _: ClientSession,
+        context: SimpleNamespace,
+        __: TraceDnsResolveHostStartParams,
+    ) -> None:
+        context.timing.dns_started_at = time.perf_counter()
+
+    async def __on_dns_end(
+        self,
+        _: ClientSession,
+        context: SimpleNamespace,
+        __: TraceDnsResolveHostEndParams,
+    ) -> None:
+        timing = context.timing
+        timing.dns += time.perf_counter() - timing.dns_started_at
+
+    async def __on_connect_start(
+        self,
+        _: ClientSession,
+        context: SimpleNamespace,
+        __: TraceConnectionCreateStartParams,
+    ) -> None:
+        context.timing.connect_started_at = time.perf_counter()
+        context.timing.dns_before_connect = context.timing.dns
+
+    async def __on_connect_end(
+        self,
+        _: ClientSession,
+        context: SimpleNamespace,
+        __: TraceConnectionCreateEndParams,
+    ) -> None:
+        # Connection creation includes resolving the host, which is measured separately
+        timing = context.timing
+        dns = timing.dns - timing.dns_before_connect
+        timing.connect += time.perf_counter() - timing.connect_started_at - dns
+
+    async def __on_request_end(
+        self, _: ClientSession, context: SimpleNamespace, params: TraceRequestEndParams
+    ) -> None:
+        # Request ends as soon as the headers of the final response are received
+        context.timing.responded_at = time.perf_counter()
+        context.timing.status = params.response.status
+
+    async def __on_chunk_received(
+        self,
+        _: ClientSession,
+        context: SimpleNamespace,
+        params: TraceResponseChunkReceivedParams,
+    ) -> None:
+        context.timing.last_chunk_at = time.perf_counter()
+        context.timing.bytes += len(params.chunk)
+
+    async def __on_request_exception(
+        self,
+        _: ClientSession,
+        context: SimpleNamespace,
+        params: TraceRequestExceptionParams,
+    ) -> None:
+        context.timing.responded_at = time.perf_counter()
+        context.timing.error = type(params.exception).__name__
+
+    @staticmethod
+    def __get_endpoint(url: URL) -> str:
+        for endpoint, path in _ENDPOINTS:
+            if url.path.startswith(path):
+                return endpoint
+
+        return _OTHER_ENDPOINT
+
+    @staticmethod
+    def __build_trace(timing: _RequestTiming) -> RequestTrace:
+        responded_at = timing.responded_at or timing.started_at
+        finished_at = max(timing.last_chunk_at or 0.0, responded_at)
+        ttfb = responded_at - timing.started_at - timing.dns - timing.connect
+
+        return RequestTrace(
+            timing.endpoint,
+            timing.method,
+            timing.url,
+            timing.status,
+            timing.dns,
+            timing.connect,
+            max(ttfb, 0.0),
+            finished_at - responded_at,
+            finished_at - timing.started_at,
+            timing.bytes,
+            timing.error,
+        )
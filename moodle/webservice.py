@@ -0,0 +1,453 @@
+from aiohttp import ClientSession
+from moodle.auth import MoodleWebServiceToken
+from moodle.constants import (
+    MOODLE_BASE_ADDRESS,
+    MOODLE_DEFAULT_MAX_CONCURRENCY,
+    MOODLE_WEB_SERVICE_PATH,
+)
+from moodle.exceptions import WebServiceError
+from moodle.models import (
+    ChoiceMoodleActivity,
+    MoodleActivity,
+    MoodleAttemptReview,
+    MoodleAttemptStatus,
+    MoodleCourse,
+    MoodleCourseActivity,
+    MoodleQuizAttempt,
+    MoodleQuizAttemptBatch,
+    MoodleSection,
+    QuizMoodleActivity,
+)
+from moodle.progress import ProgressHandler, ProgressHandlerFactory
+from moodle.session import MoodleSession, iter_bounded
+from moodle.tracing import RequestTracer
+from typing import TYPE_CHECKING, Any, AsyncIterable, Mapping, Self, Sequence
+import asyncio
+import re
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+_REPORT_COLUMNS = ["Фамилия", "Имя", "Группа", "Вариант ответа"]
+"""Columns of the choice report, the same as in the Excel report downloaded from Moodle."""
+
+_ENROLLED_USER_FIELDS = "id,username,firstname,lastname,fullname,email,groups"
+"""Fields of the enrolled users requested from Moodle."""
+
+_USER_ATTEMPTS_MAX_IN_FLIGHT = 4
+"""The maximum number of the attempts of the users of a quiz requested at the same time."""
+
+_GROUP_IDENTIFICATOR_PATTERN = re.compile(r"_?(?:[^_]*_){7}")
+"""Regex pattern matching the name of a group which is an identificator, i.e. has at least eight parts separated by underscores."""
+
+
+class MoodleWebServiceSession:
+    """Class to retrieve the course data through the Moodle Web Services (REST/JSON) instead of HTML pages.
+
+    Provides the same operations and returns the same models as `MoodleSession`.
+    """
+
+    _client: ClientSession
+    """Instance of `ClientSession` used to handle HTTP requests."""
+
+    _token: str
+    """Token used to authenticate the Web Services requests."""
+
+    _limiter: asyncio.Semaphore
+    """Semaphore limiting the number of requests which are sent concurrently through the session."""
+
+    _max_concurrency: int
+    """The maximum number of requests in flight at the same time."""
+
+    _base_address: str
+    """Base URL of the Moodle instance."""
+
+    _course_modules: dict[int, asyncio.Task[Mapping[str, Any]]]
+    """Course modules requested through the session, keyed by course module ID."""
+
+    _enrolled_users: dict[int, asyncio.Task[Mapping[int, Mapping[str, Any]]]]
+    """Enrolled users of the courses requested through the session, keyed by course ID."""
+
+    def __init__(
+        self,
+        token: MoodleWebServiceToken,
+        max_concurrency: int = MOODLE_DEFAULT_MAX_CONCURRENCY,
+        base_address: str = MOODLE_BASE_ADDRESS,
+        tracer: RequestTracer | None = None,
+    ) -> None:
+        """Initialize the Moodle Web Services session with a token.
+
+        Args:
+            token (MoodleWebServiceToken): A token for the Moodle Web Services.
+            max_concurrency (int, optional): The maximum number of requests in flight at the same time. Defaults to MOODLE_DEFAULT_MAX_CONCURRENCY.
+            base_address (str, optional): Base URL of the Moodle instance. Defaults to MOODLE_BASE_ADDRESS.
+            tracer (RequestTracer, optional): The tracer collecting the timings of the requests. Defaults to None.
+        """
+
+        self._client = ClientSession(
+            base_url=base_address,
+            trace_configs=[tracer.trace_config] if tracer else None,
+        )
+        self._base_address = base_address
+        self._token = token.token
+        self._limiter = asyncio.Semaphore(max_concurrency)
+        self._max_concurrency = max_concurrency
+        self._course_modules = {}
+        self._enrolled_users = {}
+
+    async def is_valid(self) -> bool:
+        """Check if the token is still valid.
+
+        Returns:
+            bool: True if the token is valid, False otherwise.
+        """
+
+        try:
+            await self._call("core_webservice_get_site_info")
+        except WebServiceError:
+            return False
+
+        return True
+
+    async def get_course(self, course_id: str | int) -> MoodleCourse:
+        """Retrieve information about a specific Moodle course.
+
+        Args:
+            course_id (str | int): The course ID or a URL string containing the course ID.
+
+        Returns:
+            MoodleCourse: An object representing the Moodle course.
+        """
+
+        course_id = MoodleSession.get_id(course_id)
+        courses_json, sections_json = await asyncio.gather(
+            self._call("core_course_get_courses_by_field", field="id", value=course_id),
+            self._call(
+                "core_course_get_contents",
+                courseid=course_id,
+                options=[{"name": "excludecontents", "value": 1}],
+            ),
+        )
+
+        try:
+            course_name = courses_json["courses"][0]["fullname"].strip()
+        except Exception:
+            raise ValueError("Unable to find course title.")
+
+        sections = [
+            MoodleSection(
+                section_json["id"],
+                section_json["name"].strip(),
+                [
+                    MoodleWebServiceSession.__build_activity(module_json)
+                    for module_json in section_json.get("modules", [])
+                ],
+            )
+            for section_json in sections_json
+        ]
+
+        return MoodleCourse(course_id, course_name, sections)
+
+    async def iter_course_activities(
+        self, course_id: str | int
+    ) -> AsyncIterable[MoodleCourseActivity]:
+        """Retrieve the activities of a specific Moodle course one by one.
+
+        Args:
+            course_id (str | int): The course ID or a URL string containing the course ID.
+
+        Yields:
+            AsyncIterable[MoodleCourseActivity]: An asynchronous iterable of the course activities.
+        """
+
+        course = await self.get_course(course_id)
+        for section in course.sections:
+            for activity in section.activities:
+                yield MoodleCourseActivity(
+                    course.id, course.name, section.id, section.name, activity
+                )
+
+    async def get_excel_report(
+        self,
+        report_id: str | int,
+        progress_factory: ProgressHandlerFactory[int] | None = None,
+    ) -> "pd.DataFrame":
+        """Retrieve a report of a choice activity in the same shape as the Excel report of Moodle.
+
+        Web Services respond with small JSON documents, so the downloaded bytes aren't reported.
+
+        Args:
+            report_id (str | int): The ID or URL of the choice activity.
+            progress_factory (ProgressHandlerFactory[int], optional): Ignored, accepted for compatibility with `MoodleSession`. Defaults to None.
+
+        Returns:
+            pd.DataFrame: A DataFrame containing the report data formatted for Excel.
+        """
+
+        course_module = await self.__get_course_module(MoodleSession.get_id(report_id))
+        results_json, users = await asyncio.gather(
+            self._call(
+                "mod_choice_get_choice_results", choiceid=course_module["instance"]
+            ),
+            self.__get_enrolled_users(course_module["course"]),
+        )
+
+        rows = []
+        for option_json in results_json["options"]:
+            for response_json in option_json.get("userresponses", []):
+                user = users.get(response_json["userid"])
+                if not user:
+                    continue
+
+                rows.append(
+                    (
+                        user["lastname"],
+                        user["firstname"],
+                        MoodleWebServiceSession.__get_group_name(user),
+                        option_json["text"],
+                    )
+                )
+
+        import pandas as pd
+
+        return pd.DataFrame(rows, columns=_REPORT_COLUMNS)
+
+    async def get_quiz_attempts(
+        self,
+        quiz_id: str | int,
+        query: MoodleAttemptStatus | None = None,
+        progress_factory: ProgressHandlerFactory[int] | None = None,
+        page_size: int = 30,
+    ) -> AsyncIterable[Sequence[MoodleQuizAttempt]]:
+        """Retrieve quiz attempts for a given quiz ID, optionally filtered by status.
+
+        Moodle Web Services return the attempts of one user per call, so a quiz costs a round trip per
+        enrolled user. The calls are small and run concurrently, but no more than
+        `_USER_ATTEMPTS_MAX_IN_FLIGHT` at a time, so a large course doesn't occupy the whole concurrency
+        limit shared with the other courses. Progress counts users instead of attempts.
+
+        Args:
+            quiz_id (str | int): The ID or URL of the quiz.
+            query (MoodleAttemptStatus, optional): The status filter for the quiz attempts. Defaults to FINISHED.
+            progress_factory (ProgressHandlerFactory[int], optional): Factory to create a progress handler to track the progress of fetching attempts. Defaults to None.
+            page_size (int, optional): The number of attempts to yield per page. Defaults to 30.
+
+        Yields:
+            AsyncIterable[Sequence[MoodleQuizAttempt]]: An asynchronous iterable of the pages of the attempts, stored by column in MoodleQuizAttemptBatch.
+        """
+
+        query = query or MoodleAttemptStatus.FINISHED
+        progress_factory = progress_factory or ProgressHandler.mock
+
+        course_module = await self.__get_course_module(MoodleSession.get_id(quiz_id))
+        users = await self.__get_enrolled_users(course_module["course"])
+
+        status = {
+            MoodleAttemptStatus.FINISHED: "finished",
+            MoodleAttemptStatus.IN_PROGRESS: "unfinished",
+            MoodleAttemptStatus.OVERDUE: "unfinished",
+        }.get(query, "all")
+
+        async def _request_user_attempts(user_id: int) -> Any:
+            return await self._call(
+                "mod_quiz_get_user_attempts",
+                quizid=course_module["instance"],
+                userid=user_id,
+                status=status,
+                includepreviews=0,
+            )
+
+        rows = []
+        with progress_factory(len(users)) as progress:
+            count = 0
+            async for attempts_json in iter_bounded(
+                users,
+                _request_user_attempts,
+                min(_USER_ATTEMPTS_MAX_IN_FLIGHT, self._max_concurrency),
+            ):
+                for attempt_json in attempts_json["attempts"]:
+                    user = users[attempt_json["userid"]]
+                    rows.append(
+                        (
+                            attempt_json["id"],
+                            user["fullname"],
+                            user.get("username", ""),
+                            user.get("email", ""),
+                            attempt_json["state"] == "finished",
+                        )
+                    )
+
+                count += 1
+                progress.update(count)
+                while len(rows) >= page_size:
+                    yield MoodleQuizAttemptBatch.from_rows(rows[:page_size])
+                    rows = rows[page_size:]
+
+        if rows:
+            yield MoodleQuizAttemptBatch.from_rows(rows)
+
+    async def iter_attempt_reviews(
+        self,
+        attempt_ids: Sequence[str | int],
+        progress_factory: ProgressHandlerFactory[int] | None = None,
+        max_in_flight: int | None = None,
+    ) -> AsyncIterable[MoodleAttemptReview]:
+        """Retrieve the answers given in quiz attempts concurrently.
+
+        Args:
+            attempt_ids (Sequence[str | int]): The IDs of the quiz attempts.
+            progress_factory (ProgressHandlerFactory[int], optional): Factory to create a progress handler counting the retrieved attempts. Defaults to None.
+            max_in_flight (int, optional): The maximum number of reviews requested but not yet yielded. Defaults to the concurrency limit of the session.
+
+        Yields:
+            AsyncIterable[MoodleAttemptReview]: An asynchronous iterable of the attempt reviews in the order they are retrieved.
+        """
+
+        progress_factory = progress_factory or ProgressHandler.mock
+        ids = [int(attempt_id) for attempt_id in attempt_ids]
+
+        with progress_factory(len(ids)) as progress:
+            count = 0
+            async for review in iter_bounded(
+                ids,
+                self.__get_attempt_review,
+                max_in_flight or self._max_concurrency,
+            ):
+                count += 1
+                progress.update(count)
+                yield review
+
+    async def close(self) -> None:
+        """Close the current Moodle Web Services session."""
+
+        await self._client.close()
+
+    async def __aenter__(self) -> Self:
+        """Enter the asynchronous context manager.
+
+        Returns:
+            Self: The current instance of MoodleWebServiceSession.
+        """
+
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        """Exit the asynchronous context manager.
+
+        Args:
+            *_: Optional arguments (ignored).
+
+        Closes the session upon exiting the context manager.
+        """
+
+        return await self.close()
+
+    async def _call(self, function: str, **params: Any) -> Any:
+        data = {
+            "wstoken": self._token,
+            "wsfunction": function,
+            "moodlewsrestformat": "json",
+            **_flatten_params(params),
+        }
+
+        try:
+            async with (
+                self._limiter,
+                self._client.post(MOODLE_WEB_SERVICE_PATH, data=data) as response,
+            ):
+                result = await response.json(content_type=None)
+        except Exception:
+            raise ConnectionError(
+                f'Unable to connect to the endpoint "{self._base_address}{MOODLE_WEB_SERVICE_PATH}". Check the internet connection.'
+            )
+
+        if isinstance(result, dict) and "exception" in result:
+            raise WebServiceError(
+                f'Web service function "{function}" failed. {result.get("message", "")}'
+            )
+
+        return result
+
+    async def __get_course_module(self, course_module_id: int) -> Mapping[str, Any]:
+        if course_module_id not in self._course_modules:
+            self._course_modules[course_module_id] = asyncio.create_task(
+                self._call("core_course_get_course_module", cmid=course_module_id)
+            )
+
+        course_module_json = await self._course_modules[course_module_id]
+        return course_module_json["cm"]
+
+    async def __get_enrolled_users(
+        self, course_id: int
+    ) -> Mapping[int, Mapping[str, Any]]:
+        async def _request_enrolled_users() -> Mapping[int, Mapping[str, Any]]:
+            users_json = await self._call(
+                "core_enrol_get_enrolled_users",
+                courseid=course_id,
+                options=[{"name": "userfields", "value": _ENROLLED_USER_FIELDS}],
+            )
+            return {user["id"]: user for user in users_json}
+
+        # Users are shared by all activities of the course, so they are requested only once
+        if course_id not in self._enrolled_users:
+            self._enrolled_users[course_id] = asyncio.create_task(
+                _request_enrolled_users()
+            )
+
+        return await self._enrolled_users[course_id]
+
+    async def __get_attempt_review(self, attempt_id: int) -> MoodleAttemptReview:
+        review_json = await self._call(
+            "mod_quiz_get_attempt_review", attemptid=attempt_id
+        )
+
+        # Every question is rendered the same way as on the review page
+        questions_html = "".join(
+            question["html"] for question in review_json["questions"]
+        )
+        return MoodleAttemptReview(
+            attempt_id, MoodleSession.parse_attempt_review(questions_html)
+        )
+
+    @staticmethod
+    def __get_group_name(user_json: Mapping[str, Any]) -> str:
+        # A student may also be a member of auxiliary groups, e.g. the subgroups of a practice,
+        # but only the group named by an identificator says where the student studies
+        names = [group["name"] for group in user_json.get("groups", [])]
+        return next(
+            (
+                name
+                for name in names
+                if _GROUP_IDENTIFICATOR_PATTERN.match(name.strip())
+            ),
+            names[0] if names else "",
+        )
+
+    @staticmethod
+    def __build_activity(module_json: Mapping[str, Any]) -> MoodleActivity:
+        module_id = module_json["id"]
+        module_name = module_json["name"].strip()
+
+        if module_json.get("modname") == "choice":
+            return ChoiceMoodleActivity(module_id, module_name)
+
+        if module_json.get("modname") == "quiz":
+            return QuizMoodleActivity(module_id, module_name)
+
+        return MoodleActivity(module_id, module_name)
+
+
+def _flatten_params(params: Mapping[str, Any], prefix: str = "") -> Mapping[str, Any]:
+    flatten = {}
+    for key, value in params.items():
+        name = f"{prefix}[{key}]" if prefix else str(key)
+
+        if isinstance(value, Mapping):
+            flatten.update(_flatten_params(value, name))
+        elif isinstance(value, (list, tuple)):
+            flatten.update(_flatten_params(dict(enumerate(value)), name))
+        else:
+            flatten[name] = value
+
+    return flatten
@@ -0,0 +1,6 @@
+from asyncio import run
+from bench.runner import main, parse_arguments
+
+
+if __name__ == "__main__":
+    run(main(parse_arguments()))
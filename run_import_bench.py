@@ -0,0 +1,5 @@
+from bench.importtime import main, parse_arguments
+
+
+if __name__ == "__main__":
+    main(parse_arguments())
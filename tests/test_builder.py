@@ -0,0 +1,98 @@
+from bench.fake_moodle import FakeMoodleConfig
+from bench.runner import run_fake_moodle
+from logic.builder import build_course_report, build_reports
+from logic.statistics import ReportStatistics
+from moodle.auth import MoodleCredentials, authorize
+from moodle.models import ChoiceMoodleActivity, QuizMoodleActivity
+from moodle.session import MoodleSession
+from os import listdir
+from tempfile import TemporaryDirectory
+from unittest import IsolatedAsyncioTestCase, main
+
+
+_CONFIG = FakeMoodleConfig(
+    sections=1,
+    choices_per_section=2,
+    quizzes_per_section=1,
+    students=30,
+    groups=3,
+    latency=0.0,
+    jitter=0.0,
+)
+"""Shape of the fake Moodle server the reports are built from."""
+
+_COURSE_ID = 3
+"""ID of the course requested from the fake server."""
+
+
+class BuildCourseReportTest(IsolatedAsyncioTestCase):
+    """Tests of building the report of a course with the quizzes against the fake Moodle server."""
+
+    async def asyncSetUp(self) -> None:
+        self.base_address = await self.enterAsyncContext(run_fake_moodle(_CONFIG))
+        cached_session = await authorize(
+            MoodleCredentials(_CONFIG.login, _CONFIG.password), self.base_address
+        )
+        self.session = await self.enterAsyncContext(
+            MoodleSession(cached_session, base_address=self.base_address)
+        )
+
+    async def test_quizzes_stay_out_of_statistics(self) -> None:
+        course = await self.session.get_course(_COURSE_ID)
+        activities = [
+            activity for section in course.sections for activity in section.activities
+        ]
+        choice_ids = {
+            activity.id
+            for activity in activities
+            if isinstance(activity, ChoiceMoodleActivity)
+        }
+        quiz_names = [
+            activity.name
+            for activity in activities
+            if isinstance(activity, QuizMoodleActivity)
+        ]
+
+        report_statistics = ReportStatistics()
+        with TemporaryDirectory() as directory:
+            await build_course_report(
+                self.session,
+                _COURSE_ID,
+                output_directory=directory,
+                report_statistics=report_statistics,
+                include_quizzes=True,
+            )
+            filenames = listdir(directory)
+
+        summary = report_statistics.summarize()
+        self.assertEqual(set(summary.subject_fill["activity_id"]), choice_ids)
+        self.assertEqual(
+            set(summary.missing_students["activity_id"]) - choice_ids, set()
+        )
+        self.assertEqual(len(filenames), len(choice_ids) + len(quiz_names))
+        self.assertTrue(
+            all(any(name in filename for filename in filenames) for name in quiz_names)
+        )
+
+    async def test_malformed_course_ids_fail_in_their_results(self) -> None:
+        with TemporaryDirectory() as directory:
+            results = await build_reports(
+                await authorize(
+                    MoodleCredentials(_CONFIG.login, _CONFIG.password),
+                    self.base_address,
+                ),
+                ["https://edu.vsu.ru/course/view.php", "курс"],
+                output_directory=directory,
+            )
+            filenames = listdir(directory)
+
+        self.assertEqual(
+            [result.course_id for result in results],
+            ["https://edu.vsu.ru/course/view.php", "курс"],
+        )
+        self.assertTrue(all(isinstance(result.error, ValueError) for result in results))
+        self.assertEqual(filenames, [])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+from logic.diff import ChangeKind, ChoiceChange, ReportDiff, diff_choices, write_changes
+from logic.models import Report, Student
+from logic.store import ReportStore
+from moodle.models import ChoiceMoodleActivity, MoodleCourseActivity
+from os import path
+from tempfile import TemporaryDirectory
+from typing import Sequence
+from unittest import TestCase, main
+import csv
+import json
+import pandas as pd
+
+
+_COURSE_ACTIVITY = MoodleCourseActivity(
+    1, "Курс", 1, "Раздел", ChoiceMoodleActivity(10, "Выбор")
+)
+"""The choice activity whose reports are compared."""
+
+
+def _get_report(rows: Sequence[tuple[str, str, str | None]]) -> Report:
+    groups: dict[str, list[Student]] = {}
+    for fullname, group, subject in rows:
+        groups.setdefault(group, []).append(Student(fullname, subject))
+
+    return Report(groups)
+
+
+def _summarize(
+    changes: Sequence[ChoiceChange],
+) -> list[tuple[ChangeKind, str, str | None, str | None]]:
+    return [
+        (change.kind, change.fullname, change.previous_subject, change.subject)
+        for change in changes
+    ]
+
+
+class DiffChoicesTest(TestCase):
+    """Tests of comparing the choices of a report with the previous snapshot."""
+
+    def test_kinds_of_changes(self) -> None:
+        previous = {
+            ("Иванов Иван", "1"): ["Физика"],
+            ("Петров Петр", "1"): ["Химия"],
+            ("Сидоров Сидор", "1"): [None],
+            ("Козлов Илья", "2"): ["Физика"],
+        }
+        report = _get_report(
+            [
+                ("Иванов Иван", "1", "Физика"),
+                ("Петров Петр", "1", "Биология"),
+                ("Сидоров Сидор", "1", None),
+                ("Орлов Олег", "2", 1),
+            ]
+        )
+
+        self.assertEqual(
+            _summarize(diff_choices(_COURSE_ACTIVITY, previous, report)),
+            [
+                (ChangeKind.CHANGED, "Петров Петр", "Химия", "Биология"),
+                (ChangeKind.ADDED, "Орлов Олег", None, "1"),
+                (ChangeKind.REMOVED, "Козлов Илья", "Физика", None),
+            ],
+        )
+
+    def test_numeric_subject_is_unchanged(self) -> None:
+        previous = {("Иванов Иван", "1"): ["1"]}
+        report = _get_report([("Иванов Иван", "1", 1.0)])
+
+        self.assertEqual(diff_choices(_COURSE_ACTIVITY, previous, report), [])
+
+    def test_duplicate_keys(self) -> None:
+        previous = {("Иванов Иван", "1"): ["Физика", "Химия"]}
+
+        # The namesakes have swapped their rows, which isn't a change
+        swapped = _get_report(
+            [("Иванов Иван", "1", "Химия"), ("Иванов Иван", "1", "Физика")]
+        )
+        self.assertEqual(diff_choices(_COURSE_ACTIVITY, previous, swapped), [])
+
+        changed = _get_report(
+            [
+                ("Иванов Иван", "1", "Химия"),
+                ("Иванов Иван", "1", "Биология"),
+                ("Иванов Иван", "1", "История"),
+            ]
+        )
+        self.assertEqual(
+            _summarize(diff_choices(_COURSE_ACTIVITY, previous, changed)),
+            [
+                (ChangeKind.CHANGED, "Иванов Иван", "Физика", "Биология"),
+                (ChangeKind.ADDED, "Иванов Иван", None, "История"),
+            ],
+        )
+
+        removed = _get_report([("Иванов Иван", "1", "Физика")])
+        self.assertEqual(
+            _summarize(diff_choices(_COURSE_ACTIVITY, previous, removed)),
+            [(ChangeKind.REMOVED, "Иванов Иван", "Химия", None)],
+        )
+
+
+class ReportDiffTest(TestCase):
+    """Tests of comparing the reports with the snapshots stored in the snapshot database."""
+
+    def setUp(self) -> None:
+        self.store = self.enterContext(ReportStore(":memory:"))
+        self.diff = ReportDiff(self.store)
+
+    def test_compare_with_stored_namesakes(self) -> None:
+        report = _get_report(
+            [
+                ("Иванов Иван", "1", "Физика"),
+                ("Иванов Иван", "1", "Химия"),
+                ("Петров Петр", "1", None),
+            ]
+        )
+        with self.store.record_run():
+            self.assertEqual(
+                [
+                    change.kind
+                    for change in self.diff.compare(_COURSE_ACTIVITY, report, "first")
+                ],
+                [ChangeKind.ADDED] * 3,
+            )
+            self.store.store_report(_COURSE_ACTIVITY, report, "first")
+
+        # The report has been downloaded again, but its choices are the same
+        with self.store.record_run():
+            self.assertEqual(self.diff.compare(_COURSE_ACTIVITY, report, "second"), [])
+            self.store.store_report(_COURSE_ACTIVITY, report, "second")
+
+        with self.store.record_run():
+            changed = _get_report(
+                [
+                    ("Иванов Иван", "1", "Физика"),
+                    ("Иванов Иван", "1", "Биология"),
+                ]
+            )
+            self.assertEqual(
+                _summarize(self.diff.compare(_COURSE_ACTIVITY, changed, "third")),
+                [
+                    (ChangeKind.CHANGED, "Иванов Иван", "Химия", "Биология"),
+                    (ChangeKind.REMOVED, "Петров Петр", None, None),
+                ],
+            )
+
+        self.assertEqual(len(self.diff.changes), 5)
+
+    def test_compare_skips_unchanged_payload(self) -> None:
+        with self.store.record_run():
+            self.store.store_report(
+                _COURSE_ACTIVITY, _get_report([("Иванов Иван", "1", "Физика")]), "same"
+            )
+
+        with self.store.record_run():
+            report = _get_report([("Иванов Иван", "1", "Химия")])
+            self.assertEqual(self.diff.compare(_COURSE_ACTIVITY, report, "same"), [])
+
+
+class WriteChangesTest(TestCase):
+    """Tests of writing the changes into the supported formats."""
+
+    def setUp(self) -> None:
+        self.changes = diff_choices(
+            _COURSE_ACTIVITY,
+            {("Петров Петр", "1"): ["Химия"], ("Козлов Илья", "2"): ["Физика"]},
+            _get_report(
+                [("Петров Петр", "1", "Биология"), ("Орлов Олег", "2", "История")]
+            ),
+        )
+        self.directory = self.enterContext(TemporaryDirectory())
+
+    def test_write_json(self) -> None:
+        filename = path.join(self.directory, "changes.json")
+        write_changes(filename, self.changes)
+
+        with open(filename, encoding="utf-8") as file:
+            changes = json.load(file)
+
+        self.assertEqual(list(changes), ["added", "removed", "changed"])
+        self.assertEqual(
+            [change["fullname"] for change in changes["added"]], ["Орлов Олег"]
+        )
+        self.assertEqual(changes["removed"][0]["previous_subject"], "Физика")
+        self.assertEqual(changes["changed"][0]["subject"], "Биология")
+
+    def test_write_csv(self) -> None:
+        filename = path.join(self.directory, "changes.csv")
+        write_changes(filename, self.changes)
+
+        with open(filename, encoding="utf-8", newline="") as file:
+            rows = list(csv.DictReader(file))
+
+        self.assertEqual(
+            [(row["kind"], row["fullname"]) for row in rows],
+            [
+                ("changed", "Петров Петр"),
+                ("added", "Орлов Олег"),
+                ("removed", "Козлов Илья"),
+            ],
+        )
+
+    def test_write_excel(self) -> None:
+        filename = path.join(self.directory, "changes.xlsx")
+        write_changes(filename, self.changes)
+
+        df_changes = pd.read_excel(filename, sheet_name="Изменения")
+        self.assertEqual(
+            df_changes["Изменение"].tolist(), ["Изменен", "Добавлен", "Удален"]
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+from logic.exceptions import DeserializeReportError, InvalidColumnNameError
+from logic.models import Identificator, Report, Student, StudentBatch
+from logic.serialization import (
+    collation_key,
+    deserialize_report,
+    serialize_report_to_excel,
+)
+from os import path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+import pandas as pd
+
+
+_SORTED_NAMES = [
+    "Абрамов Антон",
+    "Ёжиков Петр",
+    "Ежов Иван",
+    "Елисеев Олег",
+    "елисеев олег",
+    "Елкин Илья",
+    "Ёлкин Илья",
+    "Емельянов Сергей",
+    "Жуков Павел",
+]
+"""Names in the alphabetical order, including the ones differing only in the case or in "ё"."""
+
+_FIRST_GROUP = "ПММ_01.03.02_Прикладная математика_Общий_1_22_о_3к"
+"""Identificator of the students of the first group."""
+
+_SECOND_GROUP = "ПММ_02.03.01_Математика и компьютерные науки_Общий_2_23_о_2к"
+"""Identificator of the students of the second group."""
+
+_REPORT_ROWS = [
+    ("Петров", "Петр", _FIRST_GROUP, "Физика"),
+    ("Иванов", "Иван", _SECOND_GROUP, 2.0),
+    ("Сидоров", "Сидор", _FIRST_GROUP, float("nan")),
+    ("Ёжиков", "Илья", _FIRST_GROUP, "Химия"),
+]
+"""Rows of the report as pandas reads them from the Excel report of Moodle."""
+
+
+class CollationKeyTest(TestCase):
+    """Tests of sorting Russian names in the alphabetical order."""
+
+    def test_alphabetical_order(self) -> None:
+        self.assertEqual(
+            sorted(reversed(_SORTED_NAMES), key=collation_key), _SORTED_NAMES
+        )
+
+        # The code point order puts "Ё" before "А" and the lowercase letters after "Я"
+        self.assertNotEqual(sorted(_SORTED_NAMES), _SORTED_NAMES)
+
+    def test_names_differing_in_yo_are_distinct(self) -> None:
+        self.assertLess(collation_key("Елкин Илья"), collation_key("Ёлкин Илья"))
+        self.assertLess(collation_key("Ёлкин Илья"), collation_key("Елкина Анна"))
+        self.assertEqual(
+            len({collation_key(name) for name in _SORTED_NAMES}), len(_SORTED_NAMES)
+        )
+
+    def test_serialize_report_to_excel_sorts_every_group(self) -> None:
+        report = Report(
+            {
+                "2": [Student(name, "Физика") for name in reversed(_SORTED_NAMES)],
+                "1": [Student("Жуков Павел", None), Student("Ёжиков Петр", "Химия")],
+            }
+        )
+
+        with TemporaryDirectory() as directory:
+            filename = path.join(directory, "report.xlsx")
+            serialize_report_to_excel(filename, report)
+            sheets = pd.read_excel(filename, sheet_name=None)
+
+        self.assertEqual(list(sheets), ["2", "1"])
+        self.assertEqual(sheets["2"]["ФИО"].tolist(), _SORTED_NAMES)
+        self.assertEqual(
+            sheets["1"].fillna("-").values.tolist(),
+            [["Ёжиков Петр", "Химия"], ["Жуков Павел", "-"]],
+        )
+
+
+class DeserializeReportTest(TestCase):
+    """Tests of reading the report downloaded from Moodle into the columnar batches."""
+
+    def setUp(self) -> None:
+        self.df_report = pd.DataFrame(
+            _REPORT_ROWS, columns=["Фамилия", "Имя", "Группа", "Вариант ответа"]
+        )
+
+    def test_groups_are_student_batches(self) -> None:
+        report = deserialize_report(self.df_report)
+
+        self.assertEqual(list(report.groups), ["1", "2"])
+        self.assertTrue(
+            all(isinstance(batch, StudentBatch) for batch in report.groups.values())
+        )
+
+        first_batch = report.groups["1"]
+        self.assertEqual(
+            first_batch.fullnames, ["Петров Петр", "Сидоров Сидор", "Ёжиков Илья"]
+        )
+        self.assertEqual(first_batch.subjects, ["Физика", None, "Химия"])
+        self.assertEqual(report.groups["2"].subjects, ["2"])
+
+        identificator = first_batch.identificators[0]
+        self.assertEqual(
+            (identificator.direction.code, identificator.group), ("01.03.02", "1")
+        )
+        self.assertEqual(report.groups["2"][0].identificator.current_year, 2)
+
+    def test_student_batch_is_sequence_of_students(self) -> None:
+        batch = deserialize_report(self.df_report).groups["1"]
+        students = list(batch)
+
+        self.assertEqual(len(batch), 3)
+        self.assertEqual(
+            students[1], Student("Сидоров Сидор", None, batch.identificators[1])
+        )
+        self.assertEqual(batch[-1], students[-1])
+        self.assertEqual(list(batch[1:]), students[1:])
+        self.assertIsInstance(batch[1:], StudentBatch)
+
+    def test_identificators_are_parsed_once(self) -> None:
+        batch = deserialize_report(self.df_report).groups["1"]
+
+        # Equal strings share the same parsed identificator
+        self.assertEqual(len({id(value) for value in batch.identificators}), 1)
+
+        group_keys, identificators = Identificator.from_column(
+            [_FIRST_GROUP, _SECOND_GROUP, _FIRST_GROUP]
+        )
+        self.assertEqual(group_keys, ["1", "2", "1"])
+        self.assertIs(identificators[0], identificators[2])
+        self.assertEqual(identificators[0], Identificator.from_str(_FIRST_GROUP))
+
+    def test_round_trip(self) -> None:
+        report = deserialize_report(self.df_report)
+
+        with TemporaryDirectory() as directory:
+            filename = path.join(directory, "report.xlsx")
+            serialize_report_to_excel(filename, report)
+            sheets = pd.read_excel(filename, sheet_name=None, dtype=str)
+
+        self.assertEqual(
+            {
+                group: sorted(df_sheet.fillna("-").values.tolist())
+                for group, df_sheet in sheets.items()
+            },
+            {
+                "1": [
+                    ["Ёжиков Илья", "Химия"],
+                    ["Петров Петр", "Физика"],
+                    ["Сидоров Сидор", "-"],
+                ],
+                "2": [["Иванов Иван", "2"]],
+            },
+        )
+
+    def test_errors(self) -> None:
+        with self.assertRaises(InvalidColumnNameError):
+            deserialize_report(self.df_report.drop(columns="Группа"))
+
+        self.df_report.loc[0, "Группа"] = "Группа 1"
+        with self.assertRaises(DeserializeReportError):
+            deserialize_report(self.df_report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+from bench.fake_moodle import FakeMoodleConfig
+from bench.runner import run_fake_moodle
+from moodle.auth import MoodleCredentials, authorize
+from moodle.cache import CourseCache
+from moodle.models import LazyMoodleCourse, LazyMoodleSection, MoodleCourse
+from moodle.session import MoodleSession
+from tempfile import TemporaryDirectory
+from unittest import IsolatedAsyncioTestCase, main
+
+
+_CONFIG = FakeMoodleConfig(
+    sections=3,
+    choices_per_section=2,
+    quizzes_per_section=1,
+    students=10,
+    groups=2,
+    latency=0.0,
+    jitter=0.0,
+)
+"""Shape of the fake Moodle server the session is tested against."""
+
+_COURSE_ID = 5
+"""ID of the course requested from the fake server."""
+
+
+class MoodleSessionCourseTest(IsolatedAsyncioTestCase):
+    """Tests of parsing the course page with the HTML session against the fake Moodle server."""
+
+    async def asyncSetUp(self) -> None:
+        base_address = await self.enterAsyncContext(run_fake_moodle(_CONFIG))
+        cached_session = await authorize(
+            MoodleCredentials(_CONFIG.login, _CONFIG.password), base_address
+        )
+
+        self.cache_directory = self.enterContext(TemporaryDirectory())
+        self.course_cache = CourseCache(self.cache_directory)
+        self.session = await self.enterAsyncContext(
+            MoodleSession(
+                cached_session,
+                course_cache=self.course_cache,
+                base_address=base_address,
+            )
+        )
+
+    async def test_get_course_parses_sections_on_access(self) -> None:
+        course = await self.session.get_course(_COURSE_ID)
+
+        self.assertIsInstance(course, LazyMoodleCourse)
+        self.assertTrue(course.name)
+        self.assertNotIn("sections", course.__dict__)
+
+        first_section, *other_sections = course.sections
+        self.assertEqual(len(first_section.activities), 3)
+        self.assertTrue(first_section.is_parsed)
+        self.assertTrue(
+            all(
+                isinstance(section, LazyMoodleSection) and not section.is_parsed
+                for section in other_sections
+            )
+        )
+        self.assertFalse(course.is_parsed)
+
+    async def test_get_course_matches_iter_course_activities(self) -> None:
+        course = await self.session.get_course(_COURSE_ID)
+
+        self.assertEqual(
+            [
+                (section.id, section.name, activity)
+                for section in course.sections
+                for activity in section.activities
+            ],
+            [
+                (
+                    course_activity.section_id,
+                    course_activity.section_name,
+                    course_activity.activity,
+                )
+                async for course_activity in self.session.iter_course_activities(
+                    _COURSE_ID
+                )
+            ],
+        )
+        self.assertTrue(course.is_parsed)
+
+    async def test_lazy_course_isnt_cached(self) -> None:
+        await self.session.get_course(_COURSE_ID)
+        self.assertIsNone(await self.course_cache.load(_COURSE_ID))
+
+        # Iterating the activities parses the whole page, so the course is cached
+        async for _ in self.session.iter_course_activities(_COURSE_ID):
+            pass
+
+        cached_course = await self.course_cache.load(_COURSE_ID)
+        self.assertIsNotNone(cached_course)
+
+        course = await self.session.get_course(_COURSE_ID)
+        self.assertNotIsInstance(course, LazyMoodleCourse)
+        self.assertIsInstance(course, MoodleCourse)
+        self.assertEqual(course, cached_course.course)
+
+
+if __name__ == "__main__":
+    main()
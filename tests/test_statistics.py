@@ -0,0 +1,124 @@
+from logic.models import Report, Student
+from logic.statistics import ReportStatistics
+from moodle.models import ChoiceMoodleActivity, MoodleCourseActivity
+from os import path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+import json
+import math
+import pandas as pd
+
+
+_FIRST_ACTIVITY = MoodleCourseActivity(
+    1, "Курс", 1, "Раздел", ChoiceMoodleActivity(10, "Выбор 1")
+)
+"""The first choice activity of the course."""
+
+_SECOND_ACTIVITY = MoodleCourseActivity(
+    1, "Курс", 1, "Раздел", ChoiceMoodleActivity(20, "Выбор 2")
+)
+"""The second choice activity of the course."""
+
+
+class ReportStatisticsTest(TestCase):
+    """Tests of computing the aggregate statistics of the choices."""
+
+    def setUp(self) -> None:
+        self.statistics = ReportStatistics(capacity=4)
+        self.statistics.add(
+            _FIRST_ACTIVITY,
+            Report(
+                {
+                    "1": [
+                        Student("Иванов Иван", "Физика"),
+                        Student("Петров Петр", None),
+                    ],
+                    "2": [
+                        Student("Сидоров Сидор", "Физика"),
+                        Student("Козлов Илья", "Химия"),
+                    ],
+                }
+            ),
+        )
+        self.statistics.add(
+            _SECOND_ACTIVITY,
+            Report({"1": [Student("Иванов Иван", "История")]}),
+        )
+
+    def test_empty_answers_are_counted(self) -> None:
+        summary = self.statistics.summarize()
+
+        subject_fill = summary.subject_fill[summary.subject_fill["activity_id"] == 10]
+        self.assertEqual(
+            dict(zip(subject_fill["subject"].fillna("-"), subject_fill["count"])),
+            {"Физика": 2, "-": 1, "Химия": 1},
+        )
+        self.assertTrue(
+            all(
+                math.isclose(share, 1.0)
+                for share in summary.subject_fill.groupby("activity_id")["share"].sum()
+            )
+        )
+
+        empty = subject_fill[subject_fill["subject"].isna()].iloc[0]
+        self.assertEqual(empty["share"], 0.25)
+        self.assertTrue(pd.isna(empty["fill"]))
+        self.assertEqual(
+            subject_fill[subject_fill["subject"] == "Физика"].iloc[0]["fill"], 0.5
+        )
+
+        subject_counts = summary.subject_counts
+        empty_counts = subject_counts[subject_counts["subject"].isna()]
+        self.assertEqual(empty_counts[["group", "count"]].values.tolist(), [["1", 1]])
+
+    def test_missing_students(self) -> None:
+        missing_students = self.statistics.summarize().missing_students
+
+        # The student with the empty answer has responded to the first activity
+        self.assertEqual(
+            sorted(
+                zip(
+                    missing_students["activity_id"],
+                    missing_students["group"],
+                    missing_students["fullname"],
+                )
+            ),
+            [
+                (20, "1", "Петров Петр"),
+                (20, "2", "Козлов Илья"),
+                (20, "2", "Сидоров Сидор"),
+            ],
+        )
+
+    def test_write(self) -> None:
+        with TemporaryDirectory() as directory:
+            json_filename = path.join(directory, "summary.json")
+            self.statistics.write(json_filename)
+            with open(json_filename, encoding="utf-8") as file:
+                # Python accepts NaN, which isn't valid JSON
+                summary = json.loads(file.read(), parse_constant=self.fail)
+
+            excel_filename = path.join(directory, "summary.xlsx")
+            self.statistics.write(excel_filename)
+            df_counts = pd.read_excel(excel_filename, sheet_name="По группам")
+
+        self.assertIn(
+            {
+                "course_id": 1,
+                "course_name": "Курс",
+                "section_name": "Раздел",
+                "activity_id": 10,
+                "activity_name": "Выбор 1",
+                "subject": None,
+                "count": 1,
+                "share": 0.25,
+                "capacity": None,
+                "fill": None,
+            },
+            summary["subject_fill"],
+        )
+        self.assertEqual(df_counts["Всего"].sum(), 5)
+
+
+if __name__ == "__main__":
+    main()
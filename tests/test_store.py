@@ -0,0 +1,131 @@
+from logic.models import Report
+from logic.serialization import deserialize_report
+from logic.store import ReportStore
+from moodle.models import ChoiceMoodleActivity, MoodleCourseActivity
+from typing import Any, Sequence
+from unittest import TestCase, main
+import pandas as pd
+
+
+_FIRST_GROUP = "ПММ_01.03.02_Прикладная математика_Общий_1_22_о_3к"
+"""Identificator of the students of the first group."""
+
+_SECOND_GROUP = "ПММ_01.03.02_Прикладная математика_Общий_2_22_о_3к"
+"""Identificator of the students of the second group."""
+
+
+def _get_course_activity(activity_id: int, course_id: int = 1) -> MoodleCourseActivity:
+    return MoodleCourseActivity(
+        course_id,
+        f"Курс {course_id}",
+        1,
+        "Раздел",
+        ChoiceMoodleActivity(activity_id, "Выбор"),
+    )
+
+
+def _get_report(rows: Sequence[tuple[str, str, str, Any]]) -> Report:
+    # Reports are read from Excel, so the subjects come as pandas reads them
+    return deserialize_report(
+        pd.DataFrame(rows, columns=["Фамилия", "Имя", "Группа", "Вариант ответа"])
+    )
+
+
+class ReportStoreTest(TestCase):
+    """Tests of recording the reports into the snapshot database and querying them."""
+
+    def setUp(self) -> None:
+        self.store = self.enterContext(ReportStore(":memory:"))
+
+    def test_store_report_keeps_empty_and_numeric_subjects(self) -> None:
+        report = _get_report(
+            [
+                ("Иванов", "Иван", _FIRST_GROUP, 1),
+                ("Петров", "Петр", _FIRST_GROUP, float("nan")),
+                ("Сидоров", "Сидор", _FIRST_GROUP, "Физика"),
+            ]
+        )
+
+        with self.store.record_run():
+            self.store.store_report(_get_course_activity(10), report, "hash")
+
+        self.assertEqual(
+            {choice.fullname: choice.subject for choice in self.store.find_choices()},
+            {"Иванов Иван": "1", "Петров Петр": None, "Сидоров Сидор": "Физика"},
+        )
+
+    def test_find_choices_filters_latest_snapshots(self) -> None:
+        with self.store.record_run():
+            self.store.store_report(
+                _get_course_activity(10),
+                _get_report([("Иванов", "Иван", _FIRST_GROUP, "Физика")]),
+                "first",
+            )
+
+        with self.store.record_run() as run_id:
+            self.store.store_report(
+                _get_course_activity(10),
+                _get_report(
+                    [
+                        ("Иванов", "Иван", _FIRST_GROUP, "Химия"),
+                        ("Петров", "Петр", _SECOND_GROUP, "Физика"),
+                    ]
+                ),
+                "second",
+            )
+            self.store.store_report(
+                _get_course_activity(20, course_id=2),
+                _get_report([("Иванов", "Иван", _FIRST_GROUP, "Физика")]),
+                "third",
+            )
+
+        def find(**filters: Any) -> list[tuple[int, str, str | None]]:
+            return [
+                (choice.activity_id, choice.fullname, choice.subject)
+                for choice in self.store.find_choices(**filters)
+            ]
+
+        # Only the choices of the latest snapshot of every activity are found
+        self.assertTrue(
+            all(choice.run_id == run_id for choice in self.store.find_choices())
+        )
+        self.assertEqual(
+            find(subject="Физика"),
+            [(10, "Петров Петр", "Физика"), (20, "Иванов Иван", "Физика")],
+        )
+        self.assertEqual(
+            find(group=1), [(10, "Иванов Иван", "Химия"), (20, "Иванов Иван", "Физика")]
+        )
+        self.assertEqual(find(group="2"), [(10, "Петров Петр", "Физика")])
+        self.assertEqual(
+            find(student="Иванов Иван", course_id=1), [(10, "Иванов Иван", "Химия")]
+        )
+        self.assertEqual(find(subject="Биология"), [])
+
+    def test_find_previous_snapshot(self) -> None:
+        self.assertIsNone(self.store.find_previous_snapshot(10))
+
+        with self.store.record_run() as first_run_id:
+            self.store.store_report(
+                _get_course_activity(10),
+                _get_report([("Иванов", "Иван", _FIRST_GROUP, "Физика")]),
+                "first",
+            )
+
+        with self.store.record_run():
+            snapshot = self.store.find_previous_snapshot(10)
+            self.store.store_report(
+                _get_course_activity(10),
+                _get_report([("Иванов", "Иван", _FIRST_GROUP, "Химия")]),
+                "second",
+            )
+
+        self.assertIsNotNone(snapshot)
+        self.assertEqual(
+            (snapshot.run_id, snapshot.payload_hash), (first_run_id, "first")
+        )
+        self.assertEqual(self.store.find_previous_snapshot(10).payload_hash, "second")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+from aiohttp import ClientSession, web
+from aiohttp.test_utils import TestServer
+from bench.fake_moodle import STATS_PATH, FakeMoodleConfig
+from bench.runner import run_fake_moodle
+from logic.serialization import deserialize_report
+from moodle.auth import (
+    MoodleCredentials,
+    MoodleWebServiceToken,
+    authorize,
+    authorize_web_service,
+)
+from moodle.constants import MOODLE_WEB_SERVICE_TOKEN_PATH
+from moodle.exceptions import IncorrectCredentialsError
+from moodle.models import ChoiceMoodleActivity, QuizMoodleActivity
+from moodle.session import MoodleSession
+from moodle.webservice import _USER_ATTEMPTS_MAX_IN_FLIGHT, MoodleWebServiceSession
+from typing import Any
+from unittest import IsolatedAsyncioTestCase, main
+
+
+_CONFIG = FakeMoodleConfig(
+    sections=2,
+    choices_per_section=2,
+    quizzes_per_section=1,
+    students=40,
+    groups=4,
+    latency=0.01,
+    jitter=0.0,
+)
+"""Shape of the fake Moodle server the sessions are tested against."""
+
+_COURSE_ID = 7
+"""ID of the course requested from the fake server."""
+
+_QUIZ_ID = _COURSE_ID * 10_000 + 2
+"""ID of the quiz in the first section of the course."""
+
+_GROUP = "ПММ_01.03.02_Прикладная математика_Общий_1_22_о_3к"
+"""Identificator of the group the students study in."""
+
+_RESPONSES = {
+    "core_course_get_course_module": {"cm": {"instance": 100, "course": 1}},
+    "mod_choice_get_choice_results": {
+        "options": [
+            {
+                "text": "Физика",
+                "userresponses": [{"userid": 1}, {"userid": 2}, {"userid": 3}],
+            }
+        ]
+    },
+    "core_enrol_get_enrolled_users": [
+        {
+            "id": 1,
+            "lastname": "Иванов",
+            "firstname": "Иван",
+            "groups": [{"name": _GROUP}],
+        },
+        {
+            "id": 2,
+            "lastname": "Петров",
+            "firstname": "Петр",
+            "groups": [{"name": "Подгруппа практики 2"}, {"name": _GROUP}],
+        },
+        {"id": 3, "lastname": "Сидоров", "firstname": "Сидор", "groups": []},
+    ],
+}
+"""Responses of the Web Services functions the choice report is built from."""
+
+
+class MoodleWebServiceSessionTest(IsolatedAsyncioTestCase):
+    """Tests of the Web Services session against the fake Moodle server."""
+
+    async def asyncSetUp(self) -> None:
+        self.base_address = await self.enterAsyncContext(run_fake_moodle(_CONFIG))
+        credentials = MoodleCredentials(_CONFIG.login, _CONFIG.password)
+
+        token = await authorize_web_service(credentials, base_address=self.base_address)
+        self.session = await self.enterAsyncContext(
+            MoodleWebServiceSession(
+                token, max_concurrency=32, base_address=self.base_address
+            )
+        )
+
+        cached_session = await authorize(credentials, self.base_address)
+        self.html_session = await self.enterAsyncContext(
+            MoodleSession(cached_session, base_address=self.base_address)
+        )
+
+    async def test_is_valid(self) -> None:
+        self.assertTrue(await self.session.is_valid())
+
+    async def test_get_course_matches_html_session(self) -> None:
+        course = await self.session.get_course(_COURSE_ID)
+
+        # Course names come from different fields, so only the structure is compared
+        html_course = await self.html_session.get_course(_COURSE_ID)
+        self.assertEqual(course.sections, html_course.sections)
+        activities = [
+            activity for section in course.sections for activity in section.activities
+        ]
+        self.assertEqual(len(course.sections), _CONFIG.sections)
+        self.assertEqual(
+            sum(isinstance(activity, ChoiceMoodleActivity) for activity in activities),
+            _CONFIG.sections * _CONFIG.choices_per_section,
+        )
+        self.assertEqual(
+            sum(isinstance(activity, QuizMoodleActivity) for activity in activities),
+            _CONFIG.sections * _CONFIG.quizzes_per_section,
+        )
+
+    async def test_iter_course_activities(self) -> None:
+        course = await self.session.get_course(_COURSE_ID)
+
+        course_activities = [
+            course_activity
+            async for course_activity in self.session.iter_course_activities(_COURSE_ID)
+        ]
+
+        self.assertEqual(
+            [course_activity.activity for course_activity in course_activities],
+            [
+                activity
+                for section in course.sections
+                for activity in section.activities
+            ],
+        )
+        self.assertTrue(
+            all(
+                course_activity.course_name == course.name
+                for course_activity in course_activities
+            )
+        )
+
+    async def test_get_excel_report(self) -> None:
+        df_report = await self.session.get_excel_report(_COURSE_ID * 10_000)
+
+        self.assertEqual(
+            list(df_report.columns), ["Фамилия", "Имя", "Группа", "Вариант ответа"]
+        )
+        self.assertEqual(len(df_report), _CONFIG.students)
+        self.assertTrue(df_report["Вариант ответа"].str.startswith("Предмет").all())
+
+    async def test_get_quiz_attempts(self) -> None:
+        await self.__get_stats(reset=True)
+
+        pages = [
+            page
+            async for page in self.session.get_quiz_attempts(_QUIZ_ID, page_size=16)
+        ]
+
+        self.assertEqual([len(page) for page in pages], [16, 16, 8])
+        attempts = [attempt for page in pages for attempt in page]
+        self.assertEqual(
+            sorted(attempt.id for attempt in attempts),
+            [_QUIZ_ID * 10_000 + id for id in range(1, _CONFIG.students + 1)],
+        )
+        self.assertTrue(all(attempt.finished for attempt in attempts))
+
+        # The attempts are requested per user, but never more than the cap at a time
+        stats = await self.__get_stats()
+        self.assertLessEqual(stats["peak_parallelism"], _USER_ATTEMPTS_MAX_IN_FLIGHT)
+
+    async def test_iter_attempt_reviews_matches_html_session(self) -> None:
+        attempt_ids = [_QUIZ_ID * 10_000 + id for id in range(1, 11)]
+
+        reviews = [
+            review async for review in self.session.iter_attempt_reviews(attempt_ids)
+        ]
+        html_reviews = [
+            review
+            async for review in self.html_session.iter_attempt_reviews(attempt_ids)
+        ]
+
+        self.assertEqual(
+            sorted(reviews, key=lambda review: review.attempt_id),
+            sorted(html_reviews, key=lambda review: review.attempt_id),
+        )
+        self.assertTrue(
+            all(len(review.questions[0].answers) == 1 for review in reviews)
+        )
+
+    async def __get_stats(self, reset: bool = False) -> dict[str, Any]:
+        async with ClientSession(self.base_address) as client:
+            async with client.get(
+                STATS_PATH, params={"reset": 1} if reset else None
+            ) as response:
+                return await response.json()
+
+
+class _CannedWebServiceSession(MoodleWebServiceSession):
+    """Web Services session responding with `_RESPONSES` instead of calling Moodle."""
+
+    async def _call(self, function: str, **params: Any) -> Any:
+        return _RESPONSES[function]
+
+
+class MoodleWebServiceGroupTest(IsolatedAsyncioTestCase):
+    """Tests of picking the group of a student from the responses of the Web Services."""
+
+    async def asyncSetUp(self) -> None:
+        self.session = await self.enterAsyncContext(
+            _CannedWebServiceSession(MoodleWebServiceToken("student", "token"))
+        )
+
+    async def test_get_excel_report_picks_identificator_group(self) -> None:
+        df_report = await self.session.get_excel_report(10)
+
+        self.assertEqual(df_report["Группа"].tolist(), [_GROUP, _GROUP, ""])
+
+        # The students of the same group get into the same sheet of the report
+        report = deserialize_report(df_report.iloc[:2])
+        self.assertEqual(
+            {
+                group: [student.fullname for student in students]
+                for group, students in report.groups.items()
+            },
+            {"1": ["Иванов Иван", "Петров Петр"]},
+        )
+
+
+class AuthorizeWebServiceTest(IsolatedAsyncioTestCase):
+    """Tests of requesting a Web Services token from the token endpoint."""
+
+    async def __serve(self, response: Any) -> str:
+        async def token(_: web.Request) -> web.Response:
+            return web.json_response(response)
+
+        app = web.Application()
+        app.router.add_post(MOODLE_WEB_SERVICE_TOKEN_PATH, token)
+        server = await self.enterAsyncContext(TestServer(app))
+        return str(server.make_url("")).rstrip("/")
+
+    async def test_token(self) -> None:
+        base_address = await self.__serve({"token": "secret"})
+
+        token = await authorize_web_service(
+            MoodleCredentials("student", "password"), base_address=base_address
+        )
+        self.assertEqual(token, MoodleWebServiceToken("student", "secret"))
+
+    async def test_error_object_is_incorrect_credentials(self) -> None:
+        base_address = await self.__serve(
+            {"error": "Invalid login", "errorcode": "invalidlogin"}
+        )
+
+        with self.assertRaises(IncorrectCredentialsError):
+            await authorize_web_service(
+                MoodleCredentials("student", "password"), base_address=base_address
+            )
+
+    async def test_unexpected_response_is_connection_error(self) -> None:
+        for response in (["token"], "token", None):
+            with self.subTest(response=response):
+                base_address = await self.__serve(response)
+
+                with self.assertRaises(ConnectionError):
+                    await authorize_web_service(
+                        MoodleCredentials("student", "password"),
+                        base_address=base_address,
+                    )
+
+
+if __name__ == "__main__":
+    main()
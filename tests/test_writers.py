@@ -0,0 +1,170 @@
+from logic.models import Report, Student, StudentBatch
+from logic.serialization import collation_key
+from logic.writers import ExcelReportWriter, WorkbookReportWriter
+from moodle.models import (
+    ChoiceMoodleActivity,
+    MoodleCourseActivity,
+    QuizMoodleActivity,
+)
+from openpyxl import load_workbook
+from os import path
+from tempfile import TemporaryDirectory
+from typing import Any
+from unittest import TestCase, main
+import tracemalloc
+
+
+_COURSE_ACTIVITY = MoodleCourseActivity(
+    1, "Курс", 1, "Раздел", QuizMoodleActivity(2, "Опрос")
+)
+"""The quiz whose report is written page by page."""
+
+_PAGE_SIZE = 50
+"""The number of students in every page."""
+
+_SURNAMES = ["Ежов", "Ёжиков", "Жуков", "Абрамов", "ёлкин", "Елкина"]
+"""Surnames sorted differently by the code points and by the collation key."""
+
+
+def _get_page(index: int) -> Report:
+    fullnames = [
+        f"{_SURNAMES[number % len(_SURNAMES)]} {number}"
+        for number in range(index * _PAGE_SIZE, (index + 1) * _PAGE_SIZE)
+    ]
+    subjects = [f"Предмет {number % 3}" for number in range(len(fullnames))]
+
+    # Pages are shaped like the quiz reports, which come in fetch order with two groups
+    return Report(
+        {
+            "2": StudentBatch(
+                fullnames[1::2], subjects[1::2], [None] * (_PAGE_SIZE // 2)
+            ),
+            "1": StudentBatch(
+                fullnames[::2], subjects[::2], [None] * (_PAGE_SIZE // 2)
+            ),
+        }
+    )
+
+
+def _read_workbook(filename: str) -> dict[str, tuple[list[Any], list[float]]]:
+    workbook = load_workbook(filename)
+    return {
+        worksheet.title: (
+            list(worksheet.values),
+            [worksheet.column_dimensions[letter].width for letter in "AB"],
+        )
+        for worksheet in workbook.worksheets
+    }
+
+
+class ExcelReportWriterTest(TestCase):
+    """Tests of writing the reports of the quizzes page by page into Excel workbooks."""
+
+    def test_write_page_doesnt_keep_rows(self) -> None:
+        with TemporaryDirectory() as directory:
+            tracemalloc.start()
+            try:
+                with ExcelReportWriter(directory) as writer:
+                    for index in range(200):
+                        writer.write_page(_COURSE_ACTIVITY, _get_page(index))
+                        if index == 19:
+                            early_size, _ = tracemalloc.get_traced_memory()
+
+                    late_size, _ = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+            sheets = _read_workbook(path.join(directory, "Курс-Раздел-Опрос.xlsx"))
+
+        # 180 more pages of 50 students would take megabytes if the rows were kept
+        self.assertLess(late_size - early_size, 64 * 1024)
+        self.assertEqual(list(sheets), ["2", "1"])
+        self.assertEqual(sum(len(rows) - 1 for rows, _ in sheets.values()), 10_000)
+
+    def test_write_page_matches_write(self) -> None:
+        pages = [_get_page(index) for index in range(5)]
+        report = Report(
+            {
+                group: StudentBatch(
+                    [name for page in pages for name in page.groups[group].fullnames],
+                    [
+                        subject
+                        for page in pages
+                        for subject in page.groups[group].subjects
+                    ],
+                    [None] * (_PAGE_SIZE // 2) * len(pages),
+                )
+                for group in ("2", "1")
+            }
+        )
+
+        with TemporaryDirectory() as directory:
+            filename = path.join(directory, "Курс-Раздел-Опрос.xlsx")
+            with ExcelReportWriter(directory) as writer:
+                writer.write(_COURSE_ACTIVITY, report)
+            written = _read_workbook(filename)
+
+            with ExcelReportWriter(directory) as writer:
+                for page in pages:
+                    writer.write_page(_COURSE_ACTIVITY, page)
+            paged = _read_workbook(filename)
+
+        self.assertEqual(paged, written)
+        rows, _ = paged["1"]
+        fullnames = [fullname for fullname, _ in rows[1:]]
+        self.assertEqual(fullnames, sorted(fullnames, key=collation_key))
+
+
+class WorkbookReportWriterTest(TestCase):
+    """Tests of writing the choices of the whole course into a single workbook."""
+
+    def test_namesakes_and_empty_answers_are_kept(self) -> None:
+        first_activity, second_activity = (
+            MoodleCourseActivity(
+                1, "Курс", 1, "Раздел", ChoiceMoodleActivity(id, f"Выбор {id}")
+            )
+            for id in (10, 20)
+        )
+
+        with TemporaryDirectory() as directory:
+            with WorkbookReportWriter(directory) as writer:
+                writer.write(
+                    first_activity,
+                    Report(
+                        {
+                            "1": [
+                                Student("Иванов Иван", "Физика"),
+                                Student("Ёжиков Петр", None),
+                                Student("Иванов Иван", "Химия"),
+                            ]
+                        }
+                    ),
+                )
+                writer.write(
+                    second_activity,
+                    Report(
+                        {
+                            "1": [
+                                Student("Иванов Иван", "История"),
+                                Student("Ежов Олег", "Биология"),
+                            ]
+                        }
+                    ),
+                )
+
+            rows = list(load_workbook(path.join(directory, "Курс.xlsx"))["1"].values)
+
+        self.assertEqual(
+            rows,
+            [
+                ("ФИО", "Раздел. Выбор 10", "Раздел. Выбор 20"),
+                ("Ёжиков Петр", None, None),
+                ("Ежов Олег", None, "Биология"),
+                ("Иванов Иван", "Физика", "История"),
+                ("Иванов Иван", "Химия", None),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    main()